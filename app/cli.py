@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""nutty: list, add and open saved connections from a shell.
+
+Only the storage, terminal and command-building modules are imported, never
+Qt, so `nutty connect web-1` from a window-manager keybinding opens the
+terminal in a few tens of milliseconds instead of starting the whole GUI.
+When nuTTY is already running, requests are handed to it instead, and it
+answers from the connections it has already decrypted.
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+from config import load_config, get_connections_file_path
+from commands import launch_command
+from name_index import read_name_index, write_name_index, find_connection
+from instance import send_request, LIST_FIELDS
+
+BASH_COMPLETION = r'''_nutty() {
+    local cur=${COMP_WORDS[COMP_CWORD]}
+    if [ "$COMP_CWORD" -eq 1 ]; then
+        COMPREPLY=($(compgen -W "list connect add names lock completion" -- "$cur"))
+    elif [ "${COMP_WORDS[1]}" = connect ]; then
+        local IFS=$'\n'
+        COMPREPLY=($(nutty names -- "$cur" | sed 's/ /\\ /g'))
+    fi
+}
+complete -F _nutty nutty
+'''
+
+
+class CliError(Exception):
+    pass
+
+
+def open_store(config):
+    """Unlock the key and load the store; returns (store, connections)."""
+    from session_key import unlock_key
+    from cryptography.fernet import Fernet
+    from store import ConnectionStore
+    store = ConnectionStore(get_connections_file_path(), Fernet(unlock_key(config)))
+    connections = store.load()
+    # Keep completion current for the names we just decrypted anyway
+    write_name_index(connections)
+    return store, connections
+
+
+def forward(request):
+    """Hand request to the running instance; returns its reply, or None if nuTTY isn't running."""
+    reply = send_request(request)
+    if reply is not None and not reply.get('ok'):
+        raise CliError(reply.get('error') or f"{request['command']} failed")
+    return reply
+
+
+def available_terminals():
+    from terminals import TerminalRegistry
+    registry = TerminalRegistry()
+    found, fresh = registry.read_cache()
+    # Nothing runs after us to pick up a background rescan, so a stale cache is rescanned now
+    if found is None or not fresh:
+        found = registry.rescan()
+    return found
+
+
+def command_list(args, config):
+    reply = forward({'command': 'list'})
+    if reply is not None:
+        connections = reply['connections']
+    else:
+        connections = [{field: connection.get(field) for field in LIST_FIELDS} for connection in open_store(config)[1]]
+    connections.sort(key=lambda connection: (connection.get('name') or '').lower())
+    if args.json:
+        print(json.dumps(connections, indent=2))
+        return 0
+    for connection in connections:
+        print(f"{connection.get('name', '')}\t{connection['username']}@{connection['domain']}\t{connection['protocol']}")
+    return 0
+
+
+def command_connect(args, config):
+    # The running instance launches it, so the session shows up under Active Sessions
+    if not args.print and forward({'command': 'connect', 'name': args.name}) is not None:
+        return 0
+    _, connections = open_store(config)
+    try:
+        connection = find_connection(connections, args.name)
+    except LookupError as e:
+        raise CliError(str(e))
+    terminals = available_terminals()
+    if not config.get('terminal_emulator') and terminals:
+        config['terminal_emulator'] = next(iter(terminals))
+    terminal_name = config.get('terminal_emulator')
+    if not terminals:
+        raise CliError("No supported terminal emulator is installed")
+    if terminal_name not in terminals:
+        raise CliError(f"Terminal emulator '{terminal_name}' not found")
+
+    control_options = []
+    if connection['protocol'] == 'SSH':
+        from multiplex import MultiplexManager
+        control_options = MultiplexManager(config).control_options(connection)
+    command = launch_command(connection, terminals[terminal_name], control_options)
+    if args.print:
+        print(subprocess.list2cmdline(command))
+        return 0
+    # Detach, so the session outlives this process and the shell that started it
+    subprocess.Popen(command, shell=False, start_new_session=True,
+                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return 0
+
+
+def command_add(args, config):
+    connection = {
+        'name': args.name,
+        'username': args.user,
+        'domain': args.host,
+        'protocol': args.protocol,
+        'x11': args.x11,
+        'description': args.description,
+        'use_identity_file': bool(args.identity_file),
+        'identity_file': os.path.expanduser(args.identity_file) if args.identity_file else None,
+        'secret': None,
+    }
+    if args.port:
+        connection['port'] = args.port
+    # With nuTTY running, it must be the one writing the store
+    if forward({'command': 'add', 'connection': connection}) is None:
+        from store import new_connection_id
+        store, connections = open_store(config)
+        connection['id'] = new_connection_id()
+        store.put(connection)
+        store.flush_pending()
+        write_name_index(connections + [connection])
+    print(f"Added {args.name}")
+    return 0
+
+
+def command_names(args, config):
+    names = read_name_index()
+    if names is None:
+        names = sorted(connection.get('name', '') for connection in open_store(config)[1])
+    prefix = args.prefix.lower()
+    for name in names:
+        if name.lower().startswith(prefix):
+            print(name)
+    return 0
+
+
+def command_lock(args, config):
+    """Drop the key from the session key cache, e.g. from a screen locker hook."""
+    from session_key import SessionKeyCache
+    SessionKeyCache().clear()
+    return 0
+
+
+def command_completion(args, config):
+    print(BASH_COMPLETION, end='')
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='nutty', description="Open saved nuTTY connections from the shell.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = commands.add_parser('list', help="list saved connections")
+    list_parser.add_argument('--json', action='store_true', help="print the connections as JSON")
+    list_parser.set_defaults(handler=command_list)
+
+    connect_parser = commands.add_parser('connect', help="open a connection in a terminal")
+    connect_parser.add_argument('name', help="connection name, or a unique prefix of one")
+    connect_parser.add_argument('--print', action='store_true', help="print the command instead of running it")
+    connect_parser.set_defaults(handler=command_connect)
+
+    add_parser = commands.add_parser('add', help="save a new connection")
+    add_parser.add_argument('--name', required=True)
+    add_parser.add_argument('--host', required=True, help="host name or address")
+    add_parser.add_argument('--user', required=True)
+    add_parser.add_argument('--protocol', choices=('SSH', 'Telnet'), default='SSH')
+    add_parser.add_argument('--port', type=int)
+    add_parser.add_argument('--x11', action='store_true', help="forward X11")
+    add_parser.add_argument('--identity-file')
+    add_parser.add_argument('--description', default='')
+    add_parser.set_defaults(handler=command_add)
+
+    names_parser = commands.add_parser('names', help="print connection names for shell completion")
+    names_parser.add_argument('prefix', nargs='?', default='')
+    names_parser.set_defaults(handler=command_names)
+
+    lock_parser = commands.add_parser('lock', help="forget the key cached by the session key cache")
+    lock_parser.set_defaults(handler=command_lock)
+
+    completion_parser = commands.add_parser('completion', help="print a bash completion script")
+    completion_parser.add_argument('shell', nargs='?', choices=('bash',), default='bash')
+    completion_parser.set_defaults(handler=command_completion)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args, load_config())
+    except CliError as e:
+        print(f"nutty: {str(e)}", file=sys.stderr)
+        return 2
+    except Exception as e:
+        print(f"nutty: {args.command} failed: {str(e)}", file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
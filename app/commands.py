@@ -0,0 +1,59 @@
+"""Building the terminal command lines that launch a connection.
+
+Nothing here imports Qt, so the command-line interface can launch sessions
+exactly the way the window does without paying for PyQt5.
+"""
+
+
+def terminal_info(config, available_terminals):
+    """Return (command, args, use_single_arg) for the configured emulator."""
+    terminal_name = config.get('terminal_emulator')
+    info = available_terminals.get(terminal_name)
+    if not info:
+        raise ValueError(f"Terminal emulator '{terminal_name}' not found")
+    return info
+
+
+def wrap_in_terminal(terminal, program_args):
+    command, args, use_single_arg = terminal
+    terminal_command = [command]
+    terminal_command.extend(args)
+    if use_single_arg:
+        terminal_command.append(" ".join(program_args))
+    else:
+        terminal_command.extend(program_args)
+    return terminal_command
+
+
+def ssh_command(connection, terminal, control_options=()):
+    ssh_args = ["ssh"]
+    if connection.get('x11', False):
+        ssh_args.append("-X")
+    if connection.get('use_identity_file', False) and connection.get('identity_file'):
+        ssh_args.extend(["-i", connection['identity_file']])
+    # Attach to (or become) the host's shared master when multiplexing is on
+    ssh_args.extend(control_options)
+    # Imported hosts go through their alias so ssh applies the rest of their Host entry
+    ssh_args.append(f"{connection['username']}@{connection.get('ssh_alias') or connection['domain']}")
+    return wrap_in_terminal(terminal, ssh_args)
+
+
+def telnet_command(connection, terminal):
+    telnet_args = ["telnet", connection['domain']]
+
+    # Add port if specified (default Telnet port is 23)
+    if 'port' in connection and connection['port']:
+        telnet_args.append(str(connection['port']))
+    return wrap_in_terminal(terminal, telnet_args)
+
+
+def launch_command(connection, terminal, control_options=(), tab_args=()):
+    """Return the full command for a connection; tab_args go right after the emulator."""
+    if connection['protocol'] == 'SSH':
+        command = ssh_command(connection, terminal, control_options)
+    elif connection['protocol'] == 'Telnet':
+        command = telnet_command(connection, terminal)
+    else:
+        raise ValueError(f"Unsupported protocol: {connection['protocol']}")
+    command[1:1] = tab_args
+    return command
@@ -1,9 +1,14 @@
 import json
 import os
-from cryptography.fernet import Fernet
+import stat
+import logging
+import time
+import hashlib
 import appdirs
 import shutil
-import keyring
+import tempfile
+from writer import atomic_write
+from tracing import span
 # Global DEV flag
 DEV = True  # Set this to False for production
 
@@ -13,6 +18,7 @@ KEY_ID = "encryption_key"
 
 # Get the user's config directory
 CONFIG_DIR = appdirs.user_config_dir(APP_NAME)
+CACHE_DIR = appdirs.user_cache_dir(APP_NAME)
 
 # Ensure the config directory exists
 os.makedirs(CONFIG_DIR, exist_ok=True)
@@ -25,106 +31,184 @@ THEMES_DIR = os.path.join(CONFIG_DIR, 'themes')
 # Development themes directory
 DEV_THEMES_DIR = os.path.join(os.path.dirname(__file__), 'assets', 'themes')
 
+# Records what was last copied into THEMES_DIR so unchanged themes can be skipped
+THEMES_MANIFEST = os.path.join(THEMES_DIR, '.manifest.json')
+
 # Add this new function at the top level of the module
 def initialize_config():
     """Initialize the configuration and ensure themes are set up."""
-    ensure_themes_dir()
     config = load_config()
+    # 'packaged' reads themes straight from assets/themes and never copies them
+    if config.get('theme_source', 'copy') != 'packaged':
+        report = ensure_themes_dir()
+        logging.debug(f"Themes: {len(report['copied'])} copied, {len(report['unchanged'])} unchanged "
+                      f"in {report['seconds'] * 1000:.1f} ms")
     return config
 
+def _theme_file_stats(theme_path):
+    """Return {relative path: [size, mtime_ns]} for every file in a theme directory."""
+    stats = {}
+    for root, _, files in os.walk(theme_path):
+        for name in files:
+            path = os.path.join(root, name)
+            st = os.stat(path)
+            stats[os.path.relpath(path, theme_path)] = [st.st_size, st.st_mtime_ns]
+    return stats
+
+def _theme_hash(theme_path, relative_paths):
+    digest = hashlib.sha256()
+    for relative_path in sorted(relative_paths):
+        digest.update(relative_path.encode())
+        with open(os.path.join(theme_path, relative_path), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def _load_themes_manifest():
+    try:
+        with open(THEMES_MANIFEST, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
 def ensure_themes_dir():
-    """Ensure the themes directory exists and is populated."""
+    """Copy packaged themes into THEMES_DIR, skipping any whose content hasn't changed.
+
+    A manifest of file sizes, mtimes and content hashes is kept next to the copies.
+    Unchanged stats skip a theme without reading it; changed stats fall back to
+    comparing hashes. A copy the user has edited is only overwritten in DEV mode.
+    Returns a report with the themes copied, those left alone and the time taken.
+    """
+    start = time.perf_counter()
     os.makedirs(THEMES_DIR, exist_ok=True)
-    global DEV
-    if DEV:
-        print(f"Copying themes from {DEV_THEMES_DIR} to {THEMES_DIR} in DEV mode")
-        for theme in os.listdir(DEV_THEMES_DIR):
-            theme_path = os.path.join(DEV_THEMES_DIR, theme)
-            if os.path.isdir(theme_path):
-                dest_path = os.path.join(THEMES_DIR, theme)
-                if os.path.exists(dest_path):
-                    shutil.rmtree(dest_path)
-                shutil.copytree(theme_path, dest_path)
-    else:
-        # Only copy if the destination doesn't exist
-        for theme in os.listdir(DEV_THEMES_DIR):
-            theme_path = os.path.join(DEV_THEMES_DIR, theme)
-            if os.path.isdir(theme_path):
-                dest_path = os.path.join(THEMES_DIR, theme)
-                if not os.path.exists(dest_path):
-                    shutil.copytree(theme_path, dest_path)
-
-def load_or_generate_key():
-    key = keyring.get_password(APP_NAME, KEY_ID)
+    manifest = _load_themes_manifest()
+    report = {'copied': [], 'unchanged': [], 'seconds': 0.0}
+
+    for theme in sorted(os.listdir(DEV_THEMES_DIR)):
+        theme_path = os.path.join(DEV_THEMES_DIR, theme)
+        if not os.path.isdir(theme_path):
+            continue
+        dest_path = os.path.join(THEMES_DIR, theme)
+        entry = manifest.get(theme)
+        stats = _theme_file_stats(theme_path)
+
+        if entry and os.path.isdir(dest_path):
+            if entry['stats'] == stats:
+                report['unchanged'].append(theme)
+                continue
+            content_hash = _theme_hash(theme_path, stats)
+            if entry['hash'] == content_hash:
+                entry['stats'] = stats
+                report['unchanged'].append(theme)
+                continue
+            if not DEV and _theme_hash(dest_path, _theme_file_stats(dest_path)) != entry['hash']:
+                # The installed copy was customised by the user; leave it alone
+                report['unchanged'].append(theme)
+                continue
+        else:
+            content_hash = _theme_hash(theme_path, stats)
+
+        tmp_path = f"{dest_path}.tmp"
+        if os.path.exists(tmp_path):
+            shutil.rmtree(tmp_path)
+        shutil.copytree(theme_path, tmp_path)
+        if os.path.exists(dest_path):
+            shutil.rmtree(dest_path)
+        os.rename(tmp_path, dest_path)
+        manifest[theme] = {'stats': stats, 'hash': content_hash}
+        report['copied'].append(theme)
+
+    atomic_write(THEMES_MANIFEST, json.dumps(manifest, indent=4).encode())
+    report['seconds'] = time.perf_counter() - start
+    return report
+
+def get_theme_dir(theme_name):
+    """Return the directory for a theme, preferring the user's copy over the packaged one."""
+    for base_dir in (THEMES_DIR, DEV_THEMES_DIR):
+        theme_dir = os.path.join(base_dir, theme_name)
+        if os.path.isdir(theme_dir):
+            return theme_dir
+    return None
+
+def list_themes():
+    """Return the names of all installed and packaged themes."""
+    themes = set()
+    for base_dir in (THEMES_DIR, DEV_THEMES_DIR):
+        if os.path.isdir(base_dir):
+            themes.update(d for d in os.listdir(base_dir)
+                          if os.path.isdir(os.path.join(base_dir, d)) and not d.endswith('.tmp'))
+    return sorted(themes)
+
+def load_or_generate_key(backend=None):
+    # Imported here so startup doesn't pay for keyring and cryptography until the
+    # store is actually unlocked
+    if backend is None:
+        import keyring as backend
+    key = backend.get_password(APP_NAME, KEY_ID)
     if not key:
+        from cryptography.fernet import Fernet
         key = Fernet.generate_key()
-        keyring.set_password(APP_NAME, KEY_ID, key.decode())
+        backend.set_password(APP_NAME, KEY_ID, key.decode())
         print("New key generated and stored in system keyring.")
     return key.encode() if isinstance(key, str) else key
 
 def load_config():
     """Load configuration from config.json."""
     if os.path.exists(CONFIG_FILE):
-        with open(CONFIG_FILE, 'r') as f:
+        with span("config.parse"), open(CONFIG_FILE, 'r') as f:
             return json.load(f)
     return {}
 
 def save_config(config):
     """Save configuration to config.json."""
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump(config, f, indent=4)
+    with span("config.save"):
+        atomic_write(CONFIG_FILE, json.dumps(config, indent=4).encode())
 
 # Helper function to get connections file path
 def get_connections_file_path():
     return CONNECTIONS_FILE
 
+def runtime_dir(subdirectory=None):
+    """Return a private per-user directory for files that shouldn't outlive the login session.
+
+    Without XDG_RUNTIME_DIR this falls back to the shared temp directory, where
+    another user could create the directory first, so it is only used when it
+    turns out to be a real directory that we own and nobody else can enter.
+    """
+    base = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    path = _private_dir(os.path.join(base, f"{APP_NAME}-{os.getuid()}"))
+    if subdirectory:
+        path = _private_dir(os.path.join(path, subdirectory))
+    return path
+
+def _private_dir(path):
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) != 0o700:
+        raise PermissionError(f"Refusing to use {path}: it must be a directory owned by you with mode 0700")
+    return path
+
 def load_theme(theme_name):
     """Load a theme from its directory."""
-    theme_dir = os.path.join(THEMES_DIR, theme_name)
-    
-    if not os.path.exists(theme_dir):
-        # If the theme doesn't exist in the runtime directory, copy it from the development directory
-        dev_theme_dir = os.path.join(DEV_THEMES_DIR, theme_name)
-        if os.path.exists(dev_theme_dir):
-            shutil.copytree(dev_theme_dir, theme_dir)
-        else:
-            print(f"Theme '{theme_name}' not found in development or runtime directories.")
-            return None
+    theme_dir = get_theme_dir(theme_name)
+    if theme_dir is None:
+        print(f"Theme '{theme_name}' not found in development or runtime directories.")
+        return None
 
     style_file = os.path.join(theme_dir, 'styles.json')
     if os.path.exists(style_file):
-        with open(style_file, 'r') as f:
-            theme_data = json.load(f)
+        with span("theme.load"):
+            with open(style_file, 'rb') as f:
+                raw = f.read()
+            theme_data = json.loads(raw)
         
         # Update image paths to be absolute
         for key, value in theme_data.items():
             if isinstance(value, str) and value.endswith(('.png', '.jpg', '.jpeg', '.gif')):
                 theme_data[key] = os.path.join(theme_dir, value)
         
+        # Identifies the compiled stylesheet cache entry; image paths depend on theme_dir
+        theme_data['_hash'] = hashlib.sha256(theme_dir.encode() + b'\0' + raw).hexdigest()
         return theme_data
     else:
         print(f"styles.json not found for theme '{theme_name}'")
         return None
-
-def find_terminals():
-    common_terminal_names = {
-        "XTerm": ("xterm", ["-hold", "-e"], False),
-        "GNOME Terminal": ("gnome-terminal", ["--", "bash", "-c"], True),
-        "Konsole": ("konsole", ["-e", "bash", "-c"], True),
-        "XFCE Terminal": ("xfce4-terminal", ["--hold", "-e"], True),
-        "LXTerminal": ("lxterminal", ["-e", "bash", "-c"], True),
-        "Tilix": ("tilix", ["-e", "bash", "-c"], True),
-        "Alacritty": ("alacritty", ["-e", "bash", "-c"], True),
-        "Kitty": ("kitty", ["bash", "-c"], True),
-        "URxvt": ("urxvt", ["-hold", "-e"], False),
-        "st": ("st", ["-e", "bash", "-c"], True),
-        "Eterm": ("eterm", ["-e", "bash", "-c"], True),
-        "Mate Terminal": ("mate-terminal", ["-e", "bash", "-c"], True)
-    }
-
-    available_terminal_emulators = {}
-
-    for name, (command, args, use_single_arg) in common_terminal_names.items():
-        if shutil.which(command):
-            available_terminal_emulators[name] = (command, args, use_single_arg)
-    return available_terminal_emulators
\ No newline at end of file
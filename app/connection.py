@@ -0,0 +1,149 @@
+import sys
+from collections.abc import MutableMapping
+
+# Every field nuTTY itself writes; each gets a slot instead of a dict entry
+FIELDS = (
+    'id', 'name', 'username', 'domain', 'protocol', 'x11', 'description',
+    'use_identity_file', 'identity_file', 'secret', 'port',
+    'ssh_alias', 'source', 'import_hash', 'multiplex', 'prewarm', 'group',
+)
+FIELD_SET = frozenset(FIELDS)
+# Fields whose values repeat across many connections; equal strings share one object
+INTERNED_FIELDS = frozenset(('username', 'protocol', 'identity_file', 'source', 'description', 'group'))
+# Stands in for an empty slot where raising AttributeError would be too slow
+_MISSING = object()
+
+
+class Connection(MutableMapping):
+    """One saved connection, stored in slots rather than a per-row dict.
+
+    It behaves like the dict it replaces, so connection['name'],
+    connection.get('port') and 'port' in connection work unchanged. A field
+    that was never set is simply an empty slot, which is how optional keys
+    such as 'port' stay absent. Keys nuTTY doesn't know about, e.g. from a
+    newer version, are kept in a small side dict so they survive a save.
+    """
+
+    __slots__ = FIELDS + ('extra',)
+
+    def __init__(self, values=(), **kwargs):
+        self.extra = None
+        self.update(values, **kwargs)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a Connection from a store record; the fast path used when loading."""
+        connection = cls.__new__(cls)
+        connection.extra = None
+        for key, value in data.items():
+            if key in FIELD_SET:
+                if key in INTERNED_FIELDS and type(value) is str:
+                    value = sys.intern(value)
+                setattr(connection, key, value)
+            else:
+                if connection.extra is None:
+                    connection.extra = {}
+                connection.extra[key] = value
+        return connection
+
+    @classmethod
+    def from_pairs(cls, keys, values):
+        """Build a Connection from parallel key and value lists whose strings are already shared."""
+        connection = cls.__new__(cls)
+        connection.extra = None
+        for key, value in zip(keys, values):
+            if key in FIELD_SET:
+                setattr(connection, key, value)
+            else:
+                if connection.extra is None:
+                    connection.extra = {}
+                connection.extra[key] = value
+        return connection
+
+    def to_dict(self):
+        """Return the plain dict the store serializes, with absent fields left out."""
+        data = {}
+        for key in FIELDS:
+            value = getattr(self, key, _MISSING)
+            if value is not _MISSING:
+                data[key] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __eq__(self, other):
+        if isinstance(other, Connection):
+            return self.to_dict() == other.to_dict()
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def __getitem__(self, key):
+        if key in FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self.extra is None:
+            raise KeyError(key)
+        return self.extra[key]
+
+    def get(self, key, default=None):
+        # Called for every field of every painted row, so skip the KeyError round trip
+        if key in FIELD_SET:
+            return getattr(self, key, default)
+        return self.extra.get(key, default) if self.extra else default
+
+    def __contains__(self, key):
+        if key in FIELD_SET:
+            return hasattr(self, key)
+        return bool(self.extra) and key in self.extra
+
+    def __setitem__(self, key, value):
+        if key in FIELD_SET:
+            if key in INTERNED_FIELDS and type(value) is str:
+                value = sys.intern(value)
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        if key in FIELD_SET:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self.extra and key in self.extra:
+            del self.extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        for key in FIELDS:
+            if hasattr(self, key):
+                yield key
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        return sum(1 for key in FIELDS if hasattr(self, key)) + (len(self.extra) if self.extra else 0)
+
+    def copy(self):
+        return Connection.from_dict(self.to_dict())
+
+    def __repr__(self):
+        return f"Connection({self.to_dict()!r})"
+
+
+def as_connection(value):
+    """Return value as a Connection, converting dicts from dialogs, importers and the CLI."""
+    return value if isinstance(value, Connection) else Connection.from_dict(value)
+
+
+def connection_to_json(value):
+    """json.dumps default= hook that serializes Connections as their store dicts."""
+    if isinstance(value, Connection):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
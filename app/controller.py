@@ -1,110 +1,367 @@
 from model import ConnectionListModel
-from config import save_config, get_connections_file_path, find_terminals, load_theme
-import json
-import subprocess
-import os
+from config import save_config, get_connections_file_path, load_theme
+from terminals import TerminalRegistry
+from store import ConnectionStore, new_connection_id
+from search import SearchIndex
+from writer import BackgroundWriter
+from probe import create_probe_engine
+from multiplex import MultiplexManager
+from launcher import BulkLauncher, DEFAULT_CONCURRENCY, DEFAULT_STAGGER
+from sessions import SessionSupervisor
+from ssh_import import IMPORT_SOURCE, IMPORTED_FIELDS, forget_hosts
+from commands import terminal_info, ssh_command, telnet_command, launch_command
+from name_index import write_name_index
+from connection import as_connection
+import copy
 import logging
 
 class Controller:
-    def __init__(self, config, cipher_suite):
+    def __init__(self, config, cipher_suite=None):
         self.config = config
-        self.cipher_suite = cipher_suite
-        self.connection_list_model = ConnectionListModel(self.load_connections())
-        self.available_terminal_emulators = find_terminals()
+        self.cipher_suite = None
+        self.store = None
+        self.writer = BackgroundWriter()
+        self.connection_list_model = ConnectionListModel()
+        self.search_index = SearchIndex()
+        self.available_terminal_emulators = {}
+        self.terminal_executable = 'xterm'
+        self.terminal_registry = None
+        # Checks whether saved hosts are reachable; None when turned off in config
+        self.prober = create_probe_engine(config)
+        self.multiplexer = MultiplexManager(config)
+        # Every terminal we start, so they get reaped and show up under Active Sessions
+        self.sessions = SessionSupervisor()
+        # Without a cipher the window can come up first and call open_store() and
+        # load_terminals() once it is on screen
+        if cipher_suite is not None:
+            self.open_store(cipher_suite)
+            self.load_terminals()
+
+    def open_store(self, cipher_suite):
+        """Decrypt the connection store and publish its contents to the model."""
+        self.publish_store(*self.load_store(cipher_suite))
+
+    def load_store(self, cipher_suite):
+        """Open and decrypt the connection store; safe to call off the GUI thread."""
+        store = ConnectionStore(get_connections_file_path(), cipher_suite)
+        connections = store.load()
+        if store.needs_compaction():
+            store.compact(connections)
+        return store, connections
+
+    def publish_store(self, store, connections):
+        """Make a loaded store current; must run on the GUI thread."""
+        self.cipher_suite = store.cipher_suite
+        self.store = store
+        # Built off the GUI thread; the first search waits for it if it isn't done yet
+        self.search_index.rebuild_in_background(connections)
+        self.connection_list_model.set_connections(connections)
+        self.schedule_name_index()
+        self.probe_hosts(connections)
+        self.multiplexer.prewarm(connections)
+
+    def is_store_open(self):
+        return self.store is not None
+
+    def load_terminals(self):
+        """Load installed emulators from the discovery cache, rescanning PATH if it changed."""
+        self.terminal_registry = TerminalRegistry()
+        self.set_available_terminals(self.terminal_registry.discover(on_refresh=self.set_available_terminals))
+
+    def set_available_terminals(self, terminals):
+        # May run on the registry's scan thread; both assignments are atomic and
+        # readers only look the emulators up when launching or opening a dialog
+        self.available_terminal_emulators = terminals
         self.terminal_executable = self.get_terminal_executable()
 
     def load_connections(self):
-        connections_file = get_connections_file_path()
-        if os.path.exists(connections_file):
-            with open(connections_file, 'r') as f:
-                encrypted_data = f.read()
-                decrypted_data = self.cipher_suite.decrypt(encrypted_data.encode()).decode()
-                return json.loads(decrypted_data)
-        return []
+        connections = self.store.load()
+        if self.store.needs_compaction():
+            self.store.compact(connections)
+        return connections
 
     def save_connections(self):
-        connections_file = get_connections_file_path()
-        encrypted_data = self.cipher_suite.encrypt(json.dumps(self.connection_list_model.connections).encode())
-        with open(connections_file, 'w') as f:
-            f.write(encrypted_data.decode())
+        """Write a full snapshot of all connections, folding in the journal."""
+        self.store.compact(self.connection_list_model.connections)
+
+    def schedule_connection_save(self):
+        """Hand queued journal records to the background writer and compact when due."""
+        self.writer.schedule('connections', self.store.flush_pending)
+        if self.store.needs_compaction():
+            self.store.compact_in_background(list(self.connection_list_model.connections))
+        self.schedule_name_index()
+
+    def schedule_name_index(self):
+        """Refresh the names `nutty` completes from, off the GUI thread."""
+        # Reads the live list on the writer thread rather than copying 100k rows per edit;
+        # a name changed mid-write is picked up by the write that change schedules
+        self.writer.schedule('name_index', lambda: write_name_index(self.connection_list_model.connections))
+
+    def save_config(self):
+        self.writer.schedule('config', lambda config=copy.deepcopy(self.config): save_config(config))
+
+    def flush(self, timeout=None):
+        """Block until every scheduled write has reached the disk."""
+        flushed = self.writer.flush(timeout)
+        if self.store:
+            self.store.wait_for_compaction()
+        return flushed
+
+    def probe_hosts(self, connections=None, force=False):
+        """Queue reachability probes for hosts whose last result has expired."""
+        if self.prober is None:
+            return 0
+        if connections is None:
+            connections = self.connection_list_model.connections
+        return self.prober.probe(connections, force)
+
+    def shutdown(self):
+        if self.prober:
+            self.prober.stop()
+        self.multiplexer.shutdown()
+        self.sessions.stop()
+        self.writer.stop()
+        if self.store:
+            self.store.wait_for_compaction()
+
+    def get_password(self, connection):
+        """Decrypt a connection's password on demand."""
+        return self.store.reveal_secret(connection)
+
+    def apply_store_changes(self, changes, state):
+        """Show connections another process added, changed or removed, as row-level updates.
+
+        changes and state come from ConnectionStore.read_changes(). Returns
+        (added, changed, removed) counts.
+        """
+        model = self.connection_list_model
+        # Our own edits still waiting to be written land after theirs, so ours win
+        pending = self.store.pending_ids()
+        added, changed, removed_rows = [], [], []
+        for connection_id, connection in changes.items():
+            if connection_id in pending:
+                continue
+            row = model.row_for_id(connection_id)
+            if connection is None:
+                if row >= 0:
+                    self.search_index.remove(connection_id)
+                    removed_rows.append(row)
+            elif row < 0:
+                self.search_index.add(connection)
+                added.append(connection)
+            elif model.get_connection(row) != connection:
+                self.search_index.update(connection)
+                model.update_connection(row, connection)
+                changed.append(connection)
+        # Rows only shift once every update has used them
+        if removed_rows:
+            model.remove_connections(removed_rows)
+        model.add_connections(added)
+        self.store.mark_synced(state)
+        if added or changed or removed_rows:
+            self.schedule_name_index()
+            self.probe_hosts(added + changed)
+        return len(added), len(changed), len(removed_rows)
 
     def add_connection(self, connection):
+        connection['id'] = connection.get('id') or new_connection_id()
+        if not connection.get('group'):
+            connection.pop('group', None)
+        if 'password' in connection:
+            self.store.seal_secret(connection)
+        connection = as_connection(connection)
+        self.search_index.add(connection)
         self.connection_list_model.add_connection(connection)
-        self.save_connections()
+        self.store.put(connection)
+        self.schedule_connection_save()
+        self.probe_hosts([connection])
+
+    def add_connections(self, connections):
+        """Add several connections with one model insert and one save."""
+        added = []
+        for connection in connections:
+            connection['id'] = connection.get('id') or new_connection_id()
+            if 'password' in connection:
+                self.store.seal_secret(connection)
+            connection = as_connection(connection)
+            self.search_index.add(connection)
+            self.store.put(connection)
+            added.append(connection)
+        self.connection_list_model.add_connections(added)
+        self.schedule_connection_save()
+        self.probe_hosts(added)
+
+    def apply_ssh_import(self, records):
+        """Bring imported connections in line with records from the SSH config importer.
+
+        Only connections that came from the importer are touched, and of those
+        only the ones whose Host entry was added, changed or removed. Returns
+        (added, changed, removed) counts.
+        """
+        model = self.connection_list_model
+        existing = {connection['ssh_alias']: connection for connection in model.connections
+                    if connection.get('source') == IMPORT_SOURCE}
+
+        changed = 0
+        for alias, record in records.items():
+            connection = existing.get(alias)
+            if connection is not None and connection.get('import_hash') != record['import_hash']:
+                # Keep what the user set themselves, e.g. a saved password or the multiplex flags
+                merged = {key: value for key, value in connection.items() if key not in IMPORTED_FIELDS}
+                merged.update(record)
+                self.update_connection(model.row_for_id(connection['id']), merged)
+                changed += 1
+
+        removed_rows = [model.row_for_id(connection['id']) for alias, connection in existing.items() if alias not in records]
+        if removed_rows:
+            self.drop_connections(removed_rows)
+
+        added = [dict(record) for alias, record in records.items() if alias not in existing]
+        if added:
+            self.add_connections(added)
+        return len(added), changed, len(removed_rows)
 
     def remove_connection(self, index):
-        self.connection_list_model.remove_connection(index)
-        self.save_connections()
+        self.remove_connections([index])
+
+    def remove_connections(self, rows):
+        # Deleted by the user, so the next SSH config import must not bring them back
+        forget_hosts([self.connection_list_model.get_connection(row) for row in set(rows)])
+        self.drop_connections(rows)
+
+    def drop_connections(self, rows):
+        for row in set(rows):
+            connection_id = self.connection_list_model.get_connection(row)['id']
+            self.search_index.remove(connection_id)
+            self.store.delete(connection_id)
+        self.connection_list_model.remove_connections(rows)
+        self.schedule_connection_save()
 
     def update_connection(self, index, connection):
+        # Edit dialogs hand back a fresh dict, so carry the stored id over, along with
+        # the import bookkeeping that keeps an imported host in sync with its Host entry
+        # and the group, which the SSH config importer knows nothing about
+        previous = self.connection_list_model.get_connection(index)
+        connection['id'] = previous['id']
+        for key in ('ssh_alias', 'source', 'import_hash', 'group'):
+            if key in previous and key not in connection:
+                connection[key] = previous[key]
+        # The dialog sends an empty group for the top level
+        if not connection.get('group'):
+            connection.pop('group', None)
+        if 'password' in connection:
+            self.store.seal_secret(connection)
+        connection = as_connection(connection)
+        self.search_index.update(connection)
         self.connection_list_model.update_connection(index, connection)
-        self.save_connections()
+        self.store.put(connection)
+        self.schedule_connection_save()
+        self.probe_hosts([connection])
+
+    def move_to_group(self, connection_ids, group_paths, target):
+        """Move connections and whole groups into the group at path target ('' is the top level).
+
+        A moved group keeps its name and subgroups under target. Only the
+        connections whose group actually changes are updated and written, as
+        one journal record each. Returns how many moved.
+        """
+        from tree_model import split_group, join_group
+        target = join_group(*split_group(target))
+        new_groups = {connection_id: target for connection_id in connection_ids}
+        for path in group_paths:
+            path = join_group(*split_group(path))
+            # A group can't go inside itself; moving it to where it already is changes nothing
+            if not path or target == path or target.startswith(path + '/'):
+                continue
+            moved_to = join_group(target, split_group(path)[-1])
+            for connection in self.connection_list_model.connections:
+                group = join_group(*split_group(connection.get('group')))
+                if group == path or group.startswith(path + '/'):
+                    new_groups[connection['id']] = moved_to + group[len(path):]
+
+        model = self.connection_list_model
+        moved = 0
+        for connection_id, group in new_groups.items():
+            row = model.row_for_id(connection_id)
+            if row < 0:
+                continue
+            connection = model.get_connection(row)
+            if join_group(*split_group(connection.get('group'))) == group:
+                continue
+            connection = connection.copy()
+            if group:
+                connection['group'] = group
+            else:
+                connection.pop('group', None)
+            self.search_index.update(connection)
+            model.update_connection(row, connection)
+            self.store.put(connection)
+            moved += 1
+        if moved:
+            self.schedule_connection_save()
+        return moved
 
     def duplicate_connection(self, index):
         connection = self.connection_list_model.get_connection(index).copy()
         connection['name'] = f"{connection['name']} (Copy)"
+        connection['id'] = new_connection_id()
+        # A copy is the user's own; the next SSH config sync must not claim it
+        connection.pop('source', None)
+        connection.pop('import_hash', None)
         self.add_connection(connection)
 
+    def build_command(self, connection, tab=False):
+        """Return the terminal command for a connection, opening it as a tab if asked and supported."""
+        tab_args = []
+        if tab and self.terminal_registry:
+            tab_args = self.terminal_registry.tab_args.get(self.config.get('terminal_emulator'), [])
+        return launch_command(connection, self.terminal_info(), self.multiplexer.control_options(connection), tab_args)
+
+    def connect_to_servers(self, connections, on_finished=None):
+        """Launch several connections through a rate-limited queue.
+
+        Commands are built up front, so a connection that can't be launched at
+        all shows up in the report next to the ones whose terminal failed.
+        on_finished gets the LaunchReport on a worker thread.
+        """
+        use_tabs = self.config.get('bulk_launch_tabs', True) and bool(
+            self.terminal_registry and self.terminal_registry.tab_args.get(self.config.get('terminal_emulator')))
+        launches = []
+        build_failures = []
+        for position, connection in enumerate(connections):
+            try:
+                # The first session opens a window for the rest to tab into
+                launches.append((connection, self.build_command(connection, tab=use_tabs and position > 0)))
+            except Exception as e:
+                build_failures.append((connection['name'], str(e)))
+
+        launcher = BulkLauncher(
+            concurrency=self.config.get('bulk_launch_concurrency', DEFAULT_CONCURRENCY),
+            stagger=self.config.get('bulk_launch_stagger', DEFAULT_STAGGER),
+            start=self.start_session,
+        )
+        return launcher.launch(launches, on_finished, failures=build_failures, lead=use_tabs)
+
     def connect_to_server(self, connection):
-        if connection['protocol'] == 'SSH':
-            command = self.build_ssh_command(connection)
-        elif connection['protocol'] == 'Telnet':
-            command = self.build_telnet_command(connection)
-        else:
-            raise ValueError(f"Unsupported protocol: {connection['protocol']}")
+        command = self.build_command(connection)
         
         try:
-            subprocess.Popen(command, shell=False)
+            self.start_session(connection, command)
         except Exception as e:
             logging.error(f"Failed to connect to server: {str(e)}")
             raise
 
-    def build_ssh_command(self, connection):
-        terminal_name = self.config.get('terminal_emulator')
-        terminal_info = self.available_terminal_emulators.get(terminal_name)
-        if not terminal_info:
-            raise ValueError(f"Terminal emulator '{terminal_name}' not found")
-
-        command, args, use_single_arg = terminal_info
-        ssh_command = [command]
-        ssh_command.extend(args)
-
-        ssh_args = ["ssh"]
-        if connection.get('x11', False):
-            ssh_args.append("-X")
-        if connection.get('use_identity_file', False) and connection.get('identity_file'):
-            ssh_args.extend(["-i", connection['identity_file']])
-        ssh_args.append(f"{connection['username']}@{connection['domain']}")
-
-        if use_single_arg:
-            ssh_command.append(" ".join(ssh_args))
-        else:
-            ssh_command.extend(ssh_args)
+    def start_session(self, connection, command):
+        return self.sessions.spawn(command, connection, self.config.get('terminal_emulator'))
 
-        return ssh_command
-
-    def build_telnet_command(self, connection):
-        terminal_name = self.config.get('terminal_emulator')
-        terminal_info = self.available_terminal_emulators.get(terminal_name)
-        if not terminal_info:
-            raise ValueError(f"Terminal emulator '{terminal_name}' not found")
-
-        command, args, use_single_arg = terminal_info
-        telnet_command = [command]
-        telnet_command.extend(args)
-
-        telnet_args = ["telnet", connection['domain']]
-        
-        # Add port if specified (default Telnet port is 23)
-        if 'port' in connection and connection['port']:
-            telnet_args.append(str(connection['port']))
+    def terminal_info(self):
+        return terminal_info(self.config, self.available_terminal_emulators)
 
-        if use_single_arg:
-            telnet_command.append(" ".join(telnet_args))
-        else:
-            telnet_command.extend(telnet_args)
+    def build_ssh_command(self, connection):
+        return ssh_command(connection, self.terminal_info(), self.multiplexer.control_options(connection))
 
-        return telnet_command
+    def build_telnet_command(self, connection):
+        return telnet_command(connection, self.terminal_info())
 
     def get_terminal_executable(self):
         terminal_name = self.config.get('terminal_emulator')
@@ -119,18 +376,65 @@ class Controller:
         if terminal_name in self.available_terminal_emulators:
             self.terminal_executable = self.available_terminal_emulators[terminal_name][0]
             self.config['terminal_emulator'] = terminal_name
-            save_config(self.config)
+            self.save_config()
 
     def get_minimize_on_close(self):
         return self.config.get('minimize_on_close', False)
 
     def toggle_minimize_on_close(self, value):
         self.config['minimize_on_close'] = value
-        save_config(self.config)
+        self.save_config()
+
+    def get_ssh_config_sync(self):
+        return self.config.get('ssh_config_sync', False)
+
+    def toggle_ssh_config_sync(self, value):
+        self.config['ssh_config_sync'] = value
+        self.save_config()
+
+    def get_host_probe(self):
+        return self.prober is not None
+
+    def toggle_host_probe(self, value):
+        """Start or stop checking whether saved hosts are reachable."""
+        self.config['host_probe'] = value
+        self.save_config()
+        if value and self.prober is None:
+            self.prober = create_probe_engine(self.config)
+            self.probe_hosts()
+        elif not value and self.prober is not None:
+            self.prober.stop()
+            self.prober = None
+
+    def get_ssh_multiplexing(self):
+        return self.config.get('ssh_multiplexing', False)
+
+    def toggle_ssh_multiplexing(self, value):
+        self.config['ssh_multiplexing'] = value
+        self.save_config()
+
+    def get_expanded_groups(self):
+        return self.config.get('expanded_groups', [])
+
+    def set_group_expanded(self, path, expanded):
+        """Remember whether a group is open, so it opens again next time."""
+        groups = set(self.get_expanded_groups())
+        if (path in groups) == expanded:
+            return
+        if expanded:
+            groups.add(path)
+        else:
+            groups.discard(path)
+        self.config['expanded_groups'] = sorted(groups)
+        self.save_config()
+
+    def toggle_tracing(self, value):
+        self.config['tracing'] = value
+        self.save_config()
 
     def set_theme(self, theme_name):
         self.config['theme'] = theme_name
-        save_config(self.config)
+        self.save_config()
         return load_theme(theme_name)
 
     def get_current_theme(self):
@@ -1,97 +1,190 @@
 import logging
+from collections import OrderedDict
 from PyQt5.QtWidgets import QStyledItemDelegate, QStyle
-from PyQt5.QtGui import QFont, QPen, QColor, QBrush
-from PyQt5.QtCore import Qt, QRect, QSize
+from PyQt5.QtGui import QFont, QFontMetrics, QPen, QColor, QBrush, QStaticText, QPainter
+from PyQt5.QtCore import Qt, QSize, QPoint, QRect
+from model import StatusRole
+from tree_model import GroupRole
+from probe import UP, DOWN, TIMEOUT
+from tracing import span
+
+# Laid-out rows kept around; only the rows near the viewport are ever reused
+TEXT_CACHE_SIZE = 2048
+LINE_HEIGHT = 20
+# Room kept free at the end of the name line for the status dot and latency
+BADGE_WIDTH = 64
+BADGE_DOT_SIZE = 8
+ROW_HEIGHT = 100
+# Group headers are a single line; the tree measures rows one by one, so they can be compact
+GROUP_ROW_HEIGHT = 36
+
+
+def parse_color(color_string):
+    if color_string.startswith('rgba'):
+        r, g, b, a = map(int, color_string.strip('rgba()').split(','))
+        return QColor(r, g, b, a)
+    elif color_string.startswith('#'):
+        return QColor(color_string)
+    else:
+        return QColor(color_string)
+
+
+class ThemePalette:
+    """Pens, brushes and fonts for a theme, compiled once instead of on every paint."""
+
+    def __init__(self, theme_data):
+        theme_data = theme_data or {}
+
+        self.background = QBrush(parse_color(theme_data.get('list_view_item_background-color', 'rgba(255, 255, 255, 255)')))
+        self.selected_background = QBrush(parse_color(theme_data.get('list_view_item_selected_background-color', 'rgba(230, 243, 255, 255)')))
+        border_parts = theme_data.get('list_view_border', '#d0d0d0').split()
+        self.border_pen = QPen(parse_color(border_parts[2] if len(border_parts) > 2 else border_parts[-1]))
+
+        name_color = parse_color(theme_data.get('list_view_item_name_color', '#000000'))
+        info_color = parse_color(theme_data.get('list_view_item_info_color', name_color.lighter(130).name()))
+        desc_color = parse_color(theme_data.get('list_view_item_desc_color', name_color.lighter(150).name()))
+        self.pens = (QPen(name_color), QPen(info_color), QPen(desc_color))
+        self.selected_pens = (
+            QPen(parse_color(theme_data.get('list_view_item_selected_name_color', '#000000'))),
+            QPen(parse_color(theme_data.get('list_view_item_selected_info_color', '#000000'))),
+            QPen(parse_color(theme_data.get('list_view_item_selected_description_color', '#000000'))),
+        )
+
+        font_family = theme_data.get('list_view_font-family', 'Arial, sans-serif').replace("'", "")
+        self.fonts = (QFont(font_family, 12, QFont.Bold), QFont(font_family, 10), QFont(font_family, 8))
+        self.metrics = tuple(QFontMetrics(font) for font in self.fonts)
+        # Offsets that vertically centre each line inside its LINE_HEIGHT slot
+        self.baseline_offsets = tuple((LINE_HEIGHT - metrics.height()) // 2 for metrics in self.metrics)
+
+        # Reachability badge colours; hosts that haven't answered yet get the unknown colour
+        self.status_brushes = {
+            UP: QBrush(parse_color(theme_data.get('list_view_item_status_up_color', '#2e7d32'))),
+            DOWN: QBrush(parse_color(theme_data.get('list_view_item_status_down_color', '#c62828'))),
+            TIMEOUT: QBrush(parse_color(theme_data.get('list_view_item_status_timeout_color', '#ef6c00'))),
+        }
+        self.status_unknown_brush = QBrush(parse_color(theme_data.get('list_view_item_status_unknown_color', '#9e9e9e')))
+
 
 class ConnectionItemDelegate(QStyledItemDelegate):
     def __init__(self, theme_data):
         super().__init__()
-        self.theme_data = theme_data
         self.logger = logging.getLogger(__name__)
+        self._text_cache = OrderedDict()
+        # Off while host probing is, rather than a grey dot on every row
+        self.show_status = True
+        self.set_theme(theme_data)
+
+    def set_theme(self, theme_data):
+        """Recompile the palette and drop laid-out text after a theme change."""
+        self.theme_data = theme_data
+        self.palette = ThemePalette(theme_data)
+        self._text_cache.clear()
 
     def paint(self, painter, option, index):
-        connection = index.data(Qt.DisplayRole)
-        if not connection:
-            return
-        
+        with span("delegate.paint"):
+            group = index.data(GroupRole)
+            if group is not None:
+                self.paint_group(painter, option, *group)
+                return
+            connection = index.data(Qt.DisplayRole)
+            if not connection:
+                return
+
+            painter.save()
+            palette = self.palette
+            selected = option.state & QStyle.State_Selected
+            rect = option.rect
+
+            # Draw background and border
+            painter.fillRect(rect, palette.selected_background if selected else palette.background)
+            painter.setPen(palette.border_pen)
+            painter.drawRect(rect)
+
+            texts = self.layout_text(connection, rect.width() - 20)
+            pens = palette.selected_pens if selected else palette.pens
+            left = rect.left() + 10
+            top = rect.top() + 10
+            for static_text, font, pen, offset in zip(texts, palette.fonts, pens, palette.baseline_offsets):
+                painter.setFont(font)
+                painter.setPen(pen)
+                painter.drawStaticText(QPoint(left, top + offset), static_text)
+                top += LINE_HEIGHT + 5
+
+            if self.show_status:
+                self.paint_status_badge(painter, rect, index.data(StatusRole), pens[1])
+            painter.restore()
+
+    def paint_group(self, painter, option, name, count):
+        """Draw a group row: its name, and how many connections it holds on the right."""
         painter.save()
+        palette = self.palette
+        selected = option.state & QStyle.State_Selected
+        rect = option.rect
+        painter.fillRect(rect, palette.selected_background if selected else palette.background)
+        painter.setPen(palette.border_pen)
+        painter.drawRect(rect)
+        pens = palette.selected_pens if selected else palette.pens
+        text_rect = rect.adjusted(10, 0, -10, 0)
+        painter.setFont(palette.fonts[1])
+        painter.setPen(pens[1])
+        painter.drawText(text_rect, Qt.AlignVCenter | Qt.AlignRight, str(count))
+        count_width = palette.metrics[1].horizontalAdvance(str(count)) + 10
+        painter.setFont(palette.fonts[0])
+        painter.setPen(pens[0])
+        painter.drawText(text_rect.adjusted(0, 0, -count_width, 0), Qt.AlignVCenter | Qt.AlignLeft,
+                         palette.metrics[0].elidedText(name, Qt.ElideRight, text_rect.width() - count_width))
+        painter.restore()
 
-        # Parse colors with alpha
-        bg_color = self.parse_color(self.theme_data.get('list_view_item_background-color', 'rgba(255, 255, 255, 255)'))
-        selected_bg_color = self.parse_color(self.theme_data.get('list_view_item_selected_background-color', 'rgba(230, 243, 255, 255)'))
-        border_color = self.parse_color(self.theme_data.get('list_view_border', '#d0d0d0').split()[2])
-        
-        name_color = self.parse_color(self.theme_data.get('list_view_item_name_color', '#000000'))
-        info_color = self.parse_color(self.theme_data.get('list_view_item_info_color', name_color.lighter(130).name()))
-        desc_color = self.parse_color(self.theme_data.get('list_view_item_desc_color', name_color.lighter(150).name()))
-        
-        selected_name_color = self.parse_color(self.theme_data.get('list_view_item_selected_name_color', '#000000'))
-        selected_info_color = self.parse_color(self.theme_data.get('list_view_item_selected_info_color', '#000000'))
-        selected_desc_color = self.parse_color(self.theme_data.get('list_view_item_selected_description_color', '#000000'))
-        
-        
-        # Draw background
-        if option.state & QStyle.State_Selected:
-            painter.fillRect(option.rect, QBrush(selected_bg_color))
+    def paint_status_badge(self, painter, rect, status, pen):
+        """Draw the host's reachability dot, followed by its latency when it is up."""
+        palette = self.palette
+        badge = QRect(rect.right() - 10 - BADGE_WIDTH, rect.top() + 10, BADGE_WIDTH, LINE_HEIGHT)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(palette.status_brushes.get(status.status) if status else palette.status_unknown_brush)
+        painter.drawEllipse(badge.left(), badge.center().y() - BADGE_DOT_SIZE // 2, BADGE_DOT_SIZE, BADGE_DOT_SIZE)
+        if status is None:
+            return
+        if status.status == UP:
+            label = f"{status.latency * 1000:.0f} ms"
         else:
-            painter.fillRect(option.rect, QBrush(bg_color))
-
-        # Draw border
-        painter.setPen(QPen(border_color))
-        painter.drawRect(option.rect)
+            label = "timeout" if status.status == TIMEOUT else "down"
+        painter.setFont(palette.fonts[2])
+        painter.setPen(pen)
+        painter.drawText(badge.adjusted(BADGE_DOT_SIZE + 4, 0, 0, 0), Qt.AlignVCenter | Qt.AlignLeft, label)
 
+    def layout_text(self, connection, width):
+        """Return elided, pre-laid-out name, user@host and description lines for a row."""
         name = connection.get('name', 'Unknown Name')
         host = connection.get('domain', 'Unknown Host')
         username = connection.get('username', 'Unknown Username')
-        connection_info = f"{username}@{host}"
-        description = connection.get('description', "")
-
-        # Set fonts colors
-        if option.state & QStyle.State_Selected:
-            name_draw_color = selected_name_color
-            info_draw_color = selected_info_color
-            desc_draw_color = selected_desc_color
-        else:
-            name_draw_color = name_color
-            info_draw_color = info_color
-            desc_draw_color = desc_color
-            
-        font_family = self.theme_data.get('list_view_font-family', 'Arial, sans-serif').replace("'", "")
-        name_font = QFont(font_family, 12, QFont.Bold)
-        info_font = QFont(font_family, 10)
-        description_font = QFont(font_family, 8)
-
-        # Calculate text rectangles
-        name_rect = QRect(option.rect.left() + 10, option.rect.top() + 10, option.rect.width() - 20, 20)
-        info_rect = QRect(option.rect.left() + 10, name_rect.bottom() + 5, option.rect.width() - 20, 20)
-        description_rect = QRect(option.rect.left() + 10, info_rect.bottom() + 5, option.rect.width() - 20, 20)
-
-        # Draw name
-        painter.setFont(name_font)
-        painter.setPen(QPen(name_draw_color))
-        painter.drawText(name_rect, Qt.AlignLeft | Qt.AlignVCenter, name)
-
-        # Draw connection info
-        painter.setFont(info_font)
-        painter.setPen(QPen(info_draw_color))
-        painter.drawText(info_rect, Qt.AlignLeft | Qt.AlignVCenter, connection_info)
-
-        # Draw description
-        painter.setFont(description_font)
-        painter.setPen(QPen(desc_draw_color))
-        painter.drawText(description_rect, Qt.AlignLeft | Qt.AlignVCenter, description)
+        description = connection.get('description') or ""
+        key = (name, username, host, description, width, self.show_status)
 
-        painter.restore()
+        texts = self._text_cache.get(key)
+        if texts is not None:
+            self._text_cache.move_to_end(key)
+            return texts
+
+        texts = []
+        # The name line only makes room for the badge when one is drawn
+        widths = (width - BADGE_WIDTH if self.show_status else width, width, width)
+        for text, font, metrics, line_width in zip((name, f"{username}@{host}", description), self.palette.fonts, self.palette.metrics, widths):
+            static_text = QStaticText(metrics.elidedText(text, Qt.ElideRight, line_width))
+            static_text.setTextFormat(Qt.PlainText)
+            static_text.prepare(font=font)
+            texts.append(static_text)
+        texts = tuple(texts)
+
+        self._text_cache[key] = texts
+        if len(self._text_cache) > TEXT_CACHE_SIZE:
+            self._text_cache.popitem(last=False)
+        return texts
 
     def sizeHint(self, option, index):
-        return QSize(200, 100)
+        if index.data(GroupRole) is not None:
+            return QSize(200, GROUP_ROW_HEIGHT)
+        return QSize(200, ROW_HEIGHT)
 
     def parse_color(self, color_string):
-        if color_string.startswith('rgba'):
-            r, g, b, a = map(int, color_string.strip('rgba()').split(','))
-            return QColor(r, g, b, a)
-        elif color_string.startswith('#'):
-            return QColor(color_string)
-        else:
-            return QColor(color_string)
-
+        return parse_color(color_string)
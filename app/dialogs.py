@@ -1,9 +1,12 @@
-from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QLineEdit, QComboBox, QCheckBox, QHBoxLayout, QPushButton, QMessageBox, QFileDialog
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QLineEdit, QComboBox, QCheckBox, QHBoxLayout, QPushButton, QFileDialog
 from PyQt5.QtGui import QPixmap
 from PyQt5.QtCore import Qt
 
+# Check state of the multiplexing box -> the connection's 'multiplex' value (None follows the global setting)
+MULTIPLEX_STATES = {Qt.Unchecked: False, Qt.PartiallyChecked: None, Qt.Checked: True}
+
 class AddConnectionDialog(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, groups=()):
         super().__init__(parent)
         self.setWindowTitle("Add New SSH Connection")
         self.setModal(True)
@@ -62,11 +65,26 @@ class AddConnectionDialog(QDialog):
         self.x11_checkbox = QCheckBox("Enable X11 Forwarding")
         layout.addWidget(self.x11_checkbox)
 
+        # Multiplexing; partially checked follows the global preference
+        self.multiplex_checkbox = QCheckBox("Reuse SSH Connection (default from Preferences)")
+        self.multiplex_checkbox.setTristate(True)
+        self.multiplex_checkbox.setCheckState(Qt.PartiallyChecked)
+        layout.addWidget(self.multiplex_checkbox)
+        self.prewarm_checkbox = QCheckBox("Open Shared Connection at Startup")
+        layout.addWidget(self.prewarm_checkbox)
+
         # Description input
         self.description_edit = QLineEdit()
         layout.addWidget(QLabel("Description:"))
         layout.addWidget(self.description_edit)
 
+        # Group; typing a path such as prod/eu-west creates it
+        self.group_select = QComboBox()
+        self.group_select.setEditable(True)
+        self.group_select.addItems([''] + list(groups))
+        layout.addWidget(QLabel("Group:"))
+        layout.addWidget(self.group_select)
+
         # Buttons
         button_box = QHBoxLayout()
         save_button = QPushButton("Save")
@@ -102,7 +120,10 @@ class AddConnectionDialog(QDialog):
             'domain': self.domain_edit.text(),
             'protocol': self.protocol_select.currentText(),
             'x11': self.x11_checkbox.isChecked(),
+            'multiplex': MULTIPLEX_STATES[self.multiplex_checkbox.checkState()],
+            'prewarm': self.prewarm_checkbox.isChecked(),
             'description': self.description_edit.text(),
+            'group': self.group_select.currentText().strip(),
             'use_identity_file': self.auth_method.isChecked(),
             'identity_file': self.identity_file_edit.text() if self.auth_method.isChecked() else None,
             'password': self.password_edit.text() if not self.auth_method.isChecked() else None
@@ -110,8 +131,8 @@ class AddConnectionDialog(QDialog):
 
 
 class EditConnectionDialog(AddConnectionDialog):
-    def __init__(self, parent=None, connection=None):
-        super().__init__(parent)
+    def __init__(self, parent=None, connection=None, password=None, groups=()):
+        super().__init__(parent, groups)
         self.setWindowTitle("Edit Connection")
         
         if connection:
@@ -120,10 +141,15 @@ class EditConnectionDialog(AddConnectionDialog):
             self.domain_edit.setText(connection.get('domain', ''))
             self.protocol_select.setCurrentText(connection.get('protocol', 'SSH'))
             self.x11_checkbox.setChecked(connection.get('x11', False))
+            multiplex = connection.get('multiplex')
+            self.multiplex_checkbox.setCheckState(Qt.PartiallyChecked if multiplex is None else Qt.Checked if multiplex else Qt.Unchecked)
+            self.prewarm_checkbox.setChecked(connection.get('prewarm', False))
             self.description_edit.setText(connection.get('description', ''))
+            self.group_select.setCurrentText(connection.get('group', ''))
             self.auth_method.setChecked(connection.get('use_identity_file', True))
             self.identity_file_edit.setText(connection.get('identity_file', ''))
-            self.password_edit.setText(connection.get('password', ''))
+            # Stored passwords are encrypted separately and passed in already decrypted
+            self.password_edit.setText(password or '')
             
             # Manually call toggle_auth_method to ensure correct visibility of fields
             self.toggle_auth_method(self.auth_method.checkState())
@@ -136,11 +162,15 @@ class EditConnectionDialog(AddConnectionDialog):
         if protocol == 'Telnet':
             self.auth_method.setEnabled(False)
             self.x11_checkbox.setEnabled(False)
+            self.multiplex_checkbox.setEnabled(False)
+            self.prewarm_checkbox.setEnabled(False)
             self.identity_file_edit.setEnabled(False)
             self.identity_file_button.setEnabled(False)
         else:
             self.auth_method.setEnabled(True)
             self.x11_checkbox.setEnabled(True)
+            self.multiplex_checkbox.setEnabled(True)
+            self.prewarm_checkbox.setEnabled(True)
             self.identity_file_edit.setEnabled(self.auth_method.isChecked())
             self.identity_file_button.setEnabled(self.auth_method.isChecked())
 
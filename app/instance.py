@@ -0,0 +1,75 @@
+import os
+import json
+import time
+import fcntl
+import socket
+from config import runtime_dir
+
+SOCKET_NAME = 'instance.sock'
+LOCK_NAME = 'instance.lock'
+# How long a request waits for an instance that is still starting to begin listening
+CONNECT_TIMEOUT = 5.0
+# How long a request waits for the instance to answer, e.g. while it unlocks the keyring
+REPLY_TIMEOUT = 30.0
+# Connection fields a list request returns
+LIST_FIELDS = ('name', 'username', 'domain', 'protocol', 'description')
+
+
+def socket_path():
+    return os.path.join(runtime_dir(), SOCKET_NAME)
+
+
+def acquire_instance_lock():
+    """Return a held lock file descriptor if no other instance is running, otherwise None.
+
+    The descriptor must stay open for as long as this process is the running
+    instance; the kernel drops the lock when the process exits, even on a crash.
+    """
+    fd = os.open(os.path.join(runtime_dir(), LOCK_NAME), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def instance_running():
+    fd = acquire_instance_lock()
+    if fd is None:
+        return True
+    os.close(fd)
+    return False
+
+
+def send_request(request, connect_timeout=CONNECT_TIMEOUT, reply_timeout=REPLY_TIMEOUT):
+    """Send request to the running instance and return its reply.
+
+    Requests and replies are single JSON objects, one line each. Returns None
+    when no instance is running, so the caller can do the work itself.
+    """
+    deadline = time.monotonic() + connect_timeout
+    while True:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(socket_path())
+            break
+        except (FileNotFoundError, ConnectionRefusedError):
+            sock.close()
+            # A held lock without a socket means the instance hasn't started listening yet
+            if time.monotonic() >= deadline or not instance_running():
+                return None
+            time.sleep(0.05)
+
+    with sock:
+        sock.settimeout(reply_timeout)
+        sock.sendall(json.dumps(request).encode() + b'\n')
+        data = b''
+        while not data.endswith(b'\n'):
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    if not data:
+        return {'ok': False, 'error': "The running instance closed the connection without answering"}
+    return json.loads(data)
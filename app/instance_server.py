@@ -0,0 +1,118 @@
+import json
+import logging
+from PyQt5.QtCore import QObject
+from PyQt5.QtNetwork import QLocalServer, QLocalSocket
+from instance import socket_path, LIST_FIELDS
+from name_index import find_connection
+
+# Requests that need the decrypted connections; they wait while the keyring is unlocked
+STORE_COMMANDS = {'list', 'connect', 'add'}
+ADD_FIELDS = ('name', 'username', 'domain', 'protocol')
+
+
+class InstanceServer(QObject):
+    """Answers later launches of nuTTY and the nutty CLI on the instance socket.
+
+    Everything runs on the GUI thread through Qt's event loop, so requests are
+    handled with the same controller calls the window makes. Each connection
+    carries one JSON request line and gets one JSON reply line back.
+    """
+
+    def __init__(self, main_window):
+        super().__init__(main_window)
+        self.main_window = main_window
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.UserAccessOption)
+        self.server.newConnection.connect(self.accept)
+        self.buffers = {}
+        # (socket, request) pairs waiting for the store to be unlocked
+        self.waiting = []
+
+    def listen(self):
+        """Start answering requests; the caller must hold the instance lock."""
+        path = socket_path()
+        # Holding the lock means any socket file left behind belongs to a dead instance
+        QLocalServer.removeServer(path)
+        if not self.server.listen(path):
+            logging.error(f"Could not listen on {path}: {self.server.errorString()}")
+            return False
+        return True
+
+    def close(self):
+        self.server.close()
+
+    def accept(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            self.buffers[socket] = b''
+            socket.readyRead.connect(lambda socket=socket: self.read(socket))
+            socket.disconnected.connect(lambda socket=socket: self.forget(socket))
+
+    def forget(self, socket):
+        self.buffers.pop(socket, None)
+        self.waiting = [(waiting, request) for waiting, request in self.waiting if waiting is not socket]
+        socket.deleteLater()
+
+    def read(self, socket):
+        if socket not in self.buffers:
+            return
+        self.buffers[socket] += bytes(socket.readAll())
+        if not self.buffers[socket].endswith(b'\n'):
+            return
+        data = self.buffers.pop(socket)
+        try:
+            request = json.loads(data)
+        except ValueError:
+            self.reply(socket, {'ok': False, 'error': "Malformed request"})
+            return
+        if request.get('command') in STORE_COMMANDS and not self.main_window.controller.is_store_open():
+            self.waiting.append((socket, request))
+            return
+        self.reply(socket, self.handle(request))
+
+    def store_ready(self):
+        """Answer the requests that arrived before the connections were unlocked."""
+        waiting, self.waiting = self.waiting, []
+        for socket, request in waiting:
+            self.reply(socket, self.handle(request))
+
+    def reply(self, socket, reply):
+        if socket.state() != QLocalSocket.ConnectedState:
+            return
+        socket.write(json.dumps(reply).encode() + b'\n')
+        socket.flush()
+        socket.disconnectFromServer()
+
+    def handle(self, request):
+        handler = getattr(self, f"handle_{request.get('command')}", None)
+        if handler is None:
+            return {'ok': False, 'error': f"Unknown command: {request.get('command')}"}
+        try:
+            return handler(request)
+        except LookupError as e:
+            return {'ok': False, 'error': str(e)}
+        except Exception as e:
+            logging.error(f"Error handling {request.get('command')} request: {str(e)}")
+            return {'ok': False, 'error': str(e)}
+
+    def handle_show(self, request):
+        self.main_window.show_window()
+        return {'ok': True}
+
+    def handle_list(self, request):
+        connections = self.main_window.controller.connection_list_model.connections
+        return {'ok': True, 'connections': [{field: connection.get(field) for field in LIST_FIELDS} for connection in connections]}
+
+    def handle_connect(self, request):
+        connection = find_connection(self.main_window.controller.connection_list_model.connections, request.get('name', ''))
+        self.main_window.controller.connect_to_server(connection)
+        self.main_window.tray_manager.add_recent(connection['id'])
+        return {'ok': True, 'name': connection['name']}
+
+    def handle_add(self, request):
+        connection = request.get('connection')
+        if not isinstance(connection, dict) or any(not connection.get(field) for field in ADD_FIELDS):
+            return {'ok': False, 'error': f"A connection needs {', '.join(ADD_FIELDS)}"}
+        connection['id'] = None
+        self.main_window.controller.add_connection(connection)
+        return {'ok': True}
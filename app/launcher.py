@@ -0,0 +1,127 @@
+import time
+import queue
+import logging
+import threading
+import subprocess
+
+DEFAULT_CONCURRENCY = 4
+# Minimum seconds between two spawns, across all workers
+DEFAULT_STAGGER = 0.25
+# A terminal that exits within this many seconds with an error never opened a session
+SPAWN_CHECK_SECONDS = 0.5
+
+
+class LaunchReport:
+    """Outcome of a bulk launch: which sessions started and which failed to spawn."""
+
+    def __init__(self, total):
+        self.total = total
+        self.started = []
+        # (name, error message)
+        self.failures = []
+        self.lock = threading.Lock()
+
+    def summary(self):
+        lines = [f"Opened {len(self.started)} of {self.total} sessions."]
+        for name, error in self.failures:
+            lines.append(f"{name}: {error}")
+        return "\n".join(lines)
+
+
+class BulkLauncher:
+    """Spawns many terminal sessions through a bounded worker queue.
+
+    concurrency workers pull launches off a queue, and a shared stagger keeps
+    spawns at least that many seconds apart, so opening fifty hosts doesn't
+    fork fifty terminals and fifty SSH handshakes at the same instant.
+    """
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, stagger=DEFAULT_STAGGER, start=None):
+        self.concurrency = max(1, concurrency)
+        # start(connection, command) -> Popen; lets the caller supervise the processes
+        self.start = start or (lambda connection, command: subprocess.Popen(command, shell=False))
+        self.stagger = max(0.0, stagger)
+        self.next_spawn = 0.0
+        self.spawn_lock = threading.Lock()
+
+    def wait_for_turn(self):
+        with self.spawn_lock:
+            now = time.monotonic()
+            wait = self.next_spawn - now
+            self.next_spawn = max(now, self.next_spawn) + self.stagger
+        if wait > 0:
+            time.sleep(wait)
+
+    def spawn(self, connection, command):
+        """Start one session; raises if it couldn't be started."""
+        process = self.start(connection, command)
+        try:
+            returncode = process.wait(SPAWN_CHECK_SECONDS)
+        except subprocess.TimeoutExpired:
+            return process
+        # Many emulators hand the session to a server process and exit 0 straight away
+        if returncode != 0:
+            raise RuntimeError(f"{command[0]} exited with status {returncode}")
+        return process
+
+    def launch(self, launches, on_finished=None, failures=(), lead=False):
+        """Start launches, a list of (connection, command) pairs, on background workers.
+
+        failures lists (name, error) pairs that were already known not to launch,
+        so they are reported together with the rest. With lead set, the first
+        launch is spawned on its own and the others only start once it has, so
+        sessions opened as tabs have its window to go into. on_finished receives
+        the LaunchReport once every launch has been tried; it runs on a worker thread.
+        """
+        report = LaunchReport(len(launches) + len(failures))
+        report.failures.extend(failures)
+        if not launches:
+            if on_finished:
+                on_finished(report)
+            return report
+        first = launches[0] if lead else None
+        pending = queue.Queue()
+        for launch in launches[1:] if lead else launches:
+            pending.put(launch)
+        remaining = [min(self.concurrency, pending.qsize())]
+
+        def run(connection, command):
+            name = connection.get('name', '')
+            self.wait_for_turn()
+            try:
+                self.spawn(connection, command)
+            except Exception as e:
+                logging.error(f"Failed to launch {name}: {str(e)}")
+                with report.lock:
+                    report.failures.append((name, str(e)))
+            else:
+                with report.lock:
+                    report.started.append(name)
+
+        def worker():
+            while True:
+                try:
+                    connection, command = pending.get_nowait()
+                except queue.Empty:
+                    break
+                run(connection, command)
+            with report.lock:
+                remaining[0] -= 1
+                finished = remaining[0] == 0
+            if finished and on_finished:
+                on_finished(report)
+
+        def start_workers():
+            if remaining[0] == 0:
+                if on_finished:
+                    on_finished(report)
+                return
+            for _ in range(remaining[0]):
+                threading.Thread(target=worker, name="bulk-launch", daemon=True).start()
+
+        if first is None:
+            start_workers()
+        else:
+            # spawn() returns once the first terminal is up or has failed
+            threading.Thread(target=lambda: (run(*first), start_workers()), name="bulk-launch", daemon=True).start()
+        return report
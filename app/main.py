@@ -1,24 +1,58 @@
 import sys
-from PyQt5.QtWidgets import QApplication
-from views import MainWindow
-from config import load_config, load_or_generate_key, initialize_config
+from startup import StartupProfiler
 
 
 def main():
-    config = initialize_config()
-    app = QApplication(sys.argv)
-
-    # Load configuration
-    from cryptography.fernet import Fernet
-    SECRET_KEY = load_or_generate_key()
-    cipher_suite = Fernet(SECRET_KEY)
-    config = load_config()
-    # Initialize the main window
-    window = MainWindow(config, cipher_suite)
-    window.show()
+    profiler = StartupProfiler(enabled='--startup-profile' in sys.argv)
+
+    # A second launch only asks the running instance to show its window, which
+    # takes milliseconds and keeps a single process writing the connection store
+    with profiler.phase("find running instance"):
+        from instance import acquire_instance_lock, send_request
+        try:
+            instance_lock = acquire_instance_lock()
+            if instance_lock is None:
+                reply = send_request({'command': 'show'})
+                if reply is not None:
+                    sys.exit(0 if reply.get('ok') else 1)
+                # Whoever held the lock is gone (or was only checking for us)
+                instance_lock = acquire_instance_lock()
+        except OSError as e:
+            # e.g. an unsafe runtime directory; run on our own rather than not at all
+            import logging
+            logging.error(f"Could not check for a running instance: {str(e)}")
+            instance_lock = None
+
+    with profiler.phase("load config"):
+        from config import initialize_config
+        config = initialize_config()
+
+    # Spans are recorded from here on; NUTTY_TRACE=1 also covers loading the config
+    from tracing import tracer
+    if '--trace' in sys.argv or config.get('tracing'):
+        tracer.enabled = True
+
+    with profiler.phase("import Qt"):
+        from PyQt5.QtWidgets import QApplication
+        from PyQt5.QtCore import QTimer
+        app = QApplication(sys.argv)
+
+    with profiler.phase("import views"):
+        from views import MainWindow
+
+    # Show the window shell right away; unlocking the keyring, decrypting the store
+    # and scanning for terminals happen once it is on screen
+    with profiler.phase("build window"):
+        window = MainWindow(config, profiler=profiler)
+        if instance_lock is not None:
+            window.serve_instance_requests()
+        window.show()
+    app.processEvents()
+    profiler.mark("window shown")
+
+    QTimer.singleShot(0, window.finish_startup)
 
     sys.exit(app.exec_())
-    
+
 if __name__ == '__main__':
     main()
-    
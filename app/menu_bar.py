@@ -5,6 +5,11 @@ def create_menu_bar(parent: QMainWindow):
 
     # File menu
     file_menu = menu_bar.addMenu("File")
+    import_action = file_menu.addAction("Import from SSH Config")
+    import_action.triggered.connect(parent.import_ssh_config)
+    sessions_action = file_menu.addAction("Active Sessions")
+    sessions_action.triggered.connect(parent.show_active_sessions)
+    file_menu.addSeparator()
     close_window_action = file_menu.addAction("Close Window")
     close_window_action.triggered.connect(parent.close)
     exit_action = file_menu.addAction("Exit")
@@ -17,6 +22,8 @@ def create_menu_bar(parent: QMainWindow):
 
     # Help menu
     help_menu = menu_bar.addMenu("Help")
+    performance_action = help_menu.addAction("Performance")
+    performance_action.triggered.connect(parent.show_performance)
     about_action = help_menu.addAction("About nuTTY")
     about_action.triggered.connect(parent.show_about)
 
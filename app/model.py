@@ -1,37 +1,275 @@
-from PyQt5.QtCore import QAbstractListModel, Qt, QModelIndex
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import QAbstractListModel, QAbstractProxyModel, Qt, QModelIndex, pyqtSignal
+from probe import probe_target
+
+# Rows handed to the view per fetchMore() call
+FETCH_BATCH_SIZE = 500
+# Latest ProbeResult for the connection's host, or None if it hasn't been probed
+StatusRole = Qt.UserRole + 1
 
 class ConnectionListModel(QAbstractListModel):
+    # Row signals only cover rows already fetched; these cover every connection, for
+    # models such as the group tree that show connections the list hasn't fetched yet
+    connections_added = pyqtSignal(list)
+    connections_removed = pyqtSignal(list)
+    # (previous connection, new connection)
+    connection_updated = pyqtSignal(object, object)
+
     def __init__(self, connections=None):
         super().__init__()
         # Initialize the connections list, defaulting to an empty list if none provided
         self.connections = connections or []
-        
+        # Only the first loaded_count connections are exposed to views; the rest are
+        # handed out in batches through fetchMore() as the view scrolls
+        self.loaded_count = min(len(self.connections), FETCH_BATCH_SIZE)
+        # id -> row, rebuilt lazily after anything that shifts rows
+        self._rows_by_id = None
+        # (host, port) -> ProbeResult; several connections can share a host
+        self.probe_results = {}
+
     def data(self, index, role):
         if role == Qt.DisplayRole:
             # Return the full connection dictionary instead of a formatted string
             return self.connections[index.row()]
+        if role == StatusRole:
+            return self.status_for(self.connections[index.row()])
+
+    def status_for(self, connection):
+        target = probe_target(connection)
+        return self.probe_results.get(target) if target else None
 
     def rowCount(self, index=QModelIndex()):
-        return len(self.connections)
+        if index.isValid():
+            return 0
+        return self.loaded_count
+
+    def canFetchMore(self, index=QModelIndex()):
+        return not index.isValid() and self.loaded_count < len(self.connections)
+
+    def fetchMore(self, index=QModelIndex()):
+        if index.isValid():
+            return
+        count = min(FETCH_BATCH_SIZE, len(self.connections) - self.loaded_count)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self.loaded_count, self.loaded_count + count - 1)
+        self.loaded_count += count
+        self.endInsertRows()
+
+    def fetch_all(self):
+        """Expose every remaining connection to views with a single range insert."""
+        if self.loaded_count < len(self.connections):
+            self.beginInsertRows(QModelIndex(), self.loaded_count, len(self.connections) - 1)
+            self.loaded_count = len(self.connections)
+            self.endInsertRows()
+
+    def set_connections(self, connections):
+        """Replace the whole list with one model reset."""
+        self.beginResetModel()
+        self.connections = connections
+        self._rows_by_id = None
+        self.loaded_count = min(len(self.connections), FETCH_BATCH_SIZE)
+        self.endResetModel()
 
     def add_connection(self, connection):
-        self.beginInsertRows(QModelIndex(), self.rowCount(), self.rowCount())
-        self.connections.append(connection)
+        self.add_connections([connection])
+
+    def add_connections(self, connections):
+        """Append several connections with a single range insert."""
+        if not connections:
+            return
+        # New rows go at the end, so everything before them has to be visible first
+        self.fetch_all()
+        first = len(self.connections)
+        self.beginInsertRows(QModelIndex(), first, first + len(connections) - 1)
+        if self._rows_by_id is not None:
+            for row, connection in enumerate(connections, first):
+                self._rows_by_id[connection['id']] = row
+        self.connections.extend(connections)
+        self.loaded_count = len(self.connections)
         self.endInsertRows()
+        self.connections_added.emit(connections)
 
     def remove_connection(self, index):
-        self.beginRemoveRows(QModelIndex(), index, index)
-        del self.connections[index]
-        self.endRemoveRows()
+        self.remove_connections([index])
+
+    def remove_connections(self, rows):
+        """Remove rows, issuing one remove per contiguous run instead of per row."""
+        rows = sorted(set(rows), reverse=True)
+        self._rows_by_id = None
+        removed = [self.connections[row] for row in rows]
+        while rows:
+            last = first = rows.pop(0)
+            while rows and rows[0] == first - 1:
+                first = rows.pop(0)
+            if first < self.loaded_count:
+                visible_last = min(last, self.loaded_count - 1)
+                self.beginRemoveRows(QModelIndex(), first, visible_last)
+                del self.connections[first:last + 1]
+                self.loaded_count -= visible_last - first + 1
+                self.endRemoveRows()
+            else:
+                del self.connections[first:last + 1]
+        if removed:
+            self.connections_removed.emit(removed)
 
     def get_connection(self, row):
         return self.connections[row]
 
+    def set_probe_results(self, results):
+        """Merge a batch of probe results and repaint status badges in one dataChanged."""
+        if not results:
+            return
+        self.probe_results.update(results)
+        # Views only repaint the rows on screen, so one range signal is cheaper than
+        # working out which rows use each host
+        if self.loaded_count:
+            self.dataChanged.emit(self.index(0), self.index(self.loaded_count - 1), [StatusRole])
+
+    def row_for_id(self, connection_id):
+        """Return the row holding the connection with this id, or -1."""
+        if self._rows_by_id is None:
+            self._rows_by_id = {connection['id']: row for row, connection in enumerate(self.connections)}
+        return self._rows_by_id.get(connection_id, -1)
+
     def update_connection(self, row, connection):
         if 0 <= row < len(self.connections):
+            if self._rows_by_id is not None:
+                self._rows_by_id.pop(self.connections[row]['id'], None)
+                self._rows_by_id[connection['id']] = row
+            previous = self.connections[row]
             self.connections[row] = connection
-            self.dataChanged.emit(self.index(row), self.index(row))
+            if row < self.loaded_count:
+                self.dataChanged.emit(self.index(row), self.index(row))
+            self.connection_updated.emit(previous, connection)
+
+
+class ConnectionSearchProxyModel(QAbstractProxyModel):
+    """Filters and ranks a ConnectionListModel using a prebuilt SearchIndex.
+
+    Without a query the proxy passes rows straight through, including incremental
+    fetching. With a query it shows the index's ranked matches, so a keystroke costs
+    one index lookup rather than a Python filterAcceptsRow() call for every row.
+    """
+
+    def __init__(self, source_model, search_index):
+        super().__init__()
+        self.search_index = search_index
+        self.query = ""
+        # Ranked connection ids while a query is active, None when showing everything
+        self._ids = None
+        self._positions = {}
+        self.setSourceModel(source_model)
+        source_model.rowsAboutToBeInserted.connect(self._source_rows_about_to_be_inserted)
+        source_model.rowsInserted.connect(self._source_rows_inserted)
+        source_model.rowsAboutToBeRemoved.connect(self._source_rows_about_to_be_removed)
+        source_model.rowsRemoved.connect(self._source_rows_removed)
+        source_model.dataChanged.connect(self._source_data_changed)
+        source_model.modelAboutToBeReset.connect(self.beginResetModel)
+        source_model.modelReset.connect(self._source_model_reset)
+
+    def set_query(self, query):
+        query = query.strip()
+        if query == self.query:
+            return
+        self.query = query
+        if query:
+            # Matches can be anywhere in the list, so make every row addressable
+            self.sourceModel().fetch_all()
+        self._refresh()
+
+    def _run_query(self):
+        if self.query:
+            self._ids = self.search_index.ranked(self.query)
+            self._positions = {connection_id: row for row, connection_id in enumerate(self._ids)}
+        else:
+            self._ids = None
+            self._positions = {}
+
+    def _refresh(self):
+        self.beginResetModel()
+        self._run_query()
+        self.endResetModel()
+
+    def is_filtered(self):
+        return self._ids is not None
+
+    def rowCount(self, index=QModelIndex()):
+        if index.isValid():
+            return 0
+        if self._ids is None:
+            return self.sourceModel().rowCount()
+        return len(self._ids)
+
+    def columnCount(self, index=QModelIndex()):
+        return 0 if index.isValid() else 1
+
+    def index(self, row, column=0, parent=QModelIndex()):
+        if parent.isValid() or column != 0 or not 0 <= row < self.rowCount():
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid():
+            return QModelIndex()
+        if self._ids is None:
+            return self.sourceModel().index(proxy_index.row())
+        return self.sourceModel().index(self.sourceModel().row_for_id(self._ids[proxy_index.row()]))
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QModelIndex()
+        if self._ids is None:
+            return self.index(source_index.row())
+        connection = self.sourceModel().get_connection(source_index.row())
+        row = self._positions.get(connection['id'])
+        return QModelIndex() if row is None else self.index(row)
+
+    def data(self, index, role=Qt.DisplayRole):
+        return self.sourceModel().data(self.mapToSource(index), role)
+
+    def canFetchMore(self, index=QModelIndex()):
+        return self._ids is None and self.sourceModel().canFetchMore(index)
+
+    def fetchMore(self, index=QModelIndex()):
+        if self._ids is None:
+            self.sourceModel().fetchMore(index)
+
+    # Source changes are forwarded row for row while unfiltered; while filtered the
+    # query is simply re-run against the (already updated) index
+
+    def _source_rows_about_to_be_inserted(self, parent, first, last):
+        if self._ids is None:
+            self.beginInsertRows(QModelIndex(), first, last)
+
+    def _source_rows_inserted(self, parent, first, last):
+        if self._ids is None:
+            self.endInsertRows()
+        else:
+            self._refresh()
+
+    def _source_rows_about_to_be_removed(self, parent, first, last):
+        if self._ids is None:
+            self.beginRemoveRows(QModelIndex(), first, last)
 
+    def _source_rows_removed(self, parent, first, last):
+        if self._ids is None:
+            self.endRemoveRows()
+        else:
+            self._refresh()
 
+    def _source_data_changed(self, top_left, bottom_right, roles=()):
+        if self._ids is None:
+            self.dataChanged.emit(self.index(top_left.row()), self.index(bottom_right.row()), roles)
+        elif roles and Qt.DisplayRole not in roles:
+            # Status updates don't change what matches, so keep the current ranking
+            if self._ids:
+                self.dataChanged.emit(self.index(0), self.index(len(self._ids) - 1), roles)
+        else:
+            self._refresh()
 
+    def _source_model_reset(self):
+        self._run_query()
+        self.endResetModel()
@@ -0,0 +1,142 @@
+import os
+import time
+import shutil
+import logging
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from config import runtime_dir
+
+# How long an idle master stays up after its last session closes
+DEFAULT_CONTROL_PERSIST = '10m'
+# Seconds a successful `ssh -O check` is trusted before asking ssh again
+CHECK_TTL = 30
+# Masters started in parallel when pre-warming
+PREWARM_WORKERS = 4
+PREWARM_TIMEOUT = 20
+
+
+def control_dir():
+    """Return the private directory the control sockets live in, creating it if needed."""
+    return runtime_dir('ssh')
+
+
+class MultiplexManager:
+    """Shares one authenticated SSH connection per host between terminal launches.
+
+    With multiplexing on, launches pass ControlMaster=auto so the first ssh to a
+    host becomes a master that later sessions ride on, skipping the TCP
+    handshake, key exchange and authentication. ControlPersist keeps the master
+    around after the last terminal closes. Connections marked 'prewarm' get a
+    master opened in the background at startup so even the first launch is fast.
+    """
+
+    def __init__(self, config, ssh=None):
+        self.config = config
+        self.ssh = ssh or shutil.which('ssh') or 'ssh'
+        # destination -> time.monotonic() of the last successful check
+        self.live = {}
+        self.lock = threading.Lock()
+        self.executor = None
+
+    def enabled_for(self, connection):
+        """Per-connection 'multiplex' wins; connections without one follow the global setting."""
+        if connection.get('protocol', 'SSH') != 'SSH':
+            return False
+        multiplex = connection.get('multiplex')
+        if multiplex is None:
+            return self.config.get('ssh_multiplexing', False)
+        return bool(multiplex)
+
+    def control_options(self, connection):
+        """Return the ssh arguments that attach a launch to the host's master."""
+        if not self.enabled_for(connection):
+            return []
+        try:
+            path = control_dir()
+        except OSError as e:
+            # A socket directory someone else could plant masters in is worse than no sharing
+            logging.warning(f"SSH multiplexing is off: {str(e)}")
+            return []
+        return [
+            "-o", "ControlMaster=auto",
+            "-o", f"ControlPath={os.path.join(path, '%C')}",
+            "-o", f"ControlPersist={self.config.get('ssh_control_persist', DEFAULT_CONTROL_PERSIST)}",
+        ]
+
+    def destination_args(self, connection):
+        args = []
+        if connection.get('use_identity_file', False) and connection.get('identity_file'):
+            args.extend(["-i", connection['identity_file']])
+        args.append(f"{connection['username']}@{connection.get('ssh_alias') or connection['domain']}")
+        return args
+
+    def _run(self, connection, *args, timeout=5):
+        """Run ssh against the connection's control socket; returns (returncode, stderr)."""
+        command = [self.ssh, *self.control_options(connection), *args, *self.destination_args(connection)]
+        # A backgrounded master inherits ssh's stderr, so reading it from a pipe would
+        # wait for the master to exit; a file doesn't have that problem
+        with tempfile.TemporaryFile() as stderr:
+            result = subprocess.run(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=stderr, timeout=timeout)
+            stderr.seek(0)
+            return result.returncode, stderr.read().decode(errors='replace').strip()
+
+    def is_live(self, connection, use_cache=True):
+        """Ask ssh whether a master for this connection is running."""
+        if not self.enabled_for(connection):
+            return False
+        destination = self.destination_args(connection)[-1]
+        with self.lock:
+            checked_at = self.live.get(destination)
+        if use_cache and checked_at is not None and time.monotonic() - checked_at < CHECK_TTL:
+            return True
+        try:
+            live = self._run(connection, "-O", "check")[0] == 0
+        except (OSError, subprocess.SubprocessError) as e:
+            logging.warning(f"ssh -O check failed for {destination}: {str(e)}")
+            live = False
+        with self.lock:
+            if live:
+                self.live[destination] = time.monotonic()
+            else:
+                self.live.pop(destination, None)
+        return live
+
+    def start_master(self, connection):
+        """Open a background master for the connection unless one is already live.
+
+        BatchMode keeps ssh from prompting, so this only succeeds for hosts that
+        authenticate with keys or an agent; anything else is left for the
+        terminal launch to authenticate interactively.
+        """
+        if not self.enabled_for(connection) or self.is_live(connection, use_cache=False):
+            return False
+        destination = self.destination_args(connection)[-1]
+        try:
+            returncode, error = self._run(connection, "-f", "-N", "-o", "BatchMode=yes", timeout=PREWARM_TIMEOUT)
+        except (OSError, subprocess.SubprocessError) as e:
+            logging.warning(f"Could not pre-warm SSH master for {destination}: {str(e)}")
+            return False
+        if returncode != 0:
+            logging.warning(f"Could not pre-warm SSH master for {destination}: {error}")
+            return False
+        with self.lock:
+            self.live[destination] = time.monotonic()
+        return True
+
+    def prewarm(self, connections):
+        """Start masters for connections marked 'prewarm' on background threads."""
+        connections = [connection for connection in connections
+                       if connection.get('prewarm') and self.enabled_for(connection)]
+        if not connections:
+            return []
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=PREWARM_WORKERS, thread_name_prefix="ssh-prewarm")
+        return [self.executor.submit(self.start_master, connection) for connection in connections]
+
+    def shutdown(self):
+        # Masters are left running on purpose; ControlPersist retires them
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
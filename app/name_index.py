@@ -0,0 +1,65 @@
+import os
+import logging
+from config import runtime_dir
+from writer import atomic_write
+
+NAME_INDEX_NAME = 'names'
+
+
+def name_index_path():
+    """Return where the index lives, or None when there is no session runtime directory.
+
+    XDG_RUNTIME_DIR is memory-backed and goes away at logout; the temp directory
+    runtime_dir() falls back to may well be on disk, so there is no index there.
+    """
+    if not os.environ.get('XDG_RUNTIME_DIR'):
+        return None
+    return os.path.join(runtime_dir(), NAME_INDEX_NAME)
+
+
+def write_name_index(connections, path=None):
+    """Write every connection name, one per line, for shell completion.
+
+    Names are readable from the index without unlocking the keyring but never
+    end up on disk unencrypted; without a runtime directory nothing is written.
+    """
+    try:
+        path = path or name_index_path()
+    except OSError as e:
+        logging.warning(f"Could not write the connection name index: {str(e)}")
+        return
+    if path is None:
+        return
+    names = sorted({connection.get('name', '') for connection in connections} - {''})
+    try:
+        atomic_write(path, "".join(f"{name}\n" for name in names).encode())
+    except OSError as e:
+        logging.warning(f"Could not write the connection name index: {str(e)}")
+
+
+def read_name_index(path=None):
+    """Return the indexed names, or None if there is no usable index."""
+    try:
+        path = path or name_index_path()
+        if path is None:
+            return None
+        with open(path, 'r') as f:
+            return f.read().splitlines()
+    except OSError:
+        # Missing, or a runtime directory runtime_dir() refuses; callers fall back to the store
+        return None
+
+
+def find_connection(connections, name):
+    """Exact name first, then case-insensitive, then a unique case-insensitive prefix."""
+    for matches in (
+        [c for c in connections if c.get('name') == name],
+        [c for c in connections if c.get('name', '').lower() == name.lower()],
+        [c for c in connections if c.get('name', '').lower().startswith(name.lower())],
+    ):
+        if len(matches) == 1:
+            return matches[0]
+        if len(matches) > 1:
+            names = ", ".join(sorted(c['name'] for c in matches)[:10])
+            raise LookupError(f"'{name}' matches several connections: {names}")
+    raise LookupError(f"No connection named '{name}'")
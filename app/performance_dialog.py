@@ -0,0 +1,83 @@
+import logging
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QCheckBox, QPushButton,
+                             QDialogButtonBox, QFileDialog, QMessageBox)
+from PyQt5.QtCore import QTimer
+from sessions_dialog import make_table, fill_table
+from tracing import tracer
+
+REFRESH_INTERVAL = 1000
+
+
+def format_ms(nanoseconds):
+    return f"{nanoseconds / 1e6:.3f}"
+
+
+class PerformanceDialog(QDialog):
+    """Per-span timing histograms from the tracer, with a Chrome trace export."""
+
+    def __init__(self, main_window):
+        super().__init__(main_window)
+        self.main_window = main_window
+        self.setWindowTitle("Performance")
+        self.resize(640, 400)
+
+        layout = QVBoxLayout(self)
+        self.enabled_checkbox = QCheckBox("Record timings")
+        self.enabled_checkbox.setChecked(tracer.enabled)
+        self.enabled_checkbox.toggled.connect(self.set_enabled)
+        layout.addWidget(self.enabled_checkbox)
+
+        self.table = make_table(["Span", "Count", "Total ms", "Mean ms", "p50 ms", "p95 ms", "Max ms"])
+        layout.addWidget(self.table)
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+
+        buttons = QHBoxLayout()
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.reset)
+        buttons.addWidget(reset_button)
+        export_button = QPushButton("Export Chrome Trace...")
+        export_button.clicked.connect(self.export_trace)
+        buttons.addWidget(export_button)
+        buttons.addStretch()
+        button_box = QDialogButtonBox(QDialogButtonBox.Close)
+        button_box.rejected.connect(self.reject)
+        buttons.addWidget(button_box)
+        layout.addLayout(buttons)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start(REFRESH_INTERVAL)
+        self.refresh()
+
+    def set_enabled(self, enabled):
+        tracer.enabled = enabled
+        self.main_window.controller.toggle_tracing(enabled)
+        self.refresh()
+
+    def reset(self):
+        tracer.reset()
+        self.refresh()
+
+    def refresh(self):
+        histograms = tracer.snapshot()
+        rows = []
+        for name, histogram in sorted(histograms.items(), key=lambda item: -item[1].total):
+            rows.append((name, histogram.count, format_ms(histogram.total), format_ms(histogram.mean()),
+                         format_ms(histogram.percentile(0.5)), format_ms(histogram.percentile(0.95)),
+                         format_ms(histogram.max)))
+        fill_table(self.table, rows)
+        if tracer.enabled:
+            self.summary_label.setText(f"{sum(h.count for h in histograms.values())} spans recorded")
+        else:
+            self.summary_label.setText("Recording is off")
+
+    def export_trace(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export Chrome Trace", "nutty-trace.json", "JSON Files (*.json)")
+        if not path:
+            return
+        try:
+            tracer.export_chrome_trace(path)
+        except OSError as e:
+            logging.error(f"Error exporting trace: {str(e)}")
+            QMessageBox.critical(self, "Error", f"Failed to export trace: {str(e)}")
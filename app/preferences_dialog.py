@@ -1,8 +1,7 @@
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QLabel, QComboBox, QCheckBox, 
                              QDialogButtonBox, QWidget)
 from PyQt5.QtCore import Qt
-import os
-from config import THEMES_DIR, load_theme
+from config import list_themes, load_theme
 
 class PreferencesDialog(QDialog):
     def __init__(self, main_window):
@@ -10,7 +9,7 @@ class PreferencesDialog(QDialog):
         self.main_window = main_window
         self.setWindowTitle("Preferences")
         self.setModal(True)
-        self.setFixedSize(300, 250)  # Set a fixed size for the dialog
+        self.setFixedSize(300, 310)  # Set a fixed size for the dialog
         
         # Set window flags to remove resize handles
         self.setWindowFlags(self.windowFlags() | Qt.MSWindowsFixedSizeDialogHint | Qt.CustomizeWindowHint | Qt.WindowTitleHint | Qt.WindowCloseButtonHint)
@@ -57,6 +56,21 @@ class PreferencesDialog(QDialog):
         self.minimize_checkbox.setChecked(self.main_window.controller.get_minimize_on_close())
         content_layout.addWidget(self.minimize_checkbox)
         
+        # Share one SSH connection per host between terminals
+        self.multiplex_checkbox = QCheckBox("Reuse SSH Connections (Multiplexing)")
+        self.multiplex_checkbox.setChecked(self.main_window.controller.get_ssh_multiplexing())
+        content_layout.addWidget(self.multiplex_checkbox)
+        
+        # Badge each connection with whether its host is reachable
+        self.host_probe_checkbox = QCheckBox("Show Host Status")
+        self.host_probe_checkbox.setChecked(self.main_window.controller.get_host_probe())
+        content_layout.addWidget(self.host_probe_checkbox)
+        
+        # Mirror ~/.ssh/config Host entries into the connection list
+        self.ssh_sync_checkbox = QCheckBox("Keep SSH Config Hosts in Sync")
+        self.ssh_sync_checkbox.setChecked(self.main_window.controller.get_ssh_config_sync())
+        content_layout.addWidget(self.ssh_sync_checkbox)
+        
         # Add some vertical spacing
         content_layout.addStretch(1)
         
@@ -73,7 +87,7 @@ class PreferencesDialog(QDialog):
         self.setLayout(main_layout)
 
     def get_available_themes(self):
-        return [d for d in os.listdir(THEMES_DIR) if os.path.isdir(os.path.join(THEMES_DIR, d))]
+        return list_themes()
 
     def apply_settings(self):
         selected_terminal = self.terminal_combo.currentText()
@@ -86,6 +100,13 @@ class PreferencesDialog(QDialog):
         
         minimize_on_close = self.minimize_checkbox.isChecked()
         self.main_window.controller.toggle_minimize_on_close(minimize_on_close)
+        
+        self.main_window.controller.toggle_ssh_multiplexing(self.multiplex_checkbox.isChecked())
+        
+        self.main_window.set_host_probes(self.host_probe_checkbox.isChecked())
+        
+        self.main_window.controller.toggle_ssh_config_sync(self.ssh_sync_checkbox.isChecked())
+        self.main_window.set_ssh_config_sync(self.ssh_sync_checkbox.isChecked())
 
     def accept(self):
         self.apply_settings()
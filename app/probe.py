@@ -0,0 +1,143 @@
+import time
+import asyncio
+import logging
+import threading
+from collections import namedtuple
+
+UP = 'up'
+DOWN = 'down'
+TIMEOUT = 'timeout'
+
+DEFAULT_CONCURRENCY = 64
+DEFAULT_TIMEOUT = 2.0
+# Seconds a result is trusted before the host is probed again
+DEFAULT_TTL = 60
+DEFAULT_PORTS = {'SSH': 22, 'Telnet': 23}
+
+# latency is in seconds and only set for hosts that are up; checked_at is time.monotonic()
+ProbeResult = namedtuple('ProbeResult', ['status', 'latency', 'checked_at'])
+
+
+def probe_target(connection):
+    """Return the (host, port) a connection's reachability is checked against, or None."""
+    host = (connection.get('domain') or '').strip()
+    if not host:
+        return None
+    try:
+        port = int(connection.get('port') or DEFAULT_PORTS.get(connection.get('protocol', 'SSH'), 22))
+    except (TypeError, ValueError):
+        port = DEFAULT_PORTS.get(connection.get('protocol', 'SSH'), 22)
+    return host, port
+
+
+class ProbeEngine:
+    """TCP-connects to hosts on a private asyncio loop running in a worker thread.
+
+    At most concurrency connection attempts are open at once and each gives up
+    after timeout seconds, so thousands of hosts can be queued in one call.
+    Results are cached per (host, port) for ttl seconds and passed to on_result
+    as they arrive; on_result runs on the worker thread.
+    """
+
+    def __init__(self, on_result=None, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT, ttl=DEFAULT_TTL):
+        self.on_result = on_result
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.ttl = ttl
+        self.results = {}
+        self.in_flight = set()
+        self.lock = threading.Lock()
+        self.loop = None
+        self.thread = None
+        self.semaphore = None
+
+    def start(self):
+        if self.loop is not None:
+            return
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="host-probe", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=1.0):
+        """Cancel outstanding probes and shut the loop down."""
+        if self.loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._cancel_all(), self.loop).result(timeout)
+        except Exception as e:
+            logging.warning(f"Host probes did not stop cleanly: {str(e)}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout)
+        if not self.thread.is_alive():
+            self.loop.close()
+        self.loop = None
+        self.thread = None
+
+    def probe(self, connections, force=False):
+        """Queue probes for connections without a fresh result; returns how many were queued."""
+        now = time.monotonic()
+        targets = []
+        with self.lock:
+            for connection in connections:
+                target = probe_target(connection)
+                if target is None or target in self.in_flight:
+                    continue
+                cached = self.results.get(target)
+                if not force and cached and now - cached.checked_at < self.ttl:
+                    continue
+                self.in_flight.add(target)
+                targets.append(target)
+        if targets:
+            self.start()
+            asyncio.run_coroutine_threadsafe(self._probe_all(targets), self.loop)
+        return len(targets)
+
+    async def _cancel_all(self):
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _probe_all(self, targets):
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*(self._probe_one(host, port) for host, port in targets))
+
+    async def _probe_one(self, host, port):
+        try:
+            async with self.semaphore:
+                start = time.perf_counter()
+                try:
+                    _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), self.timeout)
+                except asyncio.TimeoutError:
+                    result = ProbeResult(TIMEOUT, None, time.monotonic())
+                except (OSError, ValueError):
+                    # Refused, unreachable, or the name didn't resolve; an invalid or
+                    # overlong host name fails encoding with a ValueError (UnicodeError)
+                    result = ProbeResult(DOWN, None, time.monotonic())
+                else:
+                    result = ProbeResult(UP, time.perf_counter() - start, time.monotonic())
+                    writer.close()
+        finally:
+            with self.lock:
+                self.in_flight.discard((host, port))
+
+        with self.lock:
+            self.results[(host, port)] = result
+        if self.on_result:
+            try:
+                self.on_result((host, port), result)
+            except Exception as e:
+                logging.error(f"Error delivering probe result: {str(e)}")
+
+
+def create_probe_engine(config, on_result=None):
+    """Return the engine configured in config, or None when probing is turned off."""
+    if not config.get('host_probe', False):
+        return None
+    return ProbeEngine(
+        on_result=on_result,
+        concurrency=config.get('host_probe_concurrency', DEFAULT_CONCURRENCY),
+        timeout=config.get('host_probe_timeout', DEFAULT_TIMEOUT),
+        ttl=config.get('host_probe_interval', DEFAULT_TTL),
+    )
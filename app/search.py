@@ -0,0 +1,207 @@
+import re
+import math
+import threading
+from collections import Counter, defaultdict
+
+SEARCH_FIELDS = ('name', 'domain', 'username', 'description')
+
+# Fraction of a term's trigrams a connection must contain to count as a fuzzy match
+MIN_TRIGRAM_MATCH = 0.6
+# Terms with this few trigrams must match all of them, so "host1" does not find "host2"
+EXACT_TRIGRAM_LIMIT = 3
+
+_WORD = re.compile(r'[a-z0-9]+')
+
+
+def _words(text):
+    return _WORD.findall((text or '').lower())
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """In-memory trigram index over connection fields.
+
+    Fields are split into lowercase words. Terms of three or more characters are
+    matched through trigram postings, which tolerates typos and matches inside
+    words; shorter terms match the start of a word. Matching and ranking are
+    done with set and Counter operations so the per-keystroke cost stays small
+    even with 100k connections. The index is kept up to date incrementally
+    through add(), update() and remove().
+    """
+
+    def __init__(self, connections=()):
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._deferred = []
+        # Bumped by every rebuild so a superseded build thread stops adding
+        self._generation = 0
+        self._reset()
+        for connection in connections:
+            self._add(connection)
+        self._ready.set()
+
+    def _reset(self):
+        self._grams = defaultdict(set)
+        self._name_grams = defaultdict(set)
+        self._texts = {}
+        self._order = {}
+        self._sequence = 0
+
+    @classmethod
+    def build_in_background(cls, connections):
+        """Return an index that fills itself on a worker thread."""
+        index = cls()
+        index.rebuild_in_background(connections)
+        return index
+
+    def rebuild_in_background(self, connections):
+        """Replace the contents with connections, indexed on a worker thread.
+
+        Changes made while it is building are replayed once it is done, and
+        searches wait for the build to finish.
+        """
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            self._ready.clear()
+            self._deferred = []
+            self._reset()
+        thread = threading.Thread(target=self._build, args=(list(connections), generation),
+                                  name="nuTTY-search-index", daemon=True)
+        thread.start()
+
+    def _build(self, connections, generation):
+        for connection in connections:
+            with self._lock:
+                if generation != self._generation:
+                    return
+                self._add(connection)
+        with self._lock:
+            if generation != self._generation:
+                return
+            for method, argument in self._deferred:
+                method(argument)
+            self._deferred = []
+            self._ready.set()
+
+    def wait_until_ready(self, timeout=None):
+        return self._ready.wait(timeout)
+
+    def _run(self, method, argument):
+        with self._lock:
+            if not self._ready.is_set():
+                self._deferred.append((method, argument))
+                return
+            method(argument)
+
+    def add(self, connection):
+        self._run(self._add, connection)
+
+    def update(self, connection):
+        self._run(self._add, connection)
+
+    def remove(self, connection_id):
+        self._run(self._remove, connection_id)
+
+    def __len__(self):
+        return len(self._texts)
+
+    def _keys(self, name, other):
+        name_words = set(_words(name))
+        other_words = {word for text in other for word in _words(text)}
+        # The leading space gives each word a start-of-word gram such as ' we', which
+        # doubles as the index of two-letter word prefixes
+        name_grams = set().union(*(_trigrams(' ' + word) for word in name_words))
+        return name_grams.union(*(_trigrams(' ' + word) for word in other_words - name_words)), name_grams
+
+    def _postings(self):
+        return self._grams, self._name_grams
+
+    def _add(self, connection):
+        connection_id = connection['id']
+        if connection_id in self._texts:
+            self._remove(connection_id, keep_order=True)
+        texts = (connection.get('name'), tuple(connection.get(field) for field in SEARCH_FIELDS[1:]))
+        self._texts[connection_id] = texts
+        if connection_id not in self._order:
+            self._order[connection_id] = self._sequence
+            self._sequence += 1
+        for postings, keys in zip(self._postings(), self._keys(*texts)):
+            for key in keys:
+                postings[key].add(connection_id)
+
+    def _remove(self, connection_id, keep_order=False):
+        texts = self._texts.pop(connection_id, None)
+        if texts is None:
+            return
+        if not keep_order:
+            del self._order[connection_id]
+        for postings, keys in zip(self._postings(), self._keys(*texts)):
+            for key in keys:
+                ids = postings[key]
+                ids.discard(connection_id)
+                if not ids:
+                    del postings[key]
+
+    def search(self, query):
+        """Return {connection id: score} for connections matching every term of query."""
+        self._ready.wait()
+        scores = None
+        for term in _words(query):
+            term_scores = self._search_term(term)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {connection_id: scores[connection_id] + score
+                          for connection_id, score in term_scores.items() if connection_id in scores}
+            if not scores:
+                return {}
+        return scores or {}
+
+    def ranked(self, query):
+        """Return matching connection ids, best match first, ties in insertion order."""
+        scores = self.search(query)
+        ids = sorted(scores, key=self._order.__getitem__)
+        # Python's sort is stable even when reversed, so insertion order breaks ties
+        ids.sort(key=scores.__getitem__, reverse=True)
+        return ids
+
+    def _search_term(self, term):
+        if len(term) < 3:
+            return self._search_prefix(term)
+
+        grams = _trigrams(term)
+        postings = [self._grams.get(gram, set()) for gram in grams]
+        required = math.ceil(len(postings) * MIN_TRIGRAM_MATCH)
+        if len(postings) <= EXACT_TRIGRAM_LIMIT:
+            required = len(postings)
+        if required == len(postings):
+            scores = dict.fromkeys(set.intersection(*postings), 1.0)
+        else:
+            counts = Counter()
+            for posting in postings:
+                counts.update(posting)
+            total = len(postings)
+            scores = {connection_id: count / total for connection_id, count in counts.items() if count >= required}
+
+        # Bonuses for the term appearing in the name, and for it starting a word
+        name_postings = [self._name_grams.get(gram) for gram in grams]
+        if all(name_postings):
+            for connection_id in set.intersection(*name_postings).intersection(scores):
+                scores[connection_id] += 1.0
+        for connection_id in self._grams.get(' ' + term[:2], set()).intersection(scores):
+            scores[connection_id] += 0.5
+        return scores
+
+    def _search_prefix(self, term):
+        if len(term) == 2:
+            keys = [' ' + term]
+        else:
+            keys = [gram for gram in self._grams if gram[1] == term and gram[0] == ' ']
+        scores = dict.fromkeys(set().union(*(self._grams.get(key, ()) for key in keys)), 1.0)
+        for connection_id in set().union(*(self._name_grams.get(key, ()) for key in keys)):
+            scores[connection_id] += 1.0
+        return scores
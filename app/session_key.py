@@ -0,0 +1,88 @@
+import shutil
+import subprocess
+import logging
+from config import APP_NAME, load_or_generate_key
+from tracing import span
+
+KEY_DESCRIPTION = f"{APP_NAME}:encryption_key"
+# Seconds a cached key survives in the kernel keyring
+DEFAULT_SESSION_KEY_TTL = 3600
+
+
+class SessionKeyCache:
+    """Caches the store key in the Linux kernel user keyring through keyctl.
+
+    The kernel keyring is private to the user, never touches disk and expires the
+    key after ttl seconds, so repeated launches (and the CLI) within that window
+    don't have to go through Secret Service over D-Bus. Without keyctl installed
+    the cache is simply unavailable and every lookup misses.
+    """
+
+    def __init__(self, ttl=DEFAULT_SESSION_KEY_TTL, keyctl=None):
+        self.ttl = ttl
+        self.keyctl = keyctl or shutil.which('keyctl')
+
+    def available(self):
+        return self.keyctl is not None
+
+    def _run(self, *args, data=None):
+        return subprocess.run([self.keyctl, *args], input=data, capture_output=True, timeout=2)
+
+    def get(self):
+        if not self.available():
+            return None
+        try:
+            result = self._run('request', 'user', KEY_DESCRIPTION)
+            if result.returncode != 0:
+                return None
+            result = self._run('pipe', result.stdout.decode().strip())
+            if result.returncode != 0:
+                return None
+            return result.stdout.strip() or None
+        except (OSError, subprocess.SubprocessError) as e:
+            logging.warning(f"Session key cache lookup failed: {str(e)}")
+            return None
+
+    def put(self, key):
+        if not self.available():
+            return
+        try:
+            result = self._run('padd', 'user', KEY_DESCRIPTION, '@u', data=key)
+            if result.returncode == 0:
+                self._run('timeout', result.stdout.decode().strip(), str(self.ttl))
+        except (OSError, subprocess.SubprocessError) as e:
+            logging.warning(f"Session key cache update failed: {str(e)}")
+
+    def clear(self):
+        if not self.available():
+            return
+        try:
+            result = self._run('request', 'user', KEY_DESCRIPTION)
+            if result.returncode == 0:
+                self._run('unlink', result.stdout.decode().strip(), '@u')
+        except (OSError, subprocess.SubprocessError) as e:
+            logging.warning(f"Session key cache clear failed: {str(e)}")
+
+
+def session_key_cache(config):
+    """Return the cache configured in config, or None unless it has been turned on."""
+    if not config.get('session_key_cache', False):
+        return None
+    return SessionKeyCache(ttl=config.get('session_key_ttl', DEFAULT_SESSION_KEY_TTL))
+
+
+def unlock_key(config, backend=None):
+    """Return the store key, trying the session cache before the system keyring.
+
+    backend may be any keyring backend object, e.g. a fake one in tests.
+    """
+    cache = session_key_cache(config)
+    with span("keyring.session_cache"):
+        key = cache.get() if cache else None
+    if key:
+        return key
+    with span("keyring"):
+        key = load_or_generate_key(backend)
+    if cache:
+        cache.put(key)
+    return key
@@ -0,0 +1,186 @@
+import os
+import json
+import time
+import logging
+import threading
+import itertools
+import subprocess
+from config import CACHE_DIR
+from writer import atomic_write
+from tracing import span
+
+SESSION_STATS_FILE = os.path.join(CACHE_DIR, 'session_stats.json')
+# Seconds between checks on running terminals
+POLL_INTERVAL = 0.5
+
+
+class Session:
+    """A terminal process nuTTY started for a connection."""
+
+    def __init__(self, session_id, connection, terminal, process, spawn_latency):
+        self.id = session_id
+        self.connection_id = connection.get('id')
+        self.name = connection.get('name', '')
+        self.terminal = terminal
+        self.process = process
+        self.pid = process.pid
+        self.spawn_latency = spawn_latency
+        # Wall clock for display, monotonic for durations
+        self.started_at = time.time()
+        self.started = time.monotonic()
+        self.ended = None
+        self.returncode = None
+
+    def duration(self):
+        return (self.ended if self.ended is not None else time.monotonic()) - self.started
+
+
+class LaunchStats:
+    """Running totals for launches of one connection or one terminal emulator."""
+
+    def __init__(self, launches=0, spawn_total=0.0, spawn_max=0.0, exits=0, error_exits=0,
+                 lifetime_total=0.0, lifetime_max=0.0):
+        self.launches = launches
+        self.spawn_total = spawn_total
+        self.spawn_max = spawn_max
+        self.exits = exits
+        self.error_exits = error_exits
+        self.lifetime_total = lifetime_total
+        self.lifetime_max = lifetime_max
+
+    def record_spawn(self, latency):
+        self.launches += 1
+        self.spawn_total += latency
+        self.spawn_max = max(self.spawn_max, latency)
+
+    def record_exit(self, lifetime, returncode):
+        self.exits += 1
+        self.error_exits += returncode != 0
+        self.lifetime_total += lifetime
+        self.lifetime_max = max(self.lifetime_max, lifetime)
+
+    def average_spawn(self):
+        return self.spawn_total / self.launches if self.launches else 0.0
+
+    def average_lifetime(self):
+        return self.lifetime_total / self.exits if self.exits else 0.0
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+class SessionSupervisor:
+    """Tracks every terminal nuTTY spawns and reaps it when it exits.
+
+    A watcher thread polls the running processes, which only waits on our own
+    children; waiting on any pid would steal exit statuses from the ssh and
+    subprocess.run calls made elsewhere. The thread sleeps while nothing is
+    running. Spawn latency and spawn-to-exit time are aggregated per connection
+    and per terminal emulator, and persisted across runs.
+    """
+
+    def __init__(self, stats_file=SESSION_STATS_FILE, on_exit=None):
+        self.stats_file = stats_file
+        self.on_exit = on_exit
+        self.sessions = {}
+        self.ids = itertools.count(1)
+        self.condition = threading.Condition()
+        self.thread = None
+        self.stopping = False
+        self.connection_stats, self.terminal_stats = self.load_stats()
+
+    def load_stats(self):
+        try:
+            with open(self.stats_file, 'r') as f:
+                data = json.load(f)
+            return ({key: LaunchStats(**value) for key, value in data.get('connections', {}).items()},
+                    {key: LaunchStats(**value) for key, value in data.get('terminals', {}).items()})
+        except FileNotFoundError:
+            return {}, {}
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            logging.warning(f"Ignoring session statistics in {self.stats_file}: {str(e)}")
+            return {}, {}
+
+    def save_stats(self):
+        with self.condition:
+            data = {
+                'connections': {key: stats.to_dict() for key, stats in self.connection_stats.items()},
+                'terminals': {key: stats.to_dict() for key, stats in self.terminal_stats.items()},
+            }
+        try:
+            os.makedirs(os.path.dirname(self.stats_file), exist_ok=True)
+            atomic_write(self.stats_file, json.dumps(data).encode())
+        except OSError as e:
+            logging.warning(f"Could not save session statistics: {str(e)}")
+
+    def spawn(self, command, connection, terminal):
+        """Start a terminal for connection and start supervising it."""
+        start = time.perf_counter()
+        with span("process.spawn"):
+            process = subprocess.Popen(command, shell=False)
+        latency = time.perf_counter() - start
+
+        session = Session(next(self.ids), connection, terminal, process, latency)
+        with self.condition:
+            self.sessions[session.id] = session
+            self.stats_for(self.connection_stats, session.connection_id).record_spawn(latency)
+            self.stats_for(self.terminal_stats, terminal).record_spawn(latency)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.watch, name="session-reaper", daemon=True)
+                self.thread.start()
+            self.condition.notify()
+        return process
+
+    def stats_for(self, table, key):
+        key = key or '?'
+        if key not in table:
+            table[key] = LaunchStats()
+        return table[key]
+
+    def stats_snapshot(self):
+        """Return copies of the per-connection and per-terminal statistics."""
+        with self.condition:
+            return ({key: LaunchStats(**stats.to_dict()) for key, stats in self.connection_stats.items()},
+                    {key: LaunchStats(**stats.to_dict()) for key, stats in self.terminal_stats.items()})
+
+    def active_sessions(self):
+        with self.condition:
+            return sorted(self.sessions.values(), key=lambda session: session.started)
+
+    def watch(self):
+        while True:
+            with self.condition:
+                while not self.sessions and not self.stopping:
+                    self.condition.wait()
+                if self.stopping:
+                    return
+                running = list(self.sessions.values())
+
+            for session in running:
+                if session.process.poll() is not None:
+                    self.finish(session)
+            with self.condition:
+                if not self.stopping:
+                    self.condition.wait(POLL_INTERVAL)
+
+    def finish(self, session):
+        session.ended = time.monotonic()
+        session.returncode = session.process.returncode
+        with self.condition:
+            self.sessions.pop(session.id, None)
+            self.stats_for(self.connection_stats, session.connection_id).record_exit(session.duration(), session.returncode)
+            self.stats_for(self.terminal_stats, session.terminal).record_exit(session.duration(), session.returncode)
+        if self.on_exit:
+            try:
+                self.on_exit(session)
+            except Exception as e:
+                logging.error(f"Error handling session exit: {str(e)}")
+
+    def stop(self):
+        """Stop watching and save statistics; running terminals are left alone."""
+        with self.condition:
+            self.stopping = True
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join(1.0)
+        self.save_stats()
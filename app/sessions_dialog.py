@@ -0,0 +1,94 @@
+import time
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QLabel, QTableWidget, QTableWidgetItem,
+                             QHeaderView, QTabWidget, QDialogButtonBox, QAbstractItemView)
+from PyQt5.QtCore import QTimer
+
+# How often the durations tick over while the dialog is open
+REFRESH_INTERVAL = 1000
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02}:{seconds % 60:02}"
+
+
+def make_table(headers):
+    table = QTableWidget(0, len(headers))
+    table.setHorizontalHeaderLabels(headers)
+    table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+    table.setSelectionBehavior(QAbstractItemView.SelectRows)
+    table.verticalHeader().hide()
+    table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+    table.horizontalHeader().setStretchLastSection(True)
+    return table
+
+
+def fill_table(table, rows):
+    table.setRowCount(len(rows))
+    for row, values in enumerate(rows):
+        for column, value in enumerate(values):
+            item = table.item(row, column)
+            if item is None:
+                table.setItem(row, column, QTableWidgetItem(str(value)))
+            elif item.text() != str(value):
+                item.setText(str(value))
+
+
+class ActiveSessionsDialog(QDialog):
+    """Running terminals plus launch statistics per connection and per emulator."""
+
+    def __init__(self, main_window):
+        super().__init__(main_window)
+        self.main_window = main_window
+        self.supervisor = main_window.controller.sessions
+        self.setWindowTitle("Active Sessions")
+        self.resize(560, 360)
+
+        layout = QVBoxLayout(self)
+        tabs = QTabWidget()
+        layout.addWidget(tabs)
+
+        self.sessions_table = make_table(["Connection", "Terminal", "PID", "Started", "Duration"])
+        tabs.addTab(self.sessions_table, "Running")
+        self.connection_stats_table = make_table(["Connection", "Launches", "Avg Spawn", "Max Spawn", "Avg Lifetime", "Error Exits"])
+        tabs.addTab(self.connection_stats_table, "By Connection")
+        self.terminal_stats_table = make_table(["Terminal", "Launches", "Avg Spawn", "Max Spawn", "Avg Lifetime", "Error Exits"])
+        tabs.addTab(self.terminal_stats_table, "By Terminal")
+
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+
+        button_box = QDialogButtonBox(QDialogButtonBox.Close)
+        button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start(REFRESH_INTERVAL)
+        self.refresh()
+
+    def connection_name(self, connection_id):
+        row = self.main_window.controller.connection_list_model.row_for_id(connection_id)
+        if row < 0:
+            return "(deleted)"
+        return self.main_window.controller.connection_list_model.get_connection(row).get('name', '')
+
+    def refresh(self):
+        sessions = self.supervisor.active_sessions()
+        fill_table(self.sessions_table, [
+            (session.name, session.terminal, session.pid,
+             time.strftime('%H:%M:%S', time.localtime(session.started_at)), format_duration(session.duration()))
+            for session in sessions
+        ])
+        connection_stats, terminal_stats = self.supervisor.stats_snapshot()
+        fill_table(self.connection_stats_table, self.stats_rows(connection_stats, self.connection_name))
+        fill_table(self.terminal_stats_table, self.stats_rows(terminal_stats, str))
+        self.summary_label.setText(f"{len(sessions)} running")
+
+    def stats_rows(self, table, label):
+        rows = []
+        for key, stats in sorted(table.items(), key=lambda item: -item[1].launches):
+            rows.append((label(key), stats.launches,
+                         f"{stats.average_spawn() * 1000:.1f} ms", f"{stats.spawn_max * 1000:.1f} ms",
+                         format_duration(stats.average_lifetime()) if stats.exits else "-", stats.error_exits))
+        return rows
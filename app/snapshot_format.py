@@ -0,0 +1,123 @@
+"""The binary layout of the connections.dat snapshot.
+
+On disk the snapshot is MAGIC, a version byte and the raw bytes of one Fernet
+token, rather than the base64 text of the token. Inside the token, version 1
+holds, all integers little-endian uint32:
+
+    header      string count, string text bytes, other values bytes,
+                connection count, field count
+    lengths     the length of each string in the table, in characters
+    text        every string in the table, concatenated, as UTF-8
+    others      a JSON list of the values that aren't strings (None, booleans,
+                numbers, and any lists or dicts found in unknown fields)
+    counts      the number of fields in each connection
+    fields      a (key, value) pair of table positions for each field
+
+The table is the strings followed by the others, and every string is stored
+once, so the field names and the protocols, users and key files shared by
+many connections take four bytes per use instead of their full JSON text.
+"""
+import sys
+import json
+import struct
+from array import array
+from itertools import accumulate
+from connection import Connection
+
+MAGIC = b'NUTTY'
+VERSION = 1
+HEADER = struct.Struct('<5I')
+# Table references to non-string values are offset by this until the string count is known
+_OTHER = 1 << 31
+
+
+def _uint32s(values):
+    data = array('I', values)
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return data.tobytes()
+
+
+def _read_uint32s(data, start, count):
+    values = array('I')
+    values.frombytes(data[start:start + 4 * count])
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def is_binary_snapshot(data):
+    return data.startswith(MAGIC)
+
+
+def encode_connections(connections):
+    """Return the version 1 payload for a list of connections or plain dicts."""
+    strings = {}
+    intern = strings.setdefault
+    others = []
+    # Keyed by type as well, since True == 1 and False == 0
+    other_positions = {}
+    counts = []
+    fields = []
+    append = fields.append
+    for connection in connections:
+        record = connection.to_dict() if isinstance(connection, Connection) else connection
+        counts.append(len(record))
+        for key, value in record.items():
+            append(intern(key, len(strings)))
+            if type(value) is str:
+                append(intern(value, len(strings)))
+            elif value is None or type(value) in (bool, int, float):
+                position = other_positions.get((type(value), value))
+                if position is None:
+                    position = other_positions[(type(value), value)] = _OTHER + len(others)
+                    others.append(value)
+                append(position)
+            else:
+                # Never shared, so editing one connection's list can't change another's
+                append(_OTHER + len(others))
+                others.append(value)
+
+    string_count = len(strings)
+    fields = [position - _OTHER + string_count if position >= _OTHER else position for position in fields]
+    text = ''.join(strings).encode('utf-8', 'surrogatepass')
+    other_data = json.dumps(others).encode()
+    return b''.join((
+        HEADER.pack(string_count, len(text), len(other_data), len(counts), len(fields) // 2),
+        _uint32s(map(len, strings)),
+        text,
+        other_data,
+        _uint32s(counts),
+        _uint32s(fields),
+    ))
+
+
+def decode_connections(data, version=VERSION):
+    """Return the Connection records held in a payload written by encode_connections()."""
+    if version != VERSION:
+        raise ValueError(f"Unsupported connection snapshot version {version}")
+    data = memoryview(data)
+    string_count, text_length, other_length, connection_count, field_count = HEADER.unpack_from(data)
+    position = HEADER.size
+    lengths = _read_uint32s(data, position, string_count)
+    position += 4 * string_count
+    text = bytes(data[position:position + text_length]).decode('utf-8', 'surrogatepass')
+    position += text_length
+    others = json.loads(bytes(data[position:position + other_length]))
+    position += other_length
+    counts = _read_uint32s(data, position, connection_count)
+    position += 4 * connection_count
+    fields = _read_uint32s(data, position, 2 * field_count)
+
+    offsets = list(accumulate(lengths, initial=0))
+    table = [text[start:end] for start, end in zip(offsets, offsets[1:])]
+    table.extend(others)
+    values = [table[index] for index in fields]
+
+    connections = []
+    start = 0
+    for count in counts:
+        end = start + 2 * count
+        connections.append(Connection.from_pairs(values[start:end:2], values[start + 1:end:2]))
+        start = end
+    return connections
@@ -0,0 +1,357 @@
+import os
+import glob
+import json
+import getpass
+import hashlib
+import logging
+import re
+import itertools
+import threading
+from fnmatch import translate
+from config import CACHE_DIR
+from writer import atomic_write
+
+SSH_CONFIG_FILE = os.path.expanduser('~/.ssh/config')
+SSH_IMPORT_STATE_FILE = os.path.join(CACHE_DIR, 'ssh_import.json')
+# Marks connections that mirror a Host entry; only these are ever changed by a sync
+IMPORT_SOURCE = 'ssh_config'
+# Fields a sync sets from the Host entry; everything else on the connection is the user's
+IMPORTED_FIELDS = frozenset((
+    'name', 'username', 'domain', 'protocol', 'x11', 'description', 'use_identity_file',
+    'identity_file', 'port', 'ssh_alias', 'source', 'import_hash',
+))
+# ssh itself refuses to nest Include deeper than this
+MAX_INCLUDE_DEPTH = 16
+DEFAULT_SYNC_INTERVAL = 5
+# The sync thread and the GUI thread both rewrite the state file
+_state_lock = threading.Lock()
+
+
+def read_state(state_file=SSH_IMPORT_STATE_FILE):
+    try:
+        with open(state_file, 'r') as f:
+            state = json.load(f)
+        return state if isinstance(state, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_state(state_file, state):
+    try:
+        os.makedirs(os.path.dirname(state_file), exist_ok=True)
+        atomic_write(state_file, json.dumps(state).encode())
+    except OSError as e:
+        logging.warning(f"Could not save SSH import state: {str(e)}")
+
+
+def update_state(state_file=SSH_IMPORT_STATE_FILE, **changes):
+    with _state_lock:
+        state = read_state(state_file)
+        state.update(changes)
+        _write_state(state_file, state)
+
+
+def forget_hosts(connections, state_file=SSH_IMPORT_STATE_FILE):
+    """Remember imported connections the user deleted, so imports skip them.
+
+    Each alias is kept with the import hash it was deleted at; it comes back
+    once its Host entry changes.
+    """
+    deleted = {connection['ssh_alias']: connection.get('import_hash') for connection in connections
+               if connection.get('source') == IMPORT_SOURCE and connection.get('ssh_alias')}
+    if deleted:
+        with _state_lock:
+            state = read_state(state_file)
+            state['deleted'] = dict(state.get('deleted') or {}, **deleted)
+            _write_state(state_file, state)
+
+
+class HostBlock:
+    """One Host section: its patterns and the options set inside it, first value wins."""
+
+    __slots__ = ('patterns', 'options', 'source', 'line', 'serial', '_matchers')
+    # Unique for the life of the process, unlike id(), so it can key caches
+    serials = itertools.count()
+
+    def __init__(self, patterns, source, line):
+        self.serial = next(HostBlock.serials)
+        self.patterns = patterns
+        self.options = {}
+        self.source = source
+        self.line = line
+        self._matchers = None
+
+    def matches(self, alias):
+        # Most patterns are plain host names; only real globs pay for a regex
+        if self._matchers is None:
+            self._matchers = [(pattern.startswith('!'), pattern_matcher(pattern.lstrip('!'))) for pattern in self.patterns]
+        matched = False
+        for negated, matcher in self._matchers:
+            if matcher(alias):
+                if negated:
+                    return False
+                matched = True
+        return matched
+
+    def aliases(self):
+        """Patterns naming a single host, the ones that become connections."""
+        return [pattern for pattern in self.patterns
+                if not pattern.startswith('!') and '*' not in pattern and '?' not in pattern]
+
+
+class Include:
+    __slots__ = ('patterns',)
+
+    def __init__(self, patterns):
+        self.patterns = patterns
+
+
+def pattern_matcher(pattern):
+    if '*' not in pattern and '?' not in pattern:
+        return pattern.__eq__
+    return re.compile(translate(pattern)).match
+
+
+def split_arguments(value):
+    """Split an option value on whitespace, honouring double quotes."""
+    if '"' not in value:
+        return value.split()
+    arguments = []
+    for position, part in enumerate(value.split('"')):
+        if position % 2:
+            arguments.append(part)
+        else:
+            arguments.extend(part.split())
+    return arguments
+
+
+def parse_file(path):
+    """Read one config file line by line into HostBlocks and Include markers.
+
+    Options before the first Host line go into a block matching every host, as
+    they do for ssh. Match sections can't be evaluated here, so their options
+    are skipped.
+    """
+    entries = []
+    block = HostBlock(['*'], path, 0)
+    entries.append(block)
+    with open(path, 'r', errors='replace') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line[0] == '#':
+                continue
+            parts = line.split(None, 1)
+            keyword = parts[0]
+            value = parts[1] if len(parts) > 1 else ''
+            if '=' in keyword:
+                keyword, _, rest = keyword.partition('=')
+                value = f"{rest} {value}".strip()
+            elif value.startswith('='):
+                value = value[1:].strip()
+            keyword = keyword.lower()
+
+            if keyword == 'host':
+                block = HostBlock([pattern.lower() for pattern in split_arguments(value)], path, line_number)
+                entries.append(block)
+            elif keyword == 'match':
+                block = None
+            elif keyword == 'include':
+                entries.append(Include(split_arguments(value)))
+            elif block is not None and keyword not in block.options:
+                block.options[keyword] = value.strip('"')
+    return entries
+
+
+def resolve_include(pattern, base_dir):
+    pattern = os.path.expanduser(pattern)
+    if not os.path.isabs(pattern):
+        pattern = os.path.join(base_dir, pattern)
+    return sorted(glob.glob(pattern))
+
+
+class SshConfigImporter:
+    """Turns ~/.ssh/config, with its Include files, into nuTTY connection records.
+
+    Parsed files are kept per path together with their mtime and size, so a
+    re-import only re-reads files that changed. Every record carries a hash of
+    its effective options, which lets the controller touch only the
+    connections whose Host entry actually changed.
+    """
+
+    def __init__(self, path=SSH_CONFIG_FILE, state_file=SSH_IMPORT_STATE_FILE):
+        self.path = path
+        self.state_file = state_file
+        # path -> ((mtime_ns, size), entries)
+        self.parsed = {}
+        # alias -> (serials of the blocks that applied, record); unchanged hosts reuse their record
+        self.cached_records = {}
+        self.user = getpass.getuser()
+        self.home = os.path.expanduser('~')
+        # Files and Include directories seen by the last import, with their stats
+        self.watched = self.load_state()
+
+    def load_state(self):
+        try:
+            return {path: tuple(stat) if stat else None for path, stat in read_state(self.state_file).get('watched', {}).items()}
+        except (TypeError, AttributeError):
+            return {}
+
+    def save_state(self):
+        update_state(self.state_file, watched=self.watched)
+
+    def skip_deleted(self, records, restore=False):
+        """Drop records for hosts the user deleted whose Host entry hasn't changed since."""
+        deleted = read_state(self.state_file).get('deleted', {})
+        if not isinstance(deleted, dict) or not deleted:
+            return records
+        kept = {} if restore else {alias: import_hash for alias, import_hash in deleted.items()
+                                   if alias in records and records[alias]['import_hash'] == import_hash}
+        if kept != deleted:
+            update_state(self.state_file, deleted=kept)
+        return {alias: record for alias, record in records.items() if alias not in kept}
+
+    @staticmethod
+    def stat_key(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def changed(self):
+        """Whether any config file, or a directory an Include glob looks in, changed."""
+        if not self.watched:
+            return True
+        return any(self.stat_key(path) != stat for path, stat in self.watched.items())
+
+    def entries_for(self, path):
+        stat = self.stat_key(path)
+        self.watched[path] = stat
+        cached = self.parsed.get(path)
+        if cached and cached[0] == stat:
+            return cached[1]
+        entries = parse_file(path)
+        self.parsed[path] = (stat, entries)
+        return entries
+
+    def blocks(self, path=None, depth=0):
+        """Yield every HostBlock in file order, expanding Include where it appears."""
+        path = path or self.path
+        for entry in self.entries_for(path):
+            if isinstance(entry, HostBlock):
+                yield entry
+            elif depth < MAX_INCLUDE_DEPTH:
+                # Relative includes in the user config are relative to ~/.ssh
+                base_dir = os.path.dirname(self.path)
+                for pattern in entry.patterns:
+                    include_dir = os.path.dirname(os.path.join(base_dir, os.path.expanduser(pattern)))
+                    self.watched[include_dir] = self.stat_key(include_dir)
+                    for included in resolve_include(pattern, base_dir):
+                        if os.path.isfile(included):
+                            yield from self.blocks(included, depth + 1)
+            else:
+                logging.warning(f"Include nested too deeply in {path}")
+
+    def records(self, restore_deleted=False):
+        """Return {alias: connection record} for every concrete Host alias.
+
+        Hosts the user deleted are left out until their Host entry changes, or
+        until restore_deleted asks for them back.
+        """
+        if not os.path.exists(self.path):
+            self.watched = {self.path: None}
+            return self.skip_deleted({}, restore_deleted)
+        self.watched = {}
+        concrete = {}
+        wildcards = []
+        for position, block in enumerate(self.blocks()):
+            aliases = block.aliases()
+            # Pattern blocks without options, like each file's implicit leading one, add nothing
+            if (len(aliases) < len(block.patterns) or not aliases) and block.options:
+                wildcards.append((position, block))
+            for alias in aliases:
+                concrete.setdefault(alias, []).append((position, block))
+
+        records = {}
+        cached_records = {}
+        for alias, own_blocks in concrete.items():
+            applicable = [(position, block) for position, block in own_blocks if block.matches(alias)]
+            own_serials = {block.serial for _, block in own_blocks}
+            applicable.extend((position, block) for position, block in wildcards
+                              if block.serial not in own_serials and block.matches(alias))
+            applicable.sort(key=lambda item: item[0])
+            key = tuple(block.serial for _, block in applicable)
+            cached = self.cached_records.get(alias)
+            if cached and cached[0] == key:
+                record = cached[1]
+            else:
+                options = {}
+                for _, block in applicable:
+                    for keyword, value in block.options.items():
+                        options.setdefault(keyword, value)
+                record = self.make_record(alias, options, own_blocks[0][1])
+            records[alias] = record
+            cached_records[alias] = (key, record)
+        self.cached_records = cached_records
+        self.save_state()
+        return self.skip_deleted(records, restore_deleted)
+
+    def make_record(self, alias, options, block):
+        hostname = options.get('hostname', alias).replace('%h', alias).replace('%%', '%')
+        identity_file = options.get('identityfile')
+        record = {
+            'name': alias,
+            'username': options.get('user') or self.user,
+            'domain': hostname,
+            'protocol': 'SSH',
+            'x11': options.get('forwardx11', 'no').lower() == 'yes',
+            'description': f"Imported from {block.source.replace(self.home, '~', 1)}",
+            'use_identity_file': bool(identity_file),
+            'identity_file': os.path.expanduser(identity_file) if identity_file else None,
+            # Launches go through the alias so ssh still applies ProxyJump, Port and the rest
+            'ssh_alias': alias,
+            'source': IMPORT_SOURCE,
+        }
+        if options.get('port', '').isdigit():
+            record['port'] = int(options['port'])
+        # Values are plain str/int/bool/None, so repr is a stable and much cheaper digest input than JSON
+        record['import_hash'] = hashlib.sha256(repr(sorted(record.items())).encode()).hexdigest()
+        return record
+
+
+class SshConfigSync:
+    """Re-imports the SSH config on a background thread whenever its files change.
+
+    on_records receives the full {alias: record} mapping after each import that
+    found changed files; it runs on the sync thread.
+    """
+
+    def __init__(self, importer, on_records, interval=DEFAULT_SYNC_INTERVAL):
+        self.importer = importer
+        self.on_records = on_records
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self, force=True):
+        if self.thread is not None:
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, args=(force,), name="ssh-config-sync", daemon=True)
+        self.thread.start()
+
+    def run(self, force):
+        while not self.stop_event.is_set():
+            try:
+                if force or self.importer.changed():
+                    self.on_records(self.importer.records())
+                force = False
+            except Exception as e:
+                logging.error(f"Error importing SSH config: {str(e)}")
+            self.stop_event.wait(self.interval)
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(1.0)
+            self.thread = None
@@ -0,0 +1,46 @@
+import sys
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """Collects wall-clock timings for each startup phase.
+
+    Disabled profilers still run every phase but record nothing, so the same
+    startup code is used whether or not --startup-profile was passed.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.start = time.perf_counter()
+        self.phases = []
+        self.reported = False
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+        phase_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, phase_start - self.start, time.perf_counter() - phase_start))
+
+    def mark(self, name):
+        """Record a point in time, such as the window first being painted."""
+        if self.enabled:
+            self.phases.append((name, time.perf_counter() - self.start, 0.0))
+
+    def report(self, stream=None):
+        """Print the per-phase breakdown once."""
+        if not self.enabled or self.reported:
+            return
+        self.reported = True
+        stream = stream or sys.stderr
+        print("nuTTY startup profile", file=stream)
+        print(f"{'phase':<28}{'start ms':>10}{'took ms':>10}", file=stream)
+        for name, offset, duration in self.phases:
+            took = f"{duration * 1000:.1f}" if duration else "-"
+            print(f"{name:<28}{offset * 1000:>10.1f}{took:>10}", file=stream)
+        print(f"{'total':<28}{(time.perf_counter() - self.start) * 1000:>10.1f}", file=stream)
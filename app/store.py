@@ -0,0 +1,373 @@
+import json
+import os
+import base64
+import fcntl
+import threading
+import uuid
+import logging
+from contextlib import contextmanager
+from writer import atomic_write
+from tracing import span
+from connection import Connection, as_connection, connection_to_json
+import snapshot_format
+
+# Number of journal records after which the journal is folded into a new snapshot
+COMPACT_THRESHOLD = 200
+
+
+def new_connection_id():
+    return uuid.uuid4().hex
+
+
+class ConnectionStore:
+    """Encrypted connection storage made of a snapshot plus an append-only journal.
+
+    The snapshot is one Fernet token holding every connection in the compact binary
+    layout described in snapshot_format; a connections.dat still holding the older
+    base64 token of a JSON list is read as before and rewritten on first load. Every
+    change after that is appended to
+    connections.dat.journal as its own encrypted record, so an edit costs one record
+    instead of re-encrypting the whole list. Once the journal grows past
+    compact_threshold records it is folded into a fresh snapshot. Passwords live in a
+    separately encrypted 'secret' field per connection and are decrypted on demand.
+    Loaded connections come back as Connection records; journal records stay
+    small JSON objects.
+
+    put() and delete() only queue a record; flush_pending() appends everything queued
+    with a single write and fsync, so it can be run from a background writer.
+
+    Other processes may share the files, e.g. a second nuTTY or the nutty CLI.
+    Writers hold an exclusive flock on connections.dat.lock and readers a shared
+    one. The store remembers what the files looked like when it last read or wrote
+    them: changed_on_disk() notices anyone else's writes, and read_changes() turns
+    them into per-connection changes. A compaction is skipped while there are
+    outside changes it hasn't seen, so it never drops them.
+    """
+
+    def __init__(self, path, cipher_suite, compact_threshold=COMPACT_THRESHOLD):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.old_journal_path = f"{path}.journal.old"
+        self.lock_path = f"{path}.lock"
+        self.cipher_suite = cipher_suite
+        self.compact_threshold = compact_threshold
+        self.journal_length = 0
+        self._needs_compaction = False
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._journal_lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._compaction_thread = None
+        # (snapshot identity, journal size) as of our own last read or write; a new
+        # store expects no files, so it can't compact over ones it never read
+        self._synced_state = (None, 0)
+
+    @contextmanager
+    def _file_lock(self, exclusive=True):
+        """Hold the cross-process lock; take it before any of the thread locks."""
+        fd = self._acquire_file_lock(exclusive)
+        try:
+            yield
+        finally:
+            os.close(fd)
+
+    def _acquire_file_lock(self, exclusive=True, blocking=True):
+        """Return a descriptor holding the lock, or None if blocking is off and it is taken."""
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        operation = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        try:
+            fcntl.flock(fd, operation if blocking else operation | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        except BaseException:
+            os.close(fd)
+            raise
+        return fd
+
+    def _disk_state(self):
+        try:
+            stat = os.stat(self.path)
+            snapshot = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            snapshot = None
+        try:
+            journal_size = os.path.getsize(self.journal_path)
+        except FileNotFoundError:
+            journal_size = 0
+        return snapshot, journal_size
+
+    def changed_on_disk(self):
+        """Whether another process wrote the store since we last read or wrote it."""
+        with self._journal_lock:
+            return self._disk_state() != self._synced_state
+
+    def load(self):
+        """Load the snapshot and replay the journal on top of it."""
+        with self._file_lock(exclusive=False), self._journal_lock:
+            connections, self._synced_state = self._read()
+            return connections
+
+    def _read(self):
+        """Read every connection on disk; returns (connections, disk state). Needs the file lock."""
+        connections = {}
+        self._needs_compaction = False
+        snapshot = self._disk_state()[0]
+
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                encrypted_data = f.read()
+            if snapshot_format.is_binary_snapshot(encrypted_data):
+                version = encrypted_data[len(snapshot_format.MAGIC)]
+                token = base64.urlsafe_b64encode(encrypted_data[len(snapshot_format.MAGIC) + 1:])
+                with span("store.decrypt"):
+                    data = self.cipher_suite.decrypt(token)
+                with span("store.parse"):
+                    data = snapshot_format.decode_connections(data, version)
+            else:
+                with span("store.decrypt"):
+                    data = self.cipher_suite.decrypt(encrypted_data)
+                with span("store.parse"):
+                    data = json.loads(data)
+                # Rewrite the JSON snapshot of older versions in the binary format
+                self._needs_compaction = True
+            for connection in data:
+                if not connection.get('id'):
+                    # Connections saved before the journal existed have no id yet
+                    connection['id'] = new_connection_id()
+                    self._needs_compaction = True
+                if 'password' in connection:
+                    # Older stores kept passwords in plaintext inside the snapshot
+                    self.seal_secret(connection)
+                    self._needs_compaction = True
+                connections[connection['id']] = as_connection(connection)
+
+        # A leftover .old journal means a compaction was interrupted; replaying it is
+        # harmless because every record is idempotent
+        with span("store.replay"):
+            if os.path.exists(self.old_journal_path):
+                self._replay(self.old_journal_path, connections)
+                self._needs_compaction = True
+            self.journal_length, journal_size = self._replay(self.journal_path, connections)
+        if self.journal_length >= self.compact_threshold:
+            self._needs_compaction = True
+
+        return [connection for connection in connections.values() if connection is not None], (snapshot, journal_size)
+
+    def read_changes(self, connections):
+        """Return ({id: connection, or None if deleted}, disk state) for outside writes.
+
+        connections is what the caller currently shows, and must not change while
+        this runs. When only the journal grew, just the new records are read;
+        otherwise everything is reloaded and compared. Safe to call off the GUI
+        thread; pass the returned state to mark_synced() once the changes are applied.
+        """
+        with self._file_lock(exclusive=False), self._journal_lock:
+            state = self._disk_state()
+            synced = self._synced_state
+            if state == synced:
+                return {}, state
+            if state[0] == synced[0] and state[1] > synced[1]:
+                changes = {}
+                with span("store.replay"):
+                    count, journal_size = self._replay(self.journal_path, changes, start=synced[1])
+                self.journal_length += count
+                return changes, (state[0], journal_size)
+            loaded, state = self._read()
+
+        current = {connection['id']: connection for connection in connections}
+        changes = {}
+        for connection in loaded:
+            if current.pop(connection['id'], None) != connection:
+                changes[connection['id']] = connection
+        for connection_id in current:
+            changes[connection_id] = None
+        return changes, state
+
+    def mark_synced(self, state):
+        """Record that the caller now shows the store as it was in state."""
+        with self._journal_lock:
+            self._synced_state = state
+
+    def _replay(self, journal_path, connections, start=0):
+        """Apply the journal's records from byte offset start; returns (count, end offset)."""
+        if not os.path.exists(journal_path):
+            return 0, 0
+        from cryptography.fernet import InvalidToken
+        count = 0
+        good_length = start
+        with open(journal_path, 'rb') as f:
+            f.seek(start)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # A record torn by a crash mid-append; cut it off so the next
+                    # append starts on a clean line
+                    logging.warning(f"Dropping incomplete record at the end of {journal_path}")
+                    break
+                good_length += len(line)
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(self.cipher_suite.decrypt(line))
+                except (InvalidToken, ValueError):
+                    logging.warning(f"Skipping unreadable record in {journal_path}")
+                    continue
+                self._apply(record, connections)
+                count += 1
+        if good_length < os.path.getsize(journal_path):
+            os.truncate(journal_path, good_length)
+        return count, good_length
+
+    def _apply(self, record, connections):
+        if record.get('op') == 'put':
+            connection = record['connection']
+            if 'password' in connection:
+                self.seal_secret(connection)
+                self._needs_compaction = True
+            connections[connection['id']] = Connection.from_dict(connection)
+        elif record.get('op') == 'delete':
+            # Left as a marker so read_changes() can report the removal; load() drops it
+            connections[record['id']] = None
+
+    def seal_secret(self, connection):
+        """Replace a connection's plaintext password with its own encrypted token.
+
+        The token is only decrypted by reveal_secret(), so loading and listing
+        connections never puts passwords in memory in the clear.
+        """
+        password = connection.pop('password', None)
+        connection['secret'] = self.cipher_suite.encrypt(password.encode()).decode() if password else None
+        return connection
+
+    def reveal_secret(self, connection):
+        """Decrypt and return a connection's password, or None if it has none."""
+        secret = connection.get('secret')
+        if not secret:
+            return None
+        return self.cipher_suite.decrypt(secret.encode()).decode()
+
+    def put(self, connection):
+        """Queue the addition or update of a single connection."""
+        self._queue(connection['id'], {'op': 'put', 'connection': connection})
+
+    def delete(self, connection_id):
+        """Queue the removal of a single connection."""
+        self._queue(connection_id, {'op': 'delete', 'id': connection_id})
+
+    def _queue(self, connection_id, record):
+        # Serialize now so later changes to the caller's dict can't leak into the record.
+        # Records for different ids commute, so only the latest one per id is kept.
+        data = json.dumps(record, default=connection_to_json).encode()
+        with self._pending_lock:
+            self._pending[connection_id] = data
+
+    def has_pending(self):
+        with self._pending_lock:
+            return bool(self._pending)
+
+    def pending_ids(self):
+        with self._pending_lock:
+            return set(self._pending)
+
+    def flush_pending(self):
+        """Encrypt and append every queued record to the journal in one write."""
+        with self._pending_lock:
+            if not self._pending:
+                return
+            records = list(self._pending.values())
+            self._pending = {}
+        with span("store.append"):
+            self._append(records)
+
+    def _append(self, records):
+        tokens = b''.join(self.cipher_suite.encrypt(data) + b'\n' for data in records)
+        with self._file_lock(), self._journal_lock:
+            in_sync = self._disk_state() == self._synced_state
+            with open(self.journal_path, 'ab') as f:
+                f.write(tokens)
+                f.flush()
+                os.fsync(f.fileno())
+            self.journal_length += len(records)
+            # With outside records before ours, stay out of sync until read_changes() reads them
+            if in_sync:
+                self._synced_state = self._disk_state()
+
+    def needs_compaction(self):
+        return self._needs_compaction or self.journal_length >= self.compact_threshold
+
+    def compact(self, connections):
+        """Write connections as a new snapshot and drop the journal records it covers.
+
+        Returns False without writing if another process changed the store since
+        we last read it, as connections can't include its changes.
+        """
+        with self._compact_lock, self._file_lock():
+            if self.changed_on_disk():
+                return False
+            self._rotate_journal()
+            self._write_snapshot(connections)
+            return True
+
+    def compact_in_background(self, connections):
+        """Compact on a worker thread; connections must be a copy the caller won't mutate."""
+        if self._compaction_thread and self._compaction_thread.is_alive():
+            return
+        self._compact_lock.acquire()
+        # Another process writing, or changes we haven't read, put the compaction off
+        # until a later save instead of making the GUI thread wait
+        fd = self._acquire_file_lock(blocking=False)
+        if fd is None:
+            self._compact_lock.release()
+            return
+        # Rotate now, while connections still matches the journal, so any record appended
+        # while the snapshot is being written survives the compaction
+        try:
+            if self.changed_on_disk():
+                os.close(fd)
+                self._compact_lock.release()
+                return
+            self._rotate_journal()
+        except Exception:
+            os.close(fd)
+            self._compact_lock.release()
+            raise
+        self._compaction_thread = threading.Thread(target=self._write_snapshot_in_background, args=(connections, fd), daemon=True)
+        self._compaction_thread.start()
+
+    def _rotate_journal(self):
+        with self._journal_lock:
+            if os.path.exists(self.journal_path):
+                if os.path.exists(self.old_journal_path):
+                    with open(self.journal_path, 'rb') as src, open(self.old_journal_path, 'ab') as dst:
+                        dst.write(src.read())
+                    os.remove(self.journal_path)
+                else:
+                    os.replace(self.journal_path, self.old_journal_path)
+            self.journal_length = 0
+            self._needs_compaction = False
+            self._synced_state = self._disk_state()
+
+    def _write_snapshot(self, connections):
+        with span("store.snapshot"):
+            token = self.cipher_suite.encrypt(snapshot_format.encode_connections(connections))
+            # Stored as raw bytes; the token's own base64 would add a third to the file
+            encrypted_data = snapshot_format.MAGIC + bytes((snapshot_format.VERSION,)) + base64.urlsafe_b64decode(token)
+            atomic_write(self.path, encrypted_data)
+        if os.path.exists(self.old_journal_path):
+            os.remove(self.old_journal_path)
+        with self._journal_lock:
+            self._synced_state = self._disk_state()
+
+    def _write_snapshot_in_background(self, connections, lock_fd):
+        try:
+            self._write_snapshot(connections)
+        except Exception as e:
+            logging.error(f"Failed to compact connection store: {str(e)}")
+        finally:
+            os.close(lock_fd)
+            self._compact_lock.release()
+
+    def wait_for_compaction(self):
+        if self._compaction_thread:
+            self._compaction_thread.join()
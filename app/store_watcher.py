@@ -0,0 +1,79 @@
+import os
+import logging
+import threading
+from PyQt5.QtCore import QObject, QTimer, QFileSystemWatcher, pyqtSignal
+
+# Events arriving within this many ms of each other are handled with one check
+CHECK_DELAY = 250
+
+
+class StoreWatcher(QObject):
+    """Picks up changes other processes make to the connection store.
+
+    QFileSystemWatcher (inotify on Linux) watches the snapshot, the journal and
+    their directory, since compaction replaces files by renaming them. Our own
+    writes fire the same events, but the store can tell those apart, so only
+    outside writes lead to a read. The changes are read on a worker thread and
+    applied to the model on the GUI thread, row by row.
+    """
+    changes_read = pyqtSignal(object, object)
+
+    def __init__(self, controller, parent=None):
+        super().__init__(parent)
+        self.controller = controller
+        self.store = controller.store
+        self.reading = False
+        self.check_timer = QTimer(self)
+        self.check_timer.setSingleShot(True)
+        self.check_timer.setInterval(CHECK_DELAY)
+        self.check_timer.timeout.connect(self.check)
+        self.changes_read.connect(self.apply_changes)
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.check_timer.start)
+        self.watcher.fileChanged.connect(self.check_timer.start)
+        self.watcher.addPath(os.path.dirname(self.store.path))
+        self.watch_files()
+        # Anything written between loading the store and starting to watch it
+        self.check_timer.start()
+
+    def watch_files(self):
+        # A file replaced by rename drops out of the watcher, so add it back each time
+        watched = set(self.watcher.files())
+        for path in (self.store.path, self.store.journal_path):
+            if path not in watched and os.path.exists(path):
+                self.watcher.addPath(path)
+
+    def stop(self):
+        self.check_timer.stop()
+        self.watcher.removePaths(self.watcher.files() + self.watcher.directories())
+
+    def check(self):
+        self.watch_files()
+        if self.reading or not self.store.changed_on_disk():
+            return
+        self.reading = True
+        # A copy, since the model keeps changing on the GUI thread while this is read
+        connections = list(self.controller.connection_list_model.connections)
+        threading.Thread(target=self.read_changes, args=(connections,), name="store-watch", daemon=True).start()
+
+    def read_changes(self, connections):
+        try:
+            changes, state = self.store.read_changes(connections)
+        except Exception as e:
+            logging.error(f"Error reading connection store changes: {str(e)}")
+            changes, state = None, None
+        self.changes_read.emit(changes, state)
+
+    def apply_changes(self, changes, state):
+        self.reading = False
+        if changes is None:
+            # Wait for the next write rather than retrying a store we can't read in a loop
+            return
+        try:
+            self.controller.apply_store_changes(changes, state)
+        except Exception as e:
+            logging.error(f"Error applying connection store changes: {str(e)}")
+            return
+        # Writes that landed while we were reading
+        if self.store.changed_on_disk():
+            self.check_timer.start()
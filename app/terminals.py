@@ -0,0 +1,171 @@
+import os
+import json
+import shutil
+import hashlib
+import logging
+import threading
+from config import CONFIG_DIR, CACHE_DIR
+from writer import atomic_write
+
+# Extra emulators users can register without touching the code, e.g.
+# {"Foot": {"command": "foot", "args": ["-e", "bash", "-c"], "single_arg": true}}
+# An optional "tab_args" list opens sessions as tabs during bulk launches
+TERMINALS_FILE = os.path.join(CONFIG_DIR, 'terminals.json')
+TERMINALS_CACHE_FILE = os.path.join(CACHE_DIR, 'terminals.json')
+CACHE_VERSION = 1
+
+# name -> (command, args, use_single_arg)
+BUILTIN_TERMINALS = {
+    "XTerm": ("xterm", ["-hold", "-e"], False),
+    "GNOME Terminal": ("gnome-terminal", ["--", "bash", "-c"], True),
+    "Konsole": ("konsole", ["-e", "bash", "-c"], True),
+    "XFCE Terminal": ("xfce4-terminal", ["--hold", "-e"], True),
+    "LXTerminal": ("lxterminal", ["-e", "bash", "-c"], True),
+    "Tilix": ("tilix", ["-e", "bash", "-c"], True),
+    "Alacritty": ("alacritty", ["-e", "bash", "-c"], True),
+    "Kitty": ("kitty", ["bash", "-c"], True),
+    "URxvt": ("urxvt", ["-hold", "-e"], False),
+    "st": ("st", ["-e", "bash", "-c"], True),
+    "Eterm": ("eterm", ["-e", "bash", "-c"], True),
+    "Mate Terminal": ("mate-terminal", ["-e", "bash", "-c"], True)
+}
+
+# Arguments, placed right after the executable, that open a session as a tab in the
+# emulator's most recent window instead of a new window
+BUILTIN_TAB_ARGS = {
+    "GNOME Terminal": ["--tab"],
+    "Konsole": ["--new-tab"],
+    "XFCE Terminal": ["--tab"],
+    "Mate Terminal": ["--tab"],
+}
+
+
+def load_user_terminals(path=TERMINALS_FILE):
+    """Read user-registered emulators and their tab arguments, skipping malformed entries."""
+    try:
+        with open(path, 'r') as f:
+            entries = json.load(f)
+    except FileNotFoundError:
+        return {}, {}
+    except (OSError, ValueError) as e:
+        logging.warning(f"Ignoring {path}: {str(e)}")
+        return {}, {}
+
+    terminals = {}
+    tab_args = {}
+    for name, entry in entries.items() if isinstance(entries, dict) else ():
+        try:
+            command = entry['command']
+            args = list(entry.get('args', ["-e", "bash", "-c"]))
+            tabs = list(entry.get('tab_args', []))
+            if not isinstance(command, str) or not all(isinstance(arg, str) for arg in args + tabs):
+                raise TypeError("command, args and tab_args must be strings")
+            terminals[name] = (command, args, bool(entry.get('single_arg', True)))
+            if tabs:
+                tab_args[name] = tabs
+        except (KeyError, TypeError, AttributeError) as e:
+            logging.warning(f"Ignoring terminal '{name}' in {path}: {str(e)}")
+    return terminals, tab_args
+
+
+def path_fingerprint(path_env=None):
+    """Return the PATH entries with their directory mtimes.
+
+    Installing or removing a package touches the directory its binary lives in,
+    so an unchanged fingerprint means a rescan would find the same emulators.
+    """
+    fingerprint = []
+    for entry in (os.environ.get('PATH', '') if path_env is None else path_env).split(os.pathsep):
+        try:
+            mtime = os.stat(entry).st_mtime_ns
+        except OSError:
+            mtime = None
+        fingerprint.append([entry, mtime])
+    return fingerprint
+
+
+class TerminalRegistry:
+    """Known terminal emulators and which of them are installed.
+
+    Discovery results are cached on disk together with the PATH fingerprint and
+    the emulator table they were computed from; startup reuses them outright
+    when both still match and otherwise hands back the stale list while a
+    background rescan catches up.
+    """
+
+    def __init__(self, user_file=TERMINALS_FILE, cache_file=TERMINALS_CACHE_FILE):
+        self.user_file = user_file
+        self.cache_file = cache_file
+        user_terminals, user_tab_args = load_user_terminals(user_file)
+        self.terminals = dict(BUILTIN_TERMINALS)
+        self.terminals.update(user_terminals)
+        self.tab_args = dict(BUILTIN_TAB_ARGS)
+        self.tab_args.update(user_tab_args)
+        self.refresh_thread = None
+
+    def table_hash(self):
+        return hashlib.sha256(json.dumps(self.terminals, sort_keys=True).encode()).hexdigest()
+
+    def scan(self):
+        """Look every known emulator up on PATH."""
+        return {name: terminal for name, terminal in self.terminals.items() if shutil.which(terminal[0])}
+
+    def read_cache(self):
+        """Return (found, fresh), or (None, False) without a usable cache."""
+        try:
+            with open(self.cache_file, 'r') as f:
+                cache = json.load(f)
+            if cache.get('version') != CACHE_VERSION:
+                return None, False
+            found = {name: (command, args, use_single_arg) for name, (command, args, use_single_arg) in cache['found'].items()}
+        except (OSError, ValueError, KeyError, TypeError):
+            return None, False
+        fresh = cache.get('table') == self.table_hash() and cache.get('path') == path_fingerprint()
+        return found, fresh
+
+    def write_cache(self, found, fingerprint):
+        cache = {'version': CACHE_VERSION, 'table': self.table_hash(), 'path': fingerprint, 'found': found}
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            atomic_write(self.cache_file, json.dumps(cache).encode())
+        except OSError as e:
+            logging.warning(f"Could not cache terminal emulators: {str(e)}")
+
+    def rescan(self):
+        """Scan PATH and update the cache."""
+        # Taken before scanning, so a package installed mid-scan still invalidates the cache
+        fingerprint = path_fingerprint()
+        found = self.scan()
+        self.write_cache(found, fingerprint)
+        return found
+
+    def discover(self, on_refresh=None):
+        """Return the installed emulators, scanning only when there's nothing cached.
+
+        When the cache is stale its contents are returned at once and a rescan
+        runs on a background thread, passing its result to on_refresh.
+        """
+        found, fresh = self.read_cache()
+        if found is None:
+            return self.rescan()
+        if not fresh:
+            self.refresh_in_background(on_refresh)
+        return found
+
+    def refresh_in_background(self, on_refresh=None):
+        def run():
+            try:
+                found = self.rescan()
+            except Exception as e:
+                logging.error(f"Error scanning for terminal emulators: {str(e)}")
+                return
+            if on_refresh:
+                on_refresh(found)
+
+        self.refresh_thread = threading.Thread(target=run, name="terminal-scan", daemon=True)
+        self.refresh_thread.start()
+
+
+def find_terminals():
+    """Return the installed emulators, bypassing the cache."""
+    return TerminalRegistry().scan()
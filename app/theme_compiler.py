@@ -0,0 +1,96 @@
+import os
+import json
+import hashlib
+from config import CACHE_DIR
+from writer import atomic_write
+
+# Bump whenever compile_theme's output changes so stale cache entries are ignored
+COMPILER_VERSION = 3
+QSS_CACHE_DIR = os.path.join(CACHE_DIR, 'qss')
+
+# Object names the compiled selectors are scoped to, so dialogs and combo box popups
+# keep their default look just like when styles were set per widget
+CONNECTION_LIST = "QTreeView#connectionList"
+CONNECTION_SEARCH = "QLineEdit#connectionSearch"
+MAIN_BUTTONS = "QWidget#mainContent QPushButton"
+
+# Longest prefixes first; each theme key lands in the first rule whose prefix it has
+RULE_PREFIXES = (
+    ("list_view_item_selected_", f"{CONNECTION_LIST}::item:selected"),
+    ("list_view_item_", f"{CONNECTION_LIST}::item"),
+    ("list_view_", CONNECTION_LIST),
+    ("button_hover_", f"{MAIN_BUTTONS}:hover"),
+    ("button_pressed_", f"{MAIN_BUTTONS}:pressed"),
+    ("button_disabled_", f"{MAIN_BUTTONS}:disabled"),
+    ("button_", MAIN_BUTTONS),
+    ("window_", "QMainWindow"),
+)
+
+# Colours the item delegate paints itself; they aren't valid QSS properties
+DELEGATE_ONLY_SUFFIXES = ("name_color", "info_color", "desc_color", "description_color",
+                          "status_up_color", "status_down_color", "status_timeout_color", "status_unknown_color")
+
+
+def theme_hash(theme_data):
+    """Return the hash of the theme's styles.json, or of its data if it wasn't loaded from disk."""
+    return theme_data.get('_hash') or hashlib.sha256(json.dumps(theme_data, sort_keys=True).encode()).hexdigest()
+
+
+def compile_theme(theme_data):
+    """Turn a styles.json dict into one QSS document in a single pass over its keys."""
+    rules = {selector: [] for _, selector in RULE_PREFIXES}
+    for key, value in theme_data.items():
+        if key.endswith(DELEGATE_ONLY_SUFFIXES):
+            continue
+        for prefix, selector in RULE_PREFIXES:
+            if key.startswith(prefix):
+                prop = key[len(prefix):]
+                if key == "window_background-image":
+                    rules[selector].append(f"background-image: {value}")
+                    rules[selector].append("background-position: center")
+                    rules[selector].append("background-repeat: no-repeat")
+                    rules[selector].append("background-attachment: fixed")
+                else:
+                    rules[selector].append(f"{prop}: {value}")
+                break
+
+    background = theme_data.get('global_background-color', '#000000')
+    color = theme_data.get('global_color', '#00ff00')
+    border = theme_data.get('menu_border', '1px solid #00ff00')
+    selected_background = theme_data.get('list_view_item_selected_background-color', 'rgba(0, 80, 0, 200)')
+
+    rules["QMenuBar"] = [f"background-color: {background}", f"color: {color}", f"border-bottom: {border}"]
+    rules["QMenuBar::item"] = ["background-color: transparent"]
+    rules["QMenuBar::item:selected"] = [f"background-color: {selected_background}"]
+    rules["QMenuBar QMenu"] = [f"background-color: {background}", f"color: {color}", f"border: {border}"]
+    rules["QMenuBar QMenu::item"] = ["background-color: transparent"]
+    rules["QMenuBar QMenu::item:selected"] = [f"background-color: {selected_background}"]
+
+    rules[CONNECTION_SEARCH] = [
+        f"background-color: {theme_data.get('list_view_item_background-color', theme_data.get('global_background-color', '#ffffff'))}",
+        f"color: {theme_data.get('global_color', '#000000')}",
+        f"border: {theme_data.get('list_view_border', '1px solid #d0d0d0')}",
+        f"border-radius: {theme_data.get('button_border-radius', '0px')}",
+        "padding: 4px",
+    ]
+
+    return "\n".join(f"{selector} {{ {'; '.join(declarations)}; }}"
+                     for selector, declarations in rules.items() if declarations) + "\n"
+
+
+def compiled_stylesheet(theme_data):
+    """Return the theme's QSS, compiling it only if it isn't already cached on disk."""
+    cache_file = os.path.join(QSS_CACHE_DIR, f"{theme_hash(theme_data)}-v{COMPILER_VERSION}.qss")
+    try:
+        with open(cache_file, 'r') as f:
+            return f.read()
+    except OSError:
+        pass
+    stylesheet = compile_theme(theme_data)
+    try:
+        os.makedirs(QSS_CACHE_DIR, exist_ok=True)
+        atomic_write(cache_file, stylesheet.encode())
+    except OSError:
+        # A read-only cache only costs us a recompile next time
+        pass
+    return stylesheet
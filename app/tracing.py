@@ -0,0 +1,158 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+
+# Histogram bucket upper bounds in microseconds, doubling from 1 µs to about 67 s
+BUCKET_BOUNDS = [2 ** i for i in range(27)]
+# Spans kept for the Chrome trace export; the oldest are dropped first
+MAX_EVENTS = 100_000
+
+
+class Histogram:
+    """Count, total, extremes and log-scale buckets for one span name."""
+
+    __slots__ = ('count', 'total', 'min', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+
+    def record(self, duration_ns):
+        self.count += 1
+        self.total += duration_ns
+        if self.min is None or duration_ns < self.min:
+            self.min = duration_ns
+        if duration_ns > self.max:
+            self.max = duration_ns
+        # Bucket i holds durations below 2**i µs; bit_length finds it without a search
+        self.buckets[min((duration_ns // 1000).bit_length(), len(BUCKET_BOUNDS))] += 1
+
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    def percentile(self, fraction):
+        """Approximate percentile in nanoseconds: the upper bound of the bucket it falls in."""
+        if not self.count:
+            return 0
+        wanted = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= wanted:
+                bound = BUCKET_BOUNDS[index] * 1000 if index < len(BUCKET_BOUNDS) else self.max
+                return min(bound, self.max)
+        return self.max
+
+    def copy(self):
+        histogram = Histogram()
+        histogram.count, histogram.total, histogram.min, histogram.max = self.count, self.total, self.min, self.max
+        histogram.buckets = list(self.buckets)
+        return histogram
+
+
+class NullSpan:
+    """What span() hands out while tracing is off; entering and leaving it does nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    __slots__ = ('tracer', 'name', 'start')
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, self.start, time.perf_counter_ns())
+        return False
+
+
+class Tracer:
+    """Times named spans on the hot paths and aggregates them in memory.
+
+    While disabled, span() returns a shared no-op context manager, so
+    instrumented code pays one attribute check per span. While enabled, each
+    span adds to its name's histogram and to a bounded list of recent events
+    that can be exported in Chrome's trace format (chrome://tracing, Perfetto).
+    """
+
+    def __init__(self, enabled=False, max_events=MAX_EVENTS):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.events = deque(maxlen=max_events)
+        self.thread_names = {}
+        self.origin = time.perf_counter_ns()
+
+    def span(self, name):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name)
+
+    def record(self, name, start, end):
+        thread_id = threading.get_ident()
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.record(end - start)
+            self.events.append((name, start, end - start, thread_id))
+            if thread_id not in self.thread_names:
+                self.thread_names[thread_id] = threading.current_thread().name
+
+    def snapshot(self):
+        """Return {name: Histogram} copies that are safe to read while spans keep arriving."""
+        with self.lock:
+            return {name: histogram.copy() for name, histogram in self.histograms.items()}
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.events.clear()
+            self.origin = time.perf_counter_ns()
+
+    def chrome_trace(self):
+        """Return the recorded spans as a Chrome trace event dictionary."""
+        pid = os.getpid()
+        with self.lock:
+            events = list(self.events)
+            thread_names = dict(self.thread_names)
+            origin = self.origin
+        trace_events = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': thread_id, 'args': {'name': name}}
+            for thread_id, name in thread_names.items()
+        ]
+        trace_events.extend(
+            {'name': name, 'ph': 'X', 'pid': pid, 'tid': thread_id,
+             'ts': (start - origin) / 1000, 'dur': duration / 1000}
+            for name, start, duration, thread_id in events
+        )
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+
+
+# Shared by every module; NUTTY_TRACE=1 turns it on before the config is read
+tracer = Tracer(enabled=os.environ.get('NUTTY_TRACE') == '1')
+span = tracer.span
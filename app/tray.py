@@ -1,9 +1,24 @@
+from collections import defaultdict, deque
 from PyQt5.QtWidgets import QSystemTrayIcon, QMenu, QAction
 from PyQt5.QtGui import QIcon
 from PyQt5.QtCore import QObject, pyqtSignal
+from tracing import span
+
+# Submenus with more entries than this are split further by the next letter of the name
+MAX_GROUP_ITEMS = 50
+RECENT_LIMIT = 10
+
+
+def group_key(connection, length=1):
+    """Return the first letters of a connection's name, used to group the tray menu."""
+    name = (connection.get('name') or '').upper()
+    key = name[:length]
+    return key if key[:1].isalnum() else '#'
+
 
 class TrayManager(QObject):
-    connect_to_server_signal = pyqtSignal(int)
+    # Carries the connection id; ids stay valid when rows shift, row numbers don't
+    connect_to_server_signal = pyqtSignal(str)
     show_window_signal = pyqtSignal()
     exit_app_signal = pyqtSignal()
 
@@ -11,19 +26,36 @@ class TrayManager(QObject):
         super().__init__(parent)
         self.parent = parent
         self.connection_model = connection_model
+        self.recent_ids = deque(maxlen=RECENT_LIMIT)
+        # letter -> ids, kept in step with the model through its signals
+        self.group_ids = defaultdict(set)
+        self.group_of = {}
+        self.group_menus = {}
+        self.dirty_groups = set()
+        self.groups_changed = True
         self.tray_icon = self.setup_tray_icon()
 
+        # Not the row signals, which only cover rows a view has fetched
+        connection_model.connections_added.connect(self.on_connections_added)
+        connection_model.connections_removed.connect(self.on_connections_removed)
+        connection_model.connection_updated.connect(self.on_connection_updated)
+        connection_model.modelReset.connect(self.update_tray_connections)
+
     def setup_tray_icon(self):
         tray_icon = QSystemTrayIcon(QIcon("assets/icons/nuTTY_64x64_dark.png"), self.parent)
         tray_icon.setToolTip("nuTTY SSH Manager")
 
         # Create the tray menu
         tray_menu = QMenu()
-        
-        # Add dynamic list of connections
+
+        # Connections are grouped into submenus that are only filled in when opened
         self.connections_menu = QMenu("Connections", self.parent)
+        self.connections_menu.aboutToShow.connect(self.sync_group_menus)
         tray_menu.addMenu(self.connections_menu)
-        
+
+        self.recent_menu = QMenu("Recent", self.parent)
+        self.recent_menu.aboutToShow.connect(self.populate_recent_menu)
+
         # Add separator
         tray_menu.addSeparator()
 
@@ -31,7 +63,7 @@ class TrayManager(QObject):
         restore_action = QAction("Restore", self.parent)
         restore_action.triggered.connect(self.show_window_signal.emit)
         tray_menu.addAction(restore_action)
-        
+
         # Exit action
         exit_action = QAction("Exit", self.parent)
         exit_action.triggered.connect(self.exit_app_signal.emit)
@@ -41,22 +73,135 @@ class TrayManager(QObject):
         tray_icon.activated.connect(self.tray_icon_activated)
         tray_icon.show()
 
-        # Initial update of connections
+        # Initial grouping of connections
         self.update_tray_connections()
 
         return tray_icon
 
     def update_tray_connections(self):
-        """Dynamically populate the connections submenu with a list of connections."""
+        """Regroup every connection; the submenus are rebuilt the next time they open."""
+        with span("tray.rebuild"):
+            self.group_ids.clear()
+            self.group_of.clear()
+            # Use the full list; rowCount() only covers rows the list view has fetched so far
+            for connection in self.connection_model.connections:
+                self.place_connection(connection)
+        self.dirty_groups.update(self.group_menus)
+        self.groups_changed = True
+
+    def place_connection(self, connection):
+        connection_id = connection['id']
+        key = group_key(connection)
+        old_key = self.group_of.get(connection_id)
+        if old_key is not None and old_key != key:
+            self.forget_connection(connection_id)
+        if old_key != key:
+            self.groups_changed = self.groups_changed or not self.group_ids[key]
+            self.group_ids[key].add(connection_id)
+            self.group_of[connection_id] = key
+        self.dirty_groups.add(key)
+
+    def forget_connection(self, connection_id):
+        key = self.group_of.pop(connection_id, None)
+        if key is None:
+            return
+        self.group_ids[key].discard(connection_id)
+        if not self.group_ids[key]:
+            del self.group_ids[key]
+            self.groups_changed = True
+        self.dirty_groups.add(key)
+
+    def on_connections_added(self, connections):
+        for connection in connections:
+            self.place_connection(connection)
+
+    def on_connections_removed(self, connections):
+        for connection in connections:
+            self.forget_connection(connection['id'])
+
+    def on_connection_updated(self, previous, connection):
+        if previous['id'] != connection['id']:
+            self.forget_connection(previous['id'])
+        self.place_connection(connection)
+
+    def sync_group_menus(self):
+        """Add and drop letter submenus to match the current groups."""
+        if not self.groups_changed:
+            return
         self.connections_menu.clear()
-
-        # Loop through the model and add each connection as an action in the connections submenu
-        for row in range(self.connection_model.rowCount()):
-            connection = self.connection_model.get_connection(row)
-
-            connection_action = QAction(f"{connection['name']} - {connection['domain']}", self.parent)
-            connection_action.triggered.connect(lambda checked, row=row: self.connect_to_server_signal.emit(row))
-            self.connections_menu.addAction(connection_action)
+        self.connections_menu.addMenu(self.recent_menu)
+        self.connections_menu.addSeparator()
+        for key in list(self.group_menus):
+            if key not in self.group_ids:
+                self.group_menus.pop(key).deleteLater()
+        for key in sorted(self.group_ids):
+            menu = self.group_menus.get(key)
+            if menu is None:
+                menu = QMenu(key, self.parent)
+                menu.aboutToShow.connect(lambda key=key: self.populate_group_menu(key))
+                self.group_menus[key] = menu
+                self.dirty_groups.add(key)
+            self.connections_menu.addMenu(menu)
+        self.groups_changed = False
+
+    def populate_group_menu(self, key):
+        if key not in self.dirty_groups:
+            return
+        self.dirty_groups.discard(key)
+        with span("tray.populate"):
+            menu = self.group_menus[key]
+            self.clear_menu(menu)
+            connections = [self.connection_by_id(connection_id) for connection_id in self.group_ids.get(key, ())]
+            self.fill_menu(menu, [connection for connection in connections if connection], len(key))
+
+    def fill_menu(self, menu, connections, prefix_length):
+        connections.sort(key=lambda connection: (connection.get('name') or '').lower())
+        if len(connections) <= MAX_GROUP_ITEMS or prefix_length >= 3:
+            for connection in connections:
+                menu.addAction(self.create_connection_action(connection, menu))
+            return
+
+        # Too many for one menu: split by a longer name prefix, again filled lazily
+        subgroups = defaultdict(list)
+        for connection in connections:
+            subgroups[group_key(connection, prefix_length + 1)].append(connection)
+        for key in sorted(subgroups):
+            submenu = menu.addMenu(f"{key}... ({len(subgroups[key])})")
+            submenu.aboutToShow.connect(
+                lambda submenu=submenu, members=subgroups[key]: self.populate_subgroup_menu(submenu, members, prefix_length + 1))
+
+    def populate_subgroup_menu(self, menu, connections, prefix_length):
+        if menu.isEmpty():
+            self.fill_menu(menu, connections, prefix_length)
+
+    def populate_recent_menu(self):
+        self.clear_menu(self.recent_menu)
+        for connection_id in reversed(self.recent_ids):
+            connection = self.connection_by_id(connection_id)
+            if connection:
+                self.recent_menu.addAction(self.create_connection_action(connection, self.recent_menu))
+
+    def create_connection_action(self, connection, menu):
+        connection_action = QAction(f"{connection['name']} - {connection['domain']}", menu)
+        connection_action.triggered.connect(lambda checked, connection_id=connection['id']: self.connect_to_server_signal.emit(connection_id))
+        return connection_action
+
+    def clear_menu(self, menu):
+        for action in menu.actions():
+            submenu = action.menu()
+            if submenu is not None:
+                submenu.deleteLater()
+        menu.clear()
+
+    def connection_by_id(self, connection_id):
+        row = self.connection_model.row_for_id(connection_id)
+        return self.connection_model.get_connection(row) if row >= 0 else None
+
+    def add_recent(self, connection_id):
+        """Remember a launched connection for the Recent submenu."""
+        if connection_id in self.recent_ids:
+            self.recent_ids.remove(connection_id)
+        self.recent_ids.append(connection_id)
 
     def tray_icon_activated(self, reason):
         """Handle tray icon click."""
@@ -73,4 +218,3 @@ class TrayManager(QObject):
 
 def create_tray_manager(parent, connection_model):
     return TrayManager(parent, connection_model)
-
@@ -0,0 +1,415 @@
+import json
+from bisect import bisect
+from PyQt5.QtCore import QAbstractItemModel, QModelIndex, QMimeData, QTimer, Qt
+from model import StatusRole, FETCH_BATCH_SIZE
+
+# (name, connection count) for a group row, None for a connection row
+GroupRole = Qt.UserRole + 2
+# Dragged rows: {"connections": [ids], "groups": [paths]}
+MIME_TYPE = 'application/x-nutty-items'
+SEPARATOR = '/'
+
+
+def split_group(path):
+    return [name.strip() for name in (path or '').split(SEPARATOR) if name.strip()]
+
+
+def join_group(*names):
+    return SEPARATOR.join(name for name in names if name)
+
+
+class GroupNode:
+    """A folder in the tree; its connections are held by id."""
+
+    __slots__ = ('name', 'path', 'parent', 'groups', 'members', 'count', 'children', 'loaded', '_rows')
+
+    def __init__(self, name='', parent=None):
+        self.name = name
+        self.path = join_group(parent.path, name) if parent else ''
+        self.parent = parent
+        self.groups = {}
+        # id -> None, in the order the connections were added
+        self.members = {}
+        # Connections here and in every subgroup, kept up to date as they come and go
+        self.count = 0
+        # Subgroups by name, then member ids; None until the group is first expanded
+        self.children = None
+        # How many of the children views have been told about so far
+        self.loaded = 0
+        # child -> row, rebuilt lazily after anything that shifts rows
+        self._rows = None
+
+    def sort_key(self):
+        return self.name.lower()
+
+    def build_children(self):
+        self.children = sorted(self.groups.values(), key=GroupNode.sort_key) + list(self.members)
+        self._rows = None
+
+    def row_of(self, child):
+        if self._rows is None:
+            self._rows = {item: row for row, item in enumerate(self.children)}
+        return self._rows.get(child, -1)
+
+
+class ConnectionTreeModel(QAbstractItemModel):
+    """Shows a ConnectionListModel's connections in folders named by their 'group' field.
+
+    A group is a '/'-separated path such as 'prod/eu-west'; it exists while any
+    connection is in it or below it, so there is nothing to store for the groups
+    themselves. Counts are kept per group as connections come and go, but a
+    group's rows are only built when it is first expanded, and handed to the
+    view in batches like the flat list's. Moving rows by drag and drop is left
+    to move_handler, which only has to change the moved connections' groups;
+    the tree follows through the list model's signals.
+    """
+
+    def __init__(self, source_model, move_handler=None):
+        super().__init__()
+        self.source_model = source_model
+        # Called with (connection ids, group paths, target group path) after a drop
+        self.move_handler = move_handler
+        self._build()
+        source_model.modelReset.connect(self.reset)
+        source_model.connections_added.connect(self.add_connections)
+        source_model.connections_removed.connect(self.remove_connections)
+        source_model.connection_updated.connect(self.update_connection)
+        source_model.dataChanged.connect(self._source_data_changed)
+
+    def _build(self):
+        self.root = GroupNode()
+        # connection id -> the GroupNode it is in
+        self.group_of = {}
+        # Removed groups stay referenced until the next reset, as indexes point at them
+        self._retired = []
+        touched = set()
+        for connection in self.source_model.connections:
+            self._add(connection, touched)
+        self.root.build_children()
+        self.root.loaded = min(len(self.root.children), FETCH_BATCH_SIZE)
+
+    def reset(self):
+        self.beginResetModel()
+        self._build()
+        self.endResetModel()
+
+    # Qt model interface
+
+    def index(self, row, column=0, parent=QModelIndex()):
+        node = self.group(parent)
+        if column != 0 or node is None or node.children is None or not 0 <= row < node.loaded:
+            return QModelIndex()
+        return self.createIndex(row, column, node)
+
+    def parent(self, index=QModelIndex()):
+        if not index.isValid():
+            return QModelIndex()
+        parent = self.index_for(index.internalPointer())
+        return parent if parent is not None else QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        node = self.group(parent)
+        return node.loaded if node is not None and node.children is not None else 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self.group(parent)
+        if node is None:
+            return False
+        # Counts drop before the rows go during a removal, so once rows exist, go by them
+        return node.count > 0 if node.children is None else bool(node.children)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        node = self.group(parent)
+        if node is None:
+            return False
+        if node.children is None:
+            return node.count > 0
+        return node.loaded < len(node.children)
+
+    def fetchMore(self, parent=QModelIndex()):
+        node = self.group(parent)
+        if node is None:
+            return
+        if node.children is None:
+            node.build_children()
+        count = min(FETCH_BATCH_SIZE, len(node.children) - node.loaded)
+        if count > 0:
+            self.beginInsertRows(parent, node.loaded, node.loaded + count - 1)
+            node.loaded += count
+            self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        item = self.item(index)
+        if isinstance(item, GroupNode):
+            if role == GroupRole:
+                return item.name, item.count
+            if role == Qt.DisplayRole:
+                return f"{item.name} ({item.count})"
+            return None
+        if role == Qt.DisplayRole:
+            return self.connection(item)
+        if role == StatusRole:
+            return self.source_model.status_for(self.connection(item))
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemIsDropEnabled
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsDragEnabled
+        if isinstance(self.item(index), GroupNode):
+            flags |= Qt.ItemIsDropEnabled
+        return flags
+
+    def supportedDropActions(self):
+        return Qt.MoveAction
+
+    def supportedDragActions(self):
+        return Qt.MoveAction
+
+    def mimeTypes(self):
+        return [MIME_TYPE]
+
+    def mimeData(self, indexes):
+        items = {'connections': [], 'groups': []}
+        for index in indexes:
+            item = self.item(index)
+            if isinstance(item, GroupNode):
+                items['groups'].append(item.path)
+            else:
+                items['connections'].append(item)
+        mime_data = QMimeData()
+        mime_data.setData(MIME_TYPE, json.dumps(items).encode())
+        return mime_data
+
+    def dropMimeData(self, data, action, row, column, parent):
+        if action == Qt.IgnoreAction:
+            return True
+        if not data.hasFormat(MIME_TYPE) or self.move_handler is None:
+            return False
+        # Dropped on a connection, or between rows: the group those rows are in
+        target = self.group(parent) or parent.internalPointer()
+        items = json.loads(bytes(data.data(MIME_TYPE)))
+        # Moving changes rows, so leave it until the view has finished the drop
+        QTimer.singleShot(0, lambda: self.move_handler(items['connections'], items['groups'], target.path))
+        return True
+
+    # Lookups
+
+    def item(self, index):
+        """Return the GroupNode or connection id an index refers to."""
+        return index.internalPointer().children[index.row()]
+
+    def group(self, index):
+        """Return the GroupNode an index refers to, the root for an invalid one, else None."""
+        if not index.isValid():
+            return self.root
+        item = self.item(index)
+        return item if isinstance(item, GroupNode) else None
+
+    def connection(self, connection_id):
+        return self.source_model.connections[self.source_model.row_for_id(connection_id)]
+
+    def index_for(self, node):
+        """Return the index of a group's row, the root's invalid index, or None if it has no row yet."""
+        if node is self.root:
+            return QModelIndex()
+        parent = node.parent
+        if parent.children is None:
+            return None
+        row = parent.row_of(node)
+        if not 0 <= row < parent.loaded:
+            return None
+        return self.createIndex(row, 0, parent)
+
+    def index_for_path(self, path):
+        """Return the index of the group at path, building its ancestors' rows if needed."""
+        node = self.root
+        for name in split_group(path):
+            if node.children is None:
+                index = self.index_for(node)
+                if index is None:
+                    return None
+                self.fetchMore(index)
+            node = node.groups.get(name)
+            if node is None:
+                return None
+        return self.index_for(node)
+
+    def group_path(self, index):
+        node = self.group(index)
+        return node.path if node is not None else None
+
+    def source_rows(self, indexes):
+        """Return the list model rows of the connections among indexes; groups are skipped."""
+        return [self.source_model.row_for_id(item) for item in map(self.item, indexes) if not isinstance(item, GroupNode)]
+
+    def group_paths(self):
+        """Every group's path, parents before their subgroups."""
+        paths = []
+        nodes = [self.root]
+        while nodes:
+            node = nodes.pop(0)
+            for child in sorted(node.groups.values(), key=GroupNode.sort_key):
+                paths.append(child.path)
+                nodes.append(child)
+        return paths
+
+    # Following the list model
+
+    def add_connections(self, connections):
+        touched = set()
+        for connection in connections:
+            self._add(connection, touched)
+        self._emit_counts(touched)
+
+    def remove_connections(self, connections):
+        touched = set()
+        self._remove([connection['id'] for connection in connections], touched)
+        self._emit_counts(touched)
+
+    def update_connection(self, previous, connection):
+        node = self.group_of.get(previous['id'])
+        if node is not None and node.path == join_group(*split_group(connection.get('group'))):
+            if node.children is not None:
+                row = node.row_of(connection['id'])
+                parent = self.index_for(node)
+                if 0 <= row < node.loaded and parent is not None:
+                    index = self.index(row, 0, parent)
+                    self.dataChanged.emit(index, index)
+            return
+        touched = set()
+        self._remove([previous['id']], touched)
+        self._add(connection, touched)
+        self._emit_counts(touched)
+
+    def _source_data_changed(self, top_left, bottom_right, roles=()):
+        # Probe results repaint every row on screen; only expanded groups have any
+        if StatusRole not in roles:
+            return
+        nodes = [self.root]
+        while nodes:
+            node = nodes.pop()
+            if node.children is None:
+                continue
+            parent = self.index_for(node)
+            if node.loaded and parent is not None:
+                self.dataChanged.emit(self.index(0, 0, parent), self.index(node.loaded - 1, 0, parent), [StatusRole])
+            nodes.extend(node.groups.values())
+
+    def _group_node(self, path):
+        """Return the group at path, creating it and any missing parents."""
+        node = self.root
+        for name in split_group(path):
+            child = node.groups.get(name)
+            if child is None:
+                child = GroupNode(name, node)
+                self._insert_group(node, child)
+            node = child
+        return node
+
+    def _insert_group(self, node, child):
+        node.groups[child.name] = child
+        if node.children is None:
+            return
+        # Subgroups come first in the children, in name order
+        keys = [group.sort_key() for group in node.children[:len(node.groups) - 1]]
+        row = bisect(keys, child.sort_key())
+        parent = self.index_for(node)
+        if row <= node.loaded and parent is not None:
+            self.beginInsertRows(parent, row, row)
+            node.children.insert(row, child)
+            node._rows = None
+            node.loaded += 1
+            self.endInsertRows()
+        else:
+            node.children.insert(row, child)
+            node._rows = None
+
+    def _add(self, connection, touched):
+        connection_id = connection['id']
+        node = self._group_node(connection.get('group'))
+        node.members[connection_id] = None
+        self.group_of[connection_id] = node
+        ancestor = node
+        while ancestor is not None:
+            ancestor.count += 1
+            touched.add(ancestor)
+            ancestor = ancestor.parent
+        if node.children is None:
+            return
+        row = len(node.children)
+        parent = self.index_for(node)
+        # Only shown right away if everything before it is; otherwise fetchMore() gets to it
+        if row == node.loaded and parent is not None:
+            self.beginInsertRows(parent, row, row)
+            self._append_child(node, connection_id, row)
+            node.loaded += 1
+            self.endInsertRows()
+        else:
+            self._append_child(node, connection_id, row)
+
+    @staticmethod
+    def _append_child(node, connection_id, row):
+        node.children.append(connection_id)
+        if node._rows is not None:
+            node._rows[connection_id] = row
+
+    def _remove(self, connection_ids, touched):
+        by_group = {}
+        for connection_id in connection_ids:
+            node = self.group_of.pop(connection_id, None)
+            if node is None:
+                continue
+            del node.members[connection_id]
+            by_group.setdefault(node, []).append(connection_id)
+            ancestor = node
+            while ancestor is not None:
+                ancestor.count -= 1
+                touched.add(ancestor)
+                ancestor = ancestor.parent
+
+        for node, removed_ids in by_group.items():
+            if node.children is not None:
+                self._remove_rows(node, [node.row_of(connection_id) for connection_id in removed_ids])
+            # A group only exists while something is in it
+            while node is not self.root and node.count == 0:
+                parent = node.parent
+                if parent.groups.get(node.name) is not node:
+                    break
+                del parent.groups[node.name]
+                touched.discard(node)
+                self._retired.append(node)
+                if parent.children is not None:
+                    self._remove_rows(parent, [parent.row_of(node)])
+                node = parent
+
+    def _remove_rows(self, node, rows):
+        """Remove children by row, one signal per contiguous run of shown rows."""
+        parent = self.index_for(node)
+        rows = sorted(set(row for row in rows if row >= 0), reverse=True)
+        while rows:
+            last = first = rows.pop(0)
+            while rows and rows[0] == first - 1:
+                first = rows.pop(0)
+            if first < node.loaded:
+                visible_last = min(last, node.loaded - 1)
+                if parent is not None:
+                    self.beginRemoveRows(parent, first, visible_last)
+                del node.children[first:last + 1]
+                # Views call parent() from rowsRemoved, so the row map must already be current
+                node._rows = None
+                node.loaded -= visible_last - first + 1
+                if parent is not None:
+                    self.endRemoveRows()
+            else:
+                del node.children[first:last + 1]
+                node._rows = None
+
+    def _emit_counts(self, touched):
+        for node in touched:
+            index = self.index_for(node) if node is not self.root else None
+            if index is not None:
+                self.dataChanged.emit(index, index, [GroupRole, Qt.DisplayRole])
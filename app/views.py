@@ -1,33 +1,90 @@
 from PyQt5.QtWidgets import (
-    QApplication, QMainWindow, QVBoxLayout, QWidget, QListView, 
+    QApplication, QMainWindow, QVBoxLayout, QWidget, QTreeView, QAbstractItemView,
     QPushButton, QHBoxLayout, QDialog, QLabel, QComboBox, 
-    QMessageBox, QSystemTrayIcon, QStyleFactory, QMenu
+    QMessageBox, QSystemTrayIcon, QStyleFactory, QLineEdit
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QObject, QThread, QTimer, pyqtSignal
 
 from PyQt5.QtGui import QIcon
 from tray import create_tray_manager
-from dialogs import AddConnectionDialog, EditConnectionDialog, AboutDialog
 from delegates import ConnectionItemDelegate
 from menu_bar import create_menu_bar
 from controller import Controller
-from config import load_theme, save_config
-from preferences_dialog import PreferencesDialog
+from model import ConnectionSearchProxyModel
+from tree_model import ConnectionTreeModel
+from config import load_theme
+from theme_compiler import compiled_stylesheet, theme_hash
+from startup import StartupProfiler
+from tracing import span
+import threading
 import logging
 
 # Set up logging
 logging.basicConfig(level=logging.ERROR, format='%(asctime)s - %(levelname)s - %(message)s')
 
+class StoreUnlockThread(QThread):
+    """Fetches the store key and decrypts the connections off the GUI thread.
+
+    Secret Service can block on D-Bus for a long time, or until the user unlocks
+    their wallet, so the window stays responsive in a locked state meanwhile.
+    """
+    unlocked = pyqtSignal(object, object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, controller, profiler, parent=None):
+        super().__init__(parent)
+        self.controller = controller
+        self.profiler = profiler
+
+    def run(self):
+        try:
+            with self.profiler.phase("keyring"):
+                from session_key import unlock_key
+                key = unlock_key(self.controller.config)
+            with self.profiler.phase("import cryptography"):
+                from cryptography.fernet import Fernet
+                cipher_suite = Fernet(key)
+            with self.profiler.phase("decrypt connections"):
+                store, connections = self.controller.load_store(cipher_suite)
+            self.unlocked.emit(store, connections)
+        except Exception as e:
+            logging.error(f"Error unlocking connections: {str(e)}")
+            self.failed.emit(str(e))
+
+
+class ProbeResultRelay(QObject):
+    """Carries probe results from the probe engine's thread to the GUI thread."""
+    result_ready = pyqtSignal(object, object)
+
+
+class SshImportRelay(QObject):
+    """Carries imported SSH config records to the GUI thread; the flag asks for a summary."""
+    records_ready = pyqtSignal(object, bool)
+
+
+class LaunchReportRelay(QObject):
+    """Carries a finished bulk launch's report from its worker thread to the GUI thread."""
+    finished = pyqtSignal(object)
+
+
+# Probe results arriving within this many ms are applied to the model together
+PROBE_FLUSH_INTERVAL = 100
+# Launching more sessions than this at once asks for confirmation first
+BULK_LAUNCH_CONFIRM = 10
+
 class MainWindow(QMainWindow):
-    def __init__(self, config, cipher_suite):
+    def __init__(self, config, cipher_suite=None, profiler=None):
         try:
             super().__init__()
+            self.profiler = profiler or StartupProfiler()
+            # Without a cipher the store is opened later by finish_startup()
             self.controller = Controller(config, cipher_suite)
             self.config = config
             self.theme_data = {}
             
             self.current_theme = config.get('theme', 'coffee')
             self.theme_data = load_theme(self.current_theme)
+            self.stylesheet_hash = None
             
             QApplication.setStyle(QStyleFactory.create("Fusion"))
             
@@ -42,12 +99,40 @@ class MainWindow(QMainWindow):
 
             # Central widget layout
             self.central_widget = QWidget()
+            self.central_widget.setObjectName("mainContent")
             self.setCentralWidget(self.central_widget)
             self.layout = QVBoxLayout(self.central_widget)
 
-            # Connection list view
-            self.connection_list_view = QListView()
-            self.connection_list_view.setModel(self.controller.connection_list_model)
+            # Shown while the keyring is being unlocked
+            self.status_label = QLabel("Unlocking keyring...")
+            self.status_label.setAlignment(Qt.AlignCenter)
+            self.status_label.hide()
+            self.layout.addWidget(self.status_label)
+
+            # Search box, filtering through the controller's search index
+            self.search_edit = QLineEdit()
+            self.search_edit.setObjectName("connectionSearch")
+            self.search_edit.setPlaceholderText("Search connections...")
+            self.search_edit.setClearButtonEnabled(True)
+            self.layout.addWidget(self.search_edit)
+
+            # Connection view: groups as a tree, or the flat ranked matches while searching
+            self.connection_tree_model = ConnectionTreeModel(self.controller.connection_list_model, self.move_to_group)
+            # Queued, so it runs after the view has dropped its own expanded state on reset
+            self.connection_tree_model.modelReset.connect(lambda: QTimer.singleShot(0, self.restore_expanded_groups))
+            self.connection_proxy_model = ConnectionSearchProxyModel(self.controller.connection_list_model, self.controller.search_index)
+            self.search_edit.textChanged.connect(self.set_search_query)
+            self.connection_list_view = QTreeView()
+            self.connection_list_view.setObjectName("connectionList")
+            self.connection_list_view.setHeaderHidden(True)
+            self.connection_list_view.setModel(self.connection_tree_model)
+            # Shift/Ctrl-click selects several connections to open or delete together
+            self.connection_list_view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+            # Dragging connections or groups onto a group moves them into it
+            self.connection_list_view.setDragDropMode(QAbstractItemView.InternalMove)
+            self.connection_list_view.setDefaultDropAction(Qt.MoveAction)
+            self.connection_list_view.expanded.connect(lambda index: self.set_group_expanded(index, True))
+            self.connection_list_view.collapsed.connect(lambda index: self.set_group_expanded(index, False))
             self.layout.addWidget(self.connection_list_view)
 
             # Connect the double-click event to connect_to_server
@@ -79,25 +164,40 @@ class MainWindow(QMainWindow):
             self.layout.addLayout(btn_layout)
 
             # Use the custom delegate for the connection list view
-            self.connection_list_view.setItemDelegate(ConnectionItemDelegate(self.theme_data))
+            self.item_delegate = ConnectionItemDelegate(self.theme_data)
+            self.connection_list_view.setItemDelegate(self.item_delegate)
 
             # Enable/disable buttons based on selection
             self.connection_list_view.selectionModel().selectionChanged.connect(self.update_button_states)
             
             # System tray setup
             self.tray_manager = create_tray_manager(self, self.controller.connection_list_model)
-            self.tray_manager.show_window_signal.connect(self.show)
+            self.tray_manager.show_window_signal.connect(self.show_window)
             self.tray_manager.exit_app_signal.connect(self.exit_app)
             self.tray_manager.connect_to_server_signal.connect(self.connect_to_server_from_tray)
 
+            # Host reachability badges
+            self.setup_host_probes()
+
+            self.launch_relay = LaunchReportRelay(self)
+            self.launch_relay.finished.connect(self.show_launch_report)
+
+            # Set up by serve_instance_requests() when this is the running instance
+            self.instance_server = None
+            # Set up by watch_store() once the connections are unlocked
+            self.store_watcher = None
+
+            self.ssh_sync = None
+            self.ssh_import_relay = SshImportRelay(self)
+            self.ssh_import_relay.records_ready.connect(self.on_ssh_config_records)
+
             # Create the menu bar
             create_menu_bar(self)
 
             # Apply the initial theme
             self.apply_theme(self.theme_data)
-            
-            # Re-save connections to ensure they're encrypted with the new key
-            self.controller.save_connections()
+
+            self.set_store_ready(self.controller.is_store_open())
 
         except Exception as e:
             logging.error(f"Error initializing MainWindow: {str(e)}")
@@ -105,194 +205,260 @@ class MainWindow(QMainWindow):
             raise
 
 
+    def setup_host_probes(self):
+        """Stream probe results into the model in batches and re-probe hosts as results expire."""
+        prober = self.controller.prober
+        self.item_delegate.show_status = prober is not None
+        if prober is None:
+            return
+        self.pending_probe_results = {}
+        self.probe_flush_timer = QTimer(self)
+        self.probe_flush_timer.setSingleShot(True)
+        self.probe_flush_timer.setInterval(PROBE_FLUSH_INTERVAL)
+        self.probe_flush_timer.timeout.connect(self.flush_probe_results)
+
+        self.probe_relay = ProbeResultRelay(self)
+        self.probe_relay.result_ready.connect(self.queue_probe_result)
+        prober.on_result = self.probe_relay.result_ready.emit
+        # Anything probed before the relay was hooked up
+        self.controller.connection_list_model.set_probe_results(dict(prober.results))
+
+        self.probe_timer = QTimer(self)
+        self.probe_timer.timeout.connect(self.controller.probe_hosts)
+        self.probe_timer.start(int(prober.ttl * 1000))
+
+    def set_host_probes(self, enabled):
+        """Turn the reachability badges on or off from Preferences."""
+        if enabled == self.item_delegate.show_status:
+            return
+        if not enabled:
+            # setup_host_probes() makes new ones if probing is turned back on
+            for timer in (self.probe_timer, self.probe_flush_timer):
+                timer.stop()
+                timer.deleteLater()
+        self.controller.toggle_host_probe(enabled)
+        if enabled:
+            self.setup_host_probes()
+        else:
+            self.item_delegate.show_status = False
+            self.connection_list_view.viewport().update()
+
+    def queue_probe_result(self, target, result):
+        self.pending_probe_results[target] = result
+        if not self.probe_flush_timer.isActive():
+            self.probe_flush_timer.start()
+
+    def flush_probe_results(self):
+        results, self.pending_probe_results = self.pending_probe_results, {}
+        self.controller.connection_list_model.set_probe_results(results)
+
     def apply_theme(self, theme_data):
         self.theme_data = theme_data  # Store the original theme data
         if not theme_data:
             return
 
-        # Apply global styles
-        global_style = "QWidget { "
-        for key, value in theme_data.items():
-            if key.startswith("global_"):
-                global_style += f"{key.replace('global_', '')}: {value}; "
-        global_style += "}"
-        
-        # Apply window styles
-        window_style = "QMainWindow { "
-        for key, value in theme_data.items():
-            if key.startswith("window_"):
-                if key == "window_background-image":
-                    window_style += f"background-image: {value}; "
-                    window_style += "background-position: center; "
-                    window_style += "background-repeat: no-repeat; "
-                    window_style += "background-attachment: fixed; "
-                else:
-                    window_style += f"{key.replace('window_', '')}: {value}; "
-        window_style += "}"
-        
-        # Set the window style
-        self.setStyleSheet(window_style)
-        
-        # Apply QListView styles
-        list_view_style = "QListView { "
-        for key, value in theme_data.items():
-            if key.startswith("list_view_") and not key.startswith("list_view_item_"):
-                list_view_style += f"{key.replace('list_view_', '')}: {value}; "
-        list_view_style += "} "
-        
-        # Apply QListView item styles
-        list_view_style += "QListView::item { "
-        for key, value in theme_data.items():
-            if key.startswith("list_view_item_") and not key.startswith("list_view_item_selected_"):
-                list_view_style += f"{key.replace('list_view_item_', '')}: {value}; "
-        list_view_style += "} "
-        
-        # Apply QListView selected item styles
-        list_view_style += "QListView::item:selected { "
-        for key, value in theme_data.items():
-            if key.startswith("list_view_item_selected_"):
-                list_view_style += f"{key.replace('list_view_item_selected_', '')}: {value}; "
-        list_view_style += "}"
-        
-        self.connection_list_view.setStyleSheet(list_view_style)
-
-        # Apply QPushButton styles
-        button_style = "QPushButton { "
-        for key, value in theme_data.items():
-            if key.startswith("button_") and not any(x in key for x in ["hover", "pressed", "disabled"]):
-                button_style += f"{key.replace('button_', '')}: {value}; "
-        button_style += "} "
-        
-        # Apply QPushButton hover styles
-        button_style += "QPushButton:hover { "
-        for key, value in theme_data.items():
-            if key.startswith("button_hover_"):
-                button_style += f"{key.replace('button_hover_', '')}: {value}; "
-        button_style += "} "
-        
-        # Apply QPushButton pressed styles
-        button_style += "QPushButton:pressed { "
-        for key, value in theme_data.items():
-            if key.startswith("button_pressed_"):
-                button_style += f"{key.replace('button_pressed_', '')}: {value}; "
-        button_style += "} "
-        
-        # Apply QPushButton disabled styles
-        button_style += "QPushButton:disabled { "
-        for key, value in theme_data.items():
-            if key.startswith("button_disabled_"):
-                button_style += f"{key.replace('button_disabled_', '')}: {value}; "
-        button_style += "}"
-        
-        for button in [self.add_btn, self.remove_btn, self.connect_btn, self.edit_btn, self.duplicate_btn]:
-            button.setStyleSheet(button_style)
-
-        # Apply QMenuBar styles
-        menu_bar_style = "QMenuBar { "
-        menu_bar_style += f"background-color: {theme_data.get('global_background-color', '#000000')}; "
-        menu_bar_style += f"color: {theme_data.get('global_color', '#00ff00')}; "
-        menu_bar_style += f"border-bottom: {theme_data.get('menu_border',  '1px solid #00ff00')}; "
-        menu_bar_style += "} "
-        
-        menu_bar_style += "QMenuBar::item { "
-        menu_bar_style += "background-color: transparent; "
-        menu_bar_style += "} "
-        
-        menu_bar_style += "QMenuBar::item:selected { "
-        menu_bar_style += f"background-color: {theme_data.get('list_view_item_selected_background-color', 'rgba(0, 80, 0, 200)')}; "
-        menu_bar_style += "} "
-        
-        self.menuBar().setStyleSheet(menu_bar_style)
-
-        # Apply QMenu styles
-        menu_style = "QMenu { "
-        menu_style += f"background-color: {theme_data.get('global_background-color', '#000000')}; "
-        menu_style += f"color: {theme_data.get('global_color', '#00ff00')}; "
-        menu_style += f"border: {theme_data.get('menu_border',  '1px solid #00ff00')}; "
-        menu_style += "} "
-        
-        menu_style += "QMenu::item { "
-        menu_style += "background-color: transparent; "
-        menu_style += "} "
-        
-        menu_style += "QMenu::item:selected { "
-        menu_style += f"background-color: {theme_data.get('list_view_item_selected_background-color', 'rgba(0, 80, 0, 200)')}; "
-        menu_style += "} "
-        
-        # Apply to all menus
-        for menu in self.menuBar().findChildren(QMenu):
-            menu.setStyleSheet(menu_style)
-
-        # Update the delegate with the original theme data
-        
-        self.connection_list_view.setItemDelegate(ConnectionItemDelegate(self.theme_data))
-
-        # Save the current theme
+        # The whole theme compiles to one application stylesheet, cached on disk by the
+        # styles.json hash; reapplying the active theme skips Qt's restyle entirely
+        with span("theme.apply"):
+            stylesheet_hash = theme_hash(theme_data)
+            if stylesheet_hash != self.stylesheet_hash:
+                QApplication.instance().setStyleSheet(compiled_stylesheet(theme_data))
+                self.stylesheet_hash = stylesheet_hash
+
+            # Recompile the delegate's cached palette for the new theme
+            self.item_delegate.set_theme(self.theme_data)
+        self.connection_list_view.viewport().update()
+
+        # Save the current theme, skipping the write when it hasn't changed
         self.current_theme = theme_data.get('name', 'darcula')
-        self.config['theme'] = self.current_theme
-        save_config(self.config)
+        if self.config.get('theme') != self.current_theme:
+            self.config['theme'] = self.current_theme
+            self.controller.save_config()
+
+    def finish_startup(self):
+        """Unlock and load the connection store once the window is on screen."""
+        self.status_label.setText("Unlocking keyring...")
+        self.status_label.show()
+        self.unlock_thread = StoreUnlockThread(self.controller, self.profiler, self)
+        self.unlock_thread.unlocked.connect(self.on_store_unlocked)
+        self.unlock_thread.failed.connect(self.on_store_unlock_failed)
+        self.unlock_thread.start()
+        # Terminal discovery is independent of the keyring, so do it meanwhile
+        with self.profiler.phase("find terminals"):
+            self.controller.load_terminals()
+
+    def on_store_unlocked(self, store, connections):
+        try:
+            with self.profiler.phase("publish connections"):
+                self.controller.publish_store(store, connections)
+            self.status_label.hide()
+            self.set_store_ready(True)
+            self.watch_store()
+            if self.controller.get_ssh_config_sync():
+                self.set_ssh_config_sync(True)
+            if self.instance_server:
+                self.instance_server.store_ready()
+        except Exception as e:
+            self.on_store_unlock_failed(str(e))
+        finally:
+            self.profiler.report()
+
+    def on_store_unlock_failed(self, message):
+        self.status_label.setText("Could not unlock your connections.")
+        self.profiler.report()
+        QMessageBox.critical(self, "Initialization Error", f"An error occurred while loading your connections: {message}")
+
+    def watch_store(self):
+        """Show connections the nutty CLI or another nuTTY adds, edits or removes."""
+        from store_watcher import StoreWatcher
+        self.store_watcher = StoreWatcher(self.controller, self)
+
+    def serve_instance_requests(self):
+        """Answer later launches and the nutty CLI from this window's connections."""
+        from instance_server import InstanceServer
+        self.instance_server = InstanceServer(self)
+        if not self.instance_server.listen():
+            self.instance_server = None
+
+    def show_window(self):
+        """Bring the window to the front, restoring it from the tray if it was hidden."""
+        self.showNormal()
+        self.raise_()
+        self.activateWindow()
+
+    def set_store_ready(self, ready):
+        """Enable the widgets that need decrypted connections."""
+        self.add_btn.setEnabled(ready)
+        self.search_edit.setEnabled(ready)
 
     def add_connection(self):
         try:
-            dialog = AddConnectionDialog(self)
+            from dialogs import AddConnectionDialog
+            dialog = AddConnectionDialog(self, self.connection_tree_model.group_paths())
             if dialog.exec_():
                 connection = dialog.get_connection_details()
                 self.controller.add_connection(connection)
-                self.tray_manager.update_tray_connections()
         except Exception as e:
             logging.error(f"Error adding connection: {str(e)}")
             QMessageBox.critical(self, "Error", f"Failed to add connection: {str(e)}")
 
     def remove_connection(self):
         try:
-            selected_indexes = self.connection_list_view.selectionModel().selectedIndexes()
-            if selected_indexes:
-                confirm = QMessageBox.question(self, "Delete Connection", "Confirm deletion?  This cannot be undone", QMessageBox.Yes | QMessageBox.No)
+            selected_rows = self.selected_source_rows()
+            if selected_rows:
+                prompt = "Confirm deletion?  This cannot be undone" if len(selected_rows) == 1 else \
+                    f"Delete {len(selected_rows)} connections?  This cannot be undone"
+                confirm = QMessageBox.question(self, "Delete Connection", prompt, QMessageBox.Yes | QMessageBox.No)
                 if confirm == QMessageBox.Yes:
-                    selected_row = selected_indexes[0].row()
-                    self.controller.remove_connection(selected_row)
-                    self.tray_manager.update_tray_connections()
+                    self.controller.remove_connections(selected_rows)
         except Exception as e:
             logging.error(f"Error removing connection: {str(e)}")
             QMessageBox.critical(self, "Error", f"Failed to remove connection: {str(e)}")
 
     def connect_to_server(self):
         try:
-            selected_indexes = self.connection_list_view.selectionModel().selectedIndexes()
-            if selected_indexes:
-                selected_row = selected_indexes[0].row()
+            selected_rows = self.selected_source_rows()
+            if len(selected_rows) > 1:
+                self.connect_to_servers(selected_rows)
+            elif selected_rows:
+                selected_row = selected_rows[0]
                 connection = self.controller.connection_list_model.get_connection(selected_row)
                 self.controller.connect_to_server(connection)
+                self.tray_manager.add_recent(connection['id'])
         except Exception as e:
             logging.error(f"Error connecting to server: {str(e)}")
             QMessageBox.critical(self, "Error", f"Failed to connect to server: {str(e)}")
 
+    def connect_to_servers(self, rows):
+        """Open every selected connection through the controller's rate-limited bulk launcher."""
+        if len(rows) > BULK_LAUNCH_CONFIRM:
+            confirm = QMessageBox.question(self, "Open Connections", f"Open {len(rows)} sessions?", QMessageBox.Yes | QMessageBox.No)
+            if confirm != QMessageBox.Yes:
+                return
+        # Keep the list's order rather than the order the rows were clicked in
+        connections = [self.controller.connection_list_model.get_connection(row) for row in sorted(rows)]
+        self.controller.connect_to_servers(connections, on_finished=self.launch_relay.finished.emit)
+        for connection in connections:
+            self.tray_manager.add_recent(connection['id'])
+
+    def show_launch_report(self, report):
+        if report.failures:
+            QMessageBox.warning(self, "Open Connections", report.summary())
+        else:
+            self.tray_manager.show_message("nuTTY", report.summary())
+
     def edit_connection(self):
         try:
-            selected_indexes = self.connection_list_view.selectionModel().selectedIndexes()
-            if selected_indexes:
-                selected_row = selected_indexes[0].row()
+            selected_rows = self.selected_source_rows()
+            if selected_rows:
+                selected_row = selected_rows[0]
                 connection = self.controller.connection_list_model.get_connection(selected_row)
-                dialog = EditConnectionDialog(self, connection)
+                from dialogs import EditConnectionDialog
+                dialog = EditConnectionDialog(self, connection, self.controller.get_password(connection),
+                                              self.connection_tree_model.group_paths())
                 if dialog.exec_():
                     updated_connection = dialog.get_connection_details()
                     self.controller.update_connection(selected_row, updated_connection)
-                    self.tray_manager.update_tray_connections()
         except Exception as e:
             logging.error(f"Error editing connection: {str(e)}")
             QMessageBox.critical(self, "Error", f"Failed to edit connection: {str(e)}")
 
     def duplicate_connection(self):
         try:
-            selected_indexes = self.connection_list_view.selectionModel().selectedIndexes()
-            if selected_indexes:
-                selected_row = selected_indexes[0].row()
+            selected_rows = self.selected_source_rows()
+            if selected_rows:
+                selected_row = selected_rows[0]
                 self.controller.duplicate_connection(selected_row)
-                self.tray_manager.update_tray_connections()
         except Exception as e:
             logging.error(f"Error duplicating connection: {str(e)}")
             QMessageBox.critical(self, "Error", f"Failed to duplicate connection: {str(e)}")
 
+    def selected_source_rows(self):
+        """Return the selected connections as rows of the underlying ConnectionListModel."""
+        indexes = self.connection_list_view.selectionModel().selectedIndexes()
+        if self.connection_list_view.model() is self.connection_tree_model:
+            return self.connection_tree_model.source_rows(indexes)
+        return [self.connection_proxy_model.mapToSource(index).row() for index in indexes]
+
+    def set_search_query(self, text):
+        """Show the ranked matches for text as a flat list, or the groups when it is empty."""
+        self.connection_proxy_model.set_query(text)
+        model = self.connection_proxy_model if self.connection_proxy_model.is_filtered() else self.connection_tree_model
+        if self.connection_list_view.model() is model:
+            return
+        # A new model comes with a new selection model
+        self.connection_list_view.setModel(model)
+        self.connection_list_view.selectionModel().selectionChanged.connect(self.update_button_states)
+        self.connection_list_view.setRootIsDecorated(model is self.connection_tree_model)
+        # The flat matches are all connection rows of one size, so the view can skip measuring
+        # them; the tree mixes in compact group rows and has to ask row by row
+        self.connection_list_view.setUniformRowHeights(model is not self.connection_tree_model)
+        self.restore_expanded_groups()
+        self.update_button_states()
+
+    def restore_expanded_groups(self):
+        """Expand the groups that were open last time, building only their rows."""
+        if self.connection_list_view.model() is not self.connection_tree_model:
+            return
+        for path in sorted(self.controller.get_expanded_groups(), key=lambda path: path.count('/')):
+            index = self.connection_tree_model.index_for_path(path)
+            if index is not None and index.isValid():
+                self.connection_list_view.expand(index)
+
+    def set_group_expanded(self, index, expanded):
+        if self.connection_list_view.model() is not self.connection_tree_model:
+            return
+        path = self.connection_tree_model.group_path(index)
+        if path:
+            self.controller.set_group_expanded(path, expanded)
+
+    def move_to_group(self, connection_ids, group_paths, target):
+        try:
+            self.controller.move_to_group(connection_ids, group_paths, target)
+        except Exception as e:
+            logging.error(f"Error moving connections: {str(e)}")
+            QMessageBox.critical(self, "Error", f"Failed to move connections: {str(e)}")
+
     def select_terminal_emulator(self):
         try:
             # Dialog to choose the preferred terminal emulator
@@ -349,13 +515,15 @@ class MainWindow(QMainWindow):
     def update_button_states(self):
         try:
             # Check if any connection is selected
-            has_selection = len(self.connection_list_view.selectionModel().selectedIndexes()) > 0
+            selected_count = len(self.selected_source_rows())
+            has_selection = selected_count > 0
 
-            # Enable/disable buttons based on whether a connection is selected
+            # Enable/disable buttons based on whether a connection is selected; editing
+            # and duplicating only make sense for one
             self.remove_btn.setEnabled(has_selection)
             self.connect_btn.setEnabled(has_selection)
-            self.edit_btn.setEnabled(has_selection)
-            self.duplicate_btn.setEnabled(has_selection)
+            self.edit_btn.setEnabled(selected_count == 1)
+            self.duplicate_btn.setEnabled(selected_count == 1)
         except Exception as e:
             logging.error(f"Error updating button states: {str(e)}")
             QMessageBox.critical(self, "Error", f"Failed to update button states: {str(e)}")
@@ -388,18 +556,27 @@ class MainWindow(QMainWindow):
         try:
             """Exit the application completely."""
             self.tray_manager.hide_tray_icon()
+            self.set_ssh_config_sync(False)
+            if self.instance_server:
+                self.instance_server.close()
+            if self.store_watcher:
+                self.store_watcher.stop()
+            # Make sure debounced connection and config writes reach the disk
+            self.controller.shutdown()
             QApplication.quit()  # Quit the application
         except Exception as e:
             logging.error(f"Error exiting application: {str(e)}")
             QMessageBox.critical(self, "Error", f"Failed to exit application: {str(e)}")
 
-    def connect_to_server_from_tray(self, row):
+    def connect_to_server_from_tray(self, connection_id):
         try:
-            """Connect to a server from the tray menu based on the row index."""
+            """Connect to a server from the tray menu based on the connection id."""
+            row = self.controller.connection_list_model.row_for_id(connection_id)
             if row >= 0:
                 # Retrieve the connection details
                 connection = self.controller.connection_list_model.get_connection(row)
                 self.controller.connect_to_server(connection)
+                self.tray_manager.add_recent(connection_id)
         except Exception as e:
             logging.error(f"Error connecting to server from tray: {str(e)}")
             QMessageBox.critical(self, "Error", f"Failed to connect to server from tray: {str(e)}")
@@ -407,14 +584,70 @@ class MainWindow(QMainWindow):
     def show_about(self):
         try:
             """Show the About dialog."""
+            from dialogs import AboutDialog
             about_dialog = AboutDialog(self)
             about_dialog.exec_()
         except Exception as e:
             logging.error(f"Error showing About dialog: {str(e)}")
             QMessageBox.critical(self, "Error", f"Failed to show About dialog: {str(e)}")
 
+    def import_ssh_config(self):
+        """Import Host entries from ~/.ssh/config once, off the GUI thread."""
+        try:
+            if not self.controller.is_store_open():
+                return
+            from ssh_import import SshConfigImporter
+            threading.Thread(target=lambda: self.ssh_import_relay.records_ready.emit(SshConfigImporter().records(restore_deleted=True), True),
+                             name="ssh-config-import", daemon=True).start()
+        except Exception as e:
+            logging.error(f"Error importing SSH config: {str(e)}")
+            QMessageBox.critical(self, "Error", f"Failed to import SSH config: {str(e)}")
+
+    def set_ssh_config_sync(self, enabled):
+        """Start or stop re-importing ~/.ssh/config whenever it changes."""
+        if enabled and self.ssh_sync is None and self.controller.is_store_open():
+            from ssh_import import SshConfigImporter, SshConfigSync, DEFAULT_SYNC_INTERVAL
+            self.ssh_sync = SshConfigSync(
+                SshConfigImporter(),
+                lambda records: self.ssh_import_relay.records_ready.emit(records, False),
+                interval=self.config.get('ssh_config_sync_interval', DEFAULT_SYNC_INTERVAL),
+            )
+            self.ssh_sync.start()
+        elif not enabled and self.ssh_sync is not None:
+            self.ssh_sync.stop()
+            self.ssh_sync = None
+
+    def on_ssh_config_records(self, records, announce):
+        try:
+            added, changed, removed = self.controller.apply_ssh_import(records)
+            if announce:
+                QMessageBox.information(self, "Import from SSH Config",
+                                        f"{len(records)} hosts found: {added} added, {changed} updated, {removed} removed.")
+        except Exception as e:
+            logging.error(f"Error applying SSH config import: {str(e)}")
+            QMessageBox.critical(self, "Error", f"Failed to import SSH config: {str(e)}")
+
+    def show_active_sessions(self):
+        try:
+            from sessions_dialog import ActiveSessionsDialog
+            sessions_dialog = ActiveSessionsDialog(self)
+            sessions_dialog.exec_()
+        except Exception as e:
+            logging.error(f"Error showing Active Sessions dialog: {str(e)}")
+            QMessageBox.critical(self, "Error", f"Failed to show Active Sessions dialog: {str(e)}")
+
+    def show_performance(self):
+        try:
+            from performance_dialog import PerformanceDialog
+            performance_dialog = PerformanceDialog(self)
+            performance_dialog.exec_()
+        except Exception as e:
+            logging.error(f"Error showing Performance dialog: {str(e)}")
+            QMessageBox.critical(self, "Error", f"Failed to show Performance dialog: {str(e)}")
+
     def show_preferences(self):
         try:
+            from preferences_dialog import PreferencesDialog
             preferences_dialog = PreferencesDialog(self)
             preferences_dialog.exec_()
         except Exception as e:
@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+import logging
+
+# Seconds of quiet after the last change before pending writes are performed
+DEBOUNCE_SECONDS = 0.5
+# Upper bound on how long a steady stream of changes can postpone a write
+MAX_DELAY_SECONDS = 2.0
+
+
+def atomic_write(path, data):
+    """Write bytes to path via a temp file, fsync and rename so readers never see a partial file."""
+    directory = os.path.dirname(path) or '.'
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+class BackgroundWriter:
+    """Dedicated writer thread that collapses bursts of writes into one.
+
+    Callers schedule a job under a key; scheduling the same key again before the
+    debounce window expires replaces the earlier job, so ten quick edits cost a
+    single write. flush() performs everything pending immediately and blocks until
+    it is on disk, which is what exit handlers and tests should call.
+    """
+
+    def __init__(self, debounce=DEBOUNCE_SECONDS, max_delay=MAX_DELAY_SECONDS):
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._pending = {}
+        self._first_scheduled = None
+        self._last_scheduled = None
+        self._busy = False
+        self._flush_requested = False
+        self._stopping = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="nuTTY-writer", daemon=True)
+        self._thread.start()
+
+    def schedule(self, key, job):
+        """Mark key dirty; job is called on the writer thread once the window closes."""
+        with self._condition:
+            now = time.monotonic()
+            if not self._pending:
+                self._first_scheduled = now
+            self._last_scheduled = now
+            self._pending[key] = job
+            self._condition.notify_all()
+
+    def has_pending(self):
+        with self._condition:
+            return bool(self._pending) or self._busy
+
+    def flush(self, timeout=None):
+        """Run all pending jobs now and wait for them. Returns False on timeout."""
+        with self._condition:
+            if not self._pending and not self._busy:
+                return True
+            self._flush_requested = True
+            self._condition.notify_all()
+            return self._condition.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def stop(self):
+        """Flush and shut the writer thread down."""
+        self.flush()
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    if not self._pending:
+                        if self._stopping:
+                            return
+                        self._flush_requested = False
+                        self._condition.wait()
+                        continue
+                    if self._flush_requested or self._stopping:
+                        break
+                    now = time.monotonic()
+                    deadline = min(self._last_scheduled + self.debounce, self._first_scheduled + self.max_delay)
+                    if now >= deadline:
+                        break
+                    self._condition.wait(deadline - now)
+                jobs = list(self._pending.values())
+                self._pending.clear()
+                self._busy = True
+
+            for job in jobs:
+                try:
+                    job()
+                except Exception as e:
+                    logging.error(f"Background write failed: {str(e)}")
+
+            with self._condition:
+                self._busy = False
+                self._condition.notify_all()
@@ -0,0 +1,248 @@
+"""Data-layer benchmarks for nuTTY.
+
+Measures loading, saving, editing, searching and launch-command building at
+several store sizes, without a display, a keyring or the user's real config:
+
+    python benchmarks/bench_data_layer.py --output results.json
+    python benchmarks/bench_data_layer.py --baseline results.json
+
+With --baseline the run exits non-zero if any metric's best run got slower
+than the baseline's by more than --threshold (20% by default).
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import base64
+import argparse
+import platform
+import tempfile
+import statistics
+from itertools import cycle, islice
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'app')
+DEFAULT_SIZES = (100, 10_000, 100_000)
+DEFAULT_THRESHOLD = 0.2
+# Edits timed per size; each one is a real add/update through the controller
+EDIT_OPS = 200
+# Commands built per timed pass, cycling through the store when it is smaller
+COMMAND_OPS = 20_000
+SEARCH_QUERIES = ("web", "db-0", "prod east", "10.1.2", "xyzzy")
+
+
+class FakeCipher:
+    """Stands in for Fernet when --fake-cipher is given, to take encryption out of the numbers."""
+
+    def encrypt(self, data):
+        return base64.urlsafe_b64encode(data)
+
+    def decrypt(self, token):
+        return base64.urlsafe_b64decode(token)
+
+
+def isolate_environment():
+    """Point every nuTTY path at a throwaway directory before the app modules are imported."""
+    root = tempfile.mkdtemp(prefix="nutty-bench-")
+    for variable, name in (('XDG_CONFIG_HOME', 'config'), ('XDG_CACHE_HOME', 'cache'), ('XDG_RUNTIME_DIR', 'run')):
+        os.environ[variable] = os.path.join(root, name)
+        os.makedirs(os.environ[variable], mode=0o700, exist_ok=True)
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    sys.path.insert(0, os.path.abspath(APP_DIR))
+    return root
+
+
+def make_connections(count, seed=0):
+    rng = random.Random(seed)
+    roles = ("web", "db", "cache", "queue", "build", "proxy", "mail", "dns")
+    regions = ("prod-east", "prod-west", "staging", "dev", "lab")
+    connections = []
+    for i in range(count):
+        role = rng.choice(roles)
+        region = rng.choice(regions)
+        connections.append({
+            'id': f"{i:032x}",
+            'name': f"{role}-{i:05d} {region}",
+            'username': rng.choice(("root", "admin", "deploy", "ops")),
+            'domain': f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}",
+            'protocol': "SSH" if i % 10 else "Telnet",
+            'x11': i % 7 == 0,
+            'description': f"{role} server in {region}",
+            'use_identity_file': i % 3 == 0,
+            'identity_file': "/home/user/.ssh/id_ed25519" if i % 3 == 0 else None,
+            'secret': None,
+        })
+    return connections
+
+
+def timed(function, repeat, warmup=True):
+    """Run function repeat times after an untimed warm-up run; return per-run seconds."""
+    if warmup:
+        function()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize(samples, per=1):
+    """Milliseconds per operation; per divides runs that cover several operations."""
+    per_op = [sample * 1000 / per for sample in samples]
+    return {'median_ms': statistics.median(per_op), 'min_ms': min(per_op), 'runs': len(per_op)}
+
+
+def bench_size(size, cipher, repeat):
+    from config import get_connections_file_path
+    from controller import Controller
+    from store import ConnectionStore
+    from search import SearchIndex
+
+    path = get_connections_file_path()
+    for stale in (path, path + '.journal', path + '.journal.old'):
+        if os.path.exists(stale):
+            os.remove(stale)
+    ConnectionStore(path, cipher).compact(make_connections(size))
+
+    config = {'host_probe': False, 'terminal_emulator': 'XTerm'}
+    controller = Controller(config)
+    controller.open_store(cipher)
+    controller.search_index.wait_until_ready()
+    controller.available_terminal_emulators = {'XTerm': ('xterm', ['-hold', '-e'], False)}
+    results = {}
+
+    results['load_connections'] = summarize(timed(controller.load_connections, repeat))
+    results['save_connections'] = summarize(timed(controller.save_connections, repeat))
+
+    rng = random.Random(size)
+    new_connections = make_connections(EDIT_OPS, seed=size)
+    for connection in new_connections:
+        connection['id'] = None
+    start = time.perf_counter()
+    for connection in new_connections:
+        controller.add_connection(connection)
+    results['add_connection'] = summarize([time.perf_counter() - start], per=EDIT_OPS)
+
+    rows = [rng.randrange(len(controller.connection_list_model.connections)) for _ in range(EDIT_OPS)]
+    start = time.perf_counter()
+    for row in rows:
+        connection = dict(controller.connection_list_model.get_connection(row))
+        connection['description'] = "edited"
+        controller.update_connection(row, connection)
+    results['update_connection'] = summarize([time.perf_counter() - start], per=EDIT_OPS)
+    results['flush_edits'] = summarize(timed(lambda: controller.flush(30), 1, warmup=False))
+
+    connections = controller.connection_list_model.connections
+    ssh = list(islice(cycle([c for c in connections if c['protocol'] == 'SSH']), COMMAND_OPS))
+    telnet = list(islice(cycle([c for c in connections if c['protocol'] == 'Telnet']), COMMAND_OPS))
+    results['build_ssh_command'] = summarize(
+        timed(lambda: [controller.build_ssh_command(c) for c in ssh], repeat), per=len(ssh))
+    results['build_telnet_command'] = summarize(
+        timed(lambda: [controller.build_telnet_command(c) for c in telnet], repeat), per=len(telnet))
+
+    def build_index():
+        index = SearchIndex()
+        index.rebuild_in_background(connections)
+        index.wait_until_ready()
+    results['search_index_build'] = summarize(timed(build_index, max(1, repeat // 2), warmup=False))
+    results['search_query'] = summarize(
+        timed(lambda: [controller.search_index.ranked(query) for query in SEARCH_QUERIES], repeat), per=len(SEARCH_QUERIES))
+
+    controller.shutdown()
+    return results
+
+
+def bench_terminals(repeat):
+    from terminals import TerminalRegistry, find_terminals
+    TerminalRegistry().rescan()
+    return {
+        'find_terminals': summarize(timed(find_terminals, repeat)),
+        'discover_terminals_cached': summarize(timed(lambda: TerminalRegistry().discover(), repeat)),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return (metric, size, baseline ms, current ms) for every metric that regressed.
+
+    Best runs are compared rather than medians; they are far less sensitive to
+    whatever else the machine was doing.
+    """
+    regressions = []
+    for metric, sizes in results['results'].items():
+        for size, current in sizes.items():
+            previous = baseline.get('results', {}).get(metric, {}).get(size)
+            if previous and current['min_ms'] > previous['min_ms'] * (1 + threshold):
+                regressions.append((metric, size, previous['min_ms'], current['min_ms']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark nuTTY's data layer.")
+    parser.add_argument('--sizes', default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma separated connection counts (default: %(default)s)")
+    parser.add_argument('--repeat', type=int, default=5, help="runs per measurement (default: %(default)s)")
+    parser.add_argument('--fake-cipher', action='store_true', help="skip Fernet to time everything but encryption")
+    parser.add_argument('--output', help="write results as JSON to this file")
+    parser.add_argument('--baseline', help="compare against results saved earlier with --output")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown before a metric counts as a regression (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    root = isolate_environment()
+    from PyQt5.QtCore import QCoreApplication
+    app = QCoreApplication.instance() or QCoreApplication([])  # noqa: F841 - models need an application
+    if args.fake_cipher:
+        cipher = FakeCipher()
+    else:
+        from cryptography.fernet import Fernet
+        cipher = Fernet(Fernet.generate_key())
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    results = {}
+    for metric, summary in bench_terminals(args.repeat).items():
+        results.setdefault(metric, {})['-'] = summary
+    for size in sizes:
+        print(f"Benchmarking {size} connections...", file=sys.stderr)
+        for metric, summary in bench_size(size, cipher, args.repeat).items():
+            results.setdefault(metric, {})[str(size)] = summary
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cipher': 'fake' if args.fake_cipher else 'fernet',
+            'repeat': args.repeat,
+            'sizes': sizes,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+    print(f"{'metric':<28}{'size':>8}{'median ms':>14}{'min ms':>12}")
+    for metric, by_size in results.items():
+        for size, summary in by_size.items():
+            print(f"{metric:<28}{size:>8}{summary['median_ms']:>14.4f}{summary['min_ms']:>12.4f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for metric, size, before, after in regressions:
+            print(f"REGRESSION {metric} @ {size}: {before:.4f} ms -> {after:.4f} ms ({after / before - 1:+.0%})")
+        if not regressions:
+            print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+        status = 1 if regressions else 0
+
+    shutil.rmtree(root, ignore_errors=True)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
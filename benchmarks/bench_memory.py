@@ -0,0 +1,83 @@
+"""Memory held per connection: plain dicts as parsed from the store vs Connection records.
+
+    python benchmarks/bench_memory.py
+    python benchmarks/bench_memory.py --sizes 100000 --output memory.json
+
+Both sides start from the same JSON the store decrypts, and only what stays
+alive after loading is counted, so the parser's temporaries don't show up.
+"""
+import gc
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+from bench_data_layer import isolate_environment, make_connections
+
+DEFAULT_SIZES = (100, 10_000, 100_000)
+
+
+def retained_bytes(build):
+    """Return the bytes still allocated by build()'s result once it returns."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def load_seconds(build, repeat=3):
+    """Best of repeat untraced runs; tracemalloc slows allocation too much to time under it."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        build()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def measure(size):
+    from connection import Connection
+    data = json.dumps(make_connections(size, seed=size))
+
+    load_dicts = lambda: json.loads(data)  # noqa: E731
+    load_records = lambda: [Connection.from_dict(d) for d in json.loads(data)]  # noqa: E731
+    dict_bytes = retained_bytes(load_dicts)
+    record_bytes = retained_bytes(load_records)
+    dict_seconds = load_seconds(load_dicts)
+    record_seconds = load_seconds(load_records)
+    return {
+        'dict_bytes_per_connection': dict_bytes / size,
+        'connection_bytes_per_connection': record_bytes / size,
+        'saving': 1 - record_bytes / dict_bytes,
+        'dict_load_ms': dict_seconds * 1000,
+        'connection_load_ms': record_seconds * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure memory per saved connection.")
+    parser.add_argument('--sizes', default=",".join(map(str, DEFAULT_SIZES)))
+    parser.add_argument('--output', help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    isolate_environment()
+    results = {}
+    print(f"{'size':>8}{'dict B':>10}{'record B':>10}{'saving':>9}{'dict ms':>10}{'record ms':>11}")
+    for size in (int(size) for size in args.sizes.split(',') if size):
+        result = results[str(size)] = measure(size)
+        print(f"{size:>8}{result['dict_bytes_per_connection']:>10.0f}{result['connection_bytes_per_connection']:>10.0f}"
+              f"{result['saving']:>9.0%}{result['dict_load_ms']:>10.1f}{result['connection_load_ms']:>11.1f}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
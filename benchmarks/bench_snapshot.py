@@ -0,0 +1,79 @@
+"""Snapshot size and load/save time: the old JSON connections.dat vs the binary layout.
+
+    python benchmarks/bench_snapshot.py
+    python benchmarks/bench_snapshot.py --sizes 100000 --fake-cipher --output snapshot.json
+
+Loading goes through ConnectionStore.load() for both layouts, so it includes
+decryption and building the Connection records the window works with.
+"""
+import os
+import sys
+import json
+import argparse
+
+from bench_data_layer import FakeCipher, isolate_environment, make_connections, timed, summarize
+
+DEFAULT_SIZES = (10_000, 100_000)
+
+
+def write_json_snapshot(store, connections):
+    """Write connections.dat the way nuTTY did before the binary layout."""
+    from writer import atomic_write
+    from connection import connection_to_json
+    atomic_write(store.path, store.cipher_suite.encrypt(json.dumps(connections, default=connection_to_json).encode()))
+
+
+def measure(size, cipher, repeat):
+    from config import get_connections_file_path
+    from store import ConnectionStore
+    from connection import Connection
+
+    path = get_connections_file_path()
+    for stale in (path, path + '.journal', path + '.journal.old'):
+        if os.path.exists(stale):
+            os.remove(stale)
+    store = ConnectionStore(path, cipher)
+    connections = [Connection.from_dict(connection) for connection in make_connections(size, seed=size)]
+
+    results = {}
+    for layout, save in (('json', lambda: write_json_snapshot(store, connections)),
+                         ('binary', lambda: store.compact(connections))):
+        results[layout] = {
+            'save': summarize(timed(save, repeat)),
+            'bytes': os.path.getsize(path),
+            'load': summarize(timed(store.load, repeat)),
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the JSON and binary connection snapshots.")
+    parser.add_argument('--sizes', default=",".join(map(str, DEFAULT_SIZES)))
+    parser.add_argument('--repeat', type=int, default=3, help="runs per measurement (default: %(default)s)")
+    parser.add_argument('--fake-cipher', action='store_true', help="skip Fernet to time everything but encryption")
+    parser.add_argument('--output', help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    isolate_environment()
+    if args.fake_cipher:
+        cipher = FakeCipher()
+    else:
+        from cryptography.fernet import Fernet
+        cipher = Fernet(Fernet.generate_key())
+
+    results = {}
+    print(f"{'size':>8}{'layout':>8}{'bytes':>12}{'B/conn':>8}{'save ms':>10}{'load ms':>10}")
+    for size in (int(size) for size in args.sizes.split(',') if size):
+        results[str(size)] = measure(size, cipher, args.repeat)
+        for layout, result in results[str(size)].items():
+            print(f"{size:>8}{layout:>8}{result['bytes']:>12}{result['bytes'] / size:>8.0f}"
+                  f"{result['save']['min_ms']:>10.1f}{result['load']['min_ms']:>10.1f}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'cipher': 'fake' if args.fake_cipher else 'fernet',
+                       'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
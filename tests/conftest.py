@@ -0,0 +1,34 @@
+"""Shared setup: the app modules on sys.path, and every nuTTY path in a throwaway directory."""
+import os
+import sys
+import tempfile
+
+import pytest
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'app')
+
+# Before any app module is imported, since config resolves its directories at import time
+_root = tempfile.mkdtemp(prefix="nutty-tests-")
+for _variable, _name in (('XDG_CONFIG_HOME', 'config'), ('XDG_CACHE_HOME', 'cache'), ('XDG_RUNTIME_DIR', 'run')):
+    os.environ[_variable] = os.path.join(_root, _name)
+    os.makedirs(os.environ[_variable], mode=0o700, exist_ok=True)
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.abspath(APP_DIR))
+
+
+@pytest.fixture(scope='session')
+def qapp():
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def controller(qapp, tmp_path, monkeypatch):
+    """A Controller with an unlocked, empty store of its own; probing stays off."""
+    from cryptography.fernet import Fernet
+    import controller as controller_module
+    monkeypatch.setattr(controller_module, 'get_connections_file_path', lambda: str(tmp_path / 'connections.dat'))
+    controller = controller_module.Controller({})
+    controller.open_store(Fernet(Fernet.generate_key()))
+    yield controller
+    controller.shutdown()
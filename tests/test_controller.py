@@ -0,0 +1,40 @@
+from store import ConnectionStore
+
+
+def stored(controller):
+    """What a fresh process would read from the controller's store."""
+    store = controller.store
+    return {connection['id']: connection for connection in ConnectionStore(store.path, store.cipher_suite).load()}
+
+
+def test_edits_reach_the_store_once_flushed(controller):
+    controller.add_connection({'name': 'web', 'username': 'me', 'domain': 'web.example.com', 'protocol': 'SSH',
+                               'x11': False})
+    controller.add_connections([{'name': f'db{n}', 'username': 'me', 'domain': f'db{n}.example.com',
+                                 'protocol': 'SSH', 'x11': False} for n in range(3)])
+    model = controller.connection_list_model
+    edited = dict(model.get_connection(1), name='db-primary')
+    controller.update_connection(1, edited)
+    controller.remove_connections([3])
+    assert controller.flush(timeout=10)
+
+    assert {connection['name'] for connection in stored(controller).values()} == {'web', 'db-primary', 'db1'}
+
+
+def test_flush_covers_a_compaction(controller):
+    controller.store.compact_threshold = 5
+    controller.add_connections([{'name': f'h{n}', 'username': 'me', 'domain': 'example.com', 'protocol': 'SSH',
+                                 'x11': False} for n in range(20)])
+    for row in range(20):
+        controller.update_connection(row, dict(controller.connection_list_model.get_connection(row), description='x'))
+    assert controller.flush(timeout=10)
+    assert len(stored(controller)) == 20
+    assert all(connection['description'] == 'x' for connection in stored(controller).values())
+
+
+def test_passwords_from_the_dialog_are_stored_sealed(controller):
+    controller.add_connection({'name': 'web', 'username': 'me', 'domain': 'web.example.com', 'protocol': 'SSH',
+                               'x11': False, 'password': 'hunter2'})
+    assert controller.flush(timeout=10)
+    web = next(iter(stored(controller).values()))
+    assert 'password' not in web and controller.get_password(web) == 'hunter2'
@@ -0,0 +1,14 @@
+from delegates import ConnectionItemDelegate
+
+
+def test_the_name_line_only_makes_room_for_a_drawn_badge(qapp):
+    delegate = ConnectionItemDelegate({})
+    connection = {'name': 'a-connection-name-much-too-long-for-its-row', 'domain': 'example.com', 'username': 'me'}
+    width = delegate.palette.metrics[0].horizontalAdvance(connection['name']) - 10
+
+    with_badge = delegate.layout_text(connection, width)[0].text()
+    delegate.show_status = False
+    without_badge = delegate.layout_text(connection, width)[0].text()
+    assert len(without_badge) > len(with_badge)
+    delegate.show_status = True
+    assert delegate.layout_text(connection, width)[0].text() == with_badge
@@ -0,0 +1,103 @@
+import os
+import time
+import threading
+
+import pytest
+from PyQt5.QtCore import QObject, QCoreApplication
+
+from connection import Connection
+from instance import acquire_instance_lock, instance_running, send_request
+from instance_server import InstanceServer
+
+
+class FakeWindow(QObject):
+    """The parts of MainWindow the instance server uses."""
+
+    def __init__(self, controller):
+        super().__init__()
+        self.controller = controller
+        self.shown = 0
+
+    def show_window(self):
+        self.shown += 1
+
+
+class FakeController:
+    def __init__(self, connections):
+        self.connection_list_model = type('Model', (), {'connections': connections})()
+        self.added = []
+        self.store_open = False
+
+    def is_store_open(self):
+        return self.store_open
+
+    def add_connection(self, connection):
+        self.added.append(connection)
+
+
+@pytest.fixture
+def runtime(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_RUNTIME_DIR', str(tmp_path))
+
+
+def run_events_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        QCoreApplication.processEvents()
+        time.sleep(0.005)
+
+
+def start_request(request):
+    """Send request from a client thread, as another process would; returns its reply list."""
+    reply = []
+    thread = threading.Thread(target=lambda: reply.append(send_request(request, connect_timeout=2, reply_timeout=5)))
+    thread.start()
+    return thread, reply
+
+
+def ask(qapp, request):
+    thread, reply = start_request(request)
+    run_events_until(lambda: not thread.is_alive())
+    return reply[0]
+
+
+def test_only_one_process_holds_the_instance_lock(runtime):
+    assert not instance_running()
+    fd = acquire_instance_lock()
+    try:
+        # flock locks belong to the open file, so a second open conflicts even in one process
+        assert acquire_instance_lock() is None
+        assert instance_running()
+    finally:
+        os.close(fd)
+    assert not instance_running()
+
+
+def test_no_running_instance_means_no_reply(runtime):
+    assert send_request({'command': 'show'}, connect_timeout=0.2) is None
+
+
+def test_requests_are_answered_once_the_store_is_open(qapp, runtime):
+    controller = FakeController([Connection.from_dict({'id': 'a', 'name': 'web', 'domain': 'web.example.com'})])
+    window = FakeWindow(controller)
+    fd = acquire_instance_lock()
+    server = InstanceServer(window)
+    try:
+        assert server.listen()
+        assert ask(qapp, {'command': 'show'}) == {'ok': True}
+        assert window.shown == 1
+
+        # Held back until the connections are unlocked
+        thread, reply = start_request({'command': 'list'})
+        run_events_until(lambda: server.waiting)
+        controller.store_open = True
+        server.store_ready()
+        run_events_until(lambda: not thread.is_alive())
+        assert reply[0]['connections'][0]['name'] == 'web'
+
+        assert not ask(qapp, {'command': 'add', 'connection': {'name': 'x'}})['ok']
+        assert ask(qapp, {'command': 'bogus'})['ok'] is False
+    finally:
+        server.close()
+        os.close(fd)
@@ -0,0 +1,108 @@
+import time
+import threading
+import subprocess
+
+from launcher import BulkLauncher
+
+
+class FakeProcess:
+    """Stands in for a terminal: wait() reports its exit code, or times out while it 'runs'."""
+
+    def __init__(self, returncode=None, runtime=0.0):
+        self.returncode = returncode
+        self.runtime = runtime
+
+    def wait(self, timeout=None):
+        time.sleep(self.runtime)
+        if self.returncode is None:
+            raise subprocess.TimeoutExpired('terminal', timeout)
+        return self.returncode
+
+
+class RecordingStart:
+    """A stubbed spawn that records when each launch starts and how many overlap."""
+
+    def __init__(self, runtime=0.0, outcomes=None):
+        self.runtime = runtime
+        self.outcomes = outcomes or {}
+        self.lock = threading.Lock()
+        self.started = []
+        self.active = 0
+        self.max_active = 0
+
+    def __call__(self, connection, command):
+        with self.lock:
+            self.started.append((connection['name'], time.monotonic()))
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        outcome = self.outcomes.get(connection['name'])
+        if isinstance(outcome, Exception):
+            with self.lock:
+                self.active -= 1
+            raise outcome
+        return ActiveProcess(self, outcome, self.runtime)
+
+
+class ActiveProcess(FakeProcess):
+    def __init__(self, start, returncode, runtime):
+        super().__init__(returncode, runtime)
+        self.start = start
+
+    def wait(self, timeout=None):
+        try:
+            return super().wait(timeout)
+        finally:
+            with self.start.lock:
+                self.start.active -= 1
+
+
+def run(launcher, names, **kwargs):
+    done = threading.Event()
+    reports = []
+    launcher.launch([({'name': name}, ['term', name]) for name in names],
+                    lambda report: (reports.append(report), done.set()), **kwargs)
+    assert done.wait(10), "the launch never finished"
+    return reports[0]
+
+
+def test_spawns_are_staggered():
+    start = RecordingStart()
+    report = run(BulkLauncher(concurrency=4, stagger=0.05, start=start), [f'h{n}' for n in range(6)])
+    times = sorted(started for _, started in start.started)
+    assert all(later - earlier >= 0.045 for earlier, later in zip(times, times[1:]))
+    assert len(report.started) == 6
+
+
+def test_no_more_than_concurrency_spawns_at_once():
+    start = RecordingStart(runtime=0.05)
+    report = run(BulkLauncher(concurrency=3, stagger=0, start=start), [f'h{n}' for n in range(12)])
+    assert start.max_active == 3
+    assert len(report.started) == 12
+
+
+def test_failures_are_reported_per_server():
+    start = RecordingStart(outcomes={'bad-exit': 1, 'no-terminal': FileNotFoundError("no such terminal"), 'quick': 0})
+    report = run(BulkLauncher(concurrency=2, stagger=0, start=start),
+                 ['good', 'bad-exit', 'no-terminal', 'quick'], failures=[('unbuildable', "no command")])
+    assert sorted(report.started) == ['good', 'quick']
+    assert dict(report.failures) == {
+        'unbuildable': "no command",
+        'bad-exit': "term exited with status 1",
+        'no-terminal': "no such terminal",
+    }
+    assert report.total == 5
+    assert report.summary().startswith("Opened 2 of 5 sessions.")
+
+
+def test_a_lead_launch_opens_before_the_tabs():
+    start = RecordingStart(runtime=0.1)
+    report = run(BulkLauncher(concurrency=4, stagger=0, start=start), ['window', 'tab1', 'tab2', 'tab3'], lead=True)
+    assert start.started[0][0] == 'window'
+    # The tabs only start once the first terminal has been given its spawn check
+    assert min(started for name, started in start.started[1:]) - start.started[0][1] >= 0.09
+    assert len(report.started) == 4
+
+
+def test_a_lone_lead_launch_still_finishes():
+    report = run(BulkLauncher(start=RecordingStart()), ['only'], lead=True)
+    assert report.started == ['only']
@@ -0,0 +1,62 @@
+import socket
+import threading
+
+import pytest
+
+from probe import ProbeEngine, create_probe_engine, UP, DOWN
+
+
+@pytest.fixture
+def engine():
+    results = {}
+    expected = [0]
+    done = threading.Event()
+
+    def on_result(target, result):
+        results[target] = result
+        if len(results) == expected[0]:
+            done.set()
+
+    engine = ProbeEngine(on_result=on_result, timeout=2.0)
+
+    def probe(connections):
+        expected[0] = len(connections)
+        assert engine.probe(connections) == len(connections)
+        assert done.wait(10), f"only {len(results)} of {len(connections)} probes finished"
+        return results
+
+    yield probe
+    engine.stop()
+
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_probe_reports_listening_and_closed_ports(engine):
+    with socket.socket() as server:
+        server.bind(('127.0.0.1', 0))
+        server.listen()
+        open_port = server.getsockname()[1]
+        refused_port = closed_port()
+        results = engine([
+            {'domain': '127.0.0.1', 'port': open_port},
+            {'domain': '127.0.0.1', 'port': refused_port},
+        ])
+    assert results[('127.0.0.1', open_port)].status == UP
+    assert results[('127.0.0.1', open_port)].latency >= 0
+    assert results[('127.0.0.1', refused_port)].status == DOWN
+
+
+def test_probe_marks_unresolvable_names_down(engine):
+    overlong = 'a' * 300 + '.example'
+    results = engine([{'domain': overlong, 'port': 22}, {'domain': 'bad\x00name', 'port': 22}])
+    assert results[(overlong, 22)].status == DOWN
+    assert results[('bad\x00name', 22)].status == DOWN
+
+
+def test_probing_is_opt_in():
+    assert create_probe_engine({}) is None
+    assert create_probe_engine({'host_probe': True}) is not None
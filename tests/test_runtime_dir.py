@@ -0,0 +1,74 @@
+import os
+import sys
+import subprocess
+
+import pytest
+
+import config
+import name_index
+
+
+@pytest.fixture
+def runtime_base(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_RUNTIME_DIR', str(tmp_path))
+    return tmp_path
+
+
+def test_runtime_dir_is_created_private(runtime_base):
+    path = config.runtime_dir('ssh')
+    assert os.path.dirname(path) == os.path.join(runtime_base, f"{config.APP_NAME}-{os.getuid()}")
+    for directory in (path, os.path.dirname(path)):
+        assert os.stat(directory).st_mode & 0o777 == 0o700
+
+
+def test_runtime_dir_refuses_a_directory_others_can_enter(runtime_base):
+    path = runtime_base / f"{config.APP_NAME}-{os.getuid()}"
+    path.mkdir(mode=0o755)
+    path.chmod(0o755)
+    with pytest.raises(PermissionError):
+        config.runtime_dir()
+
+
+def test_runtime_dir_refuses_a_symlink(runtime_base, tmp_path_factory):
+    target = tmp_path_factory.mktemp('elsewhere')
+    target.chmod(0o700)
+    os.symlink(target, runtime_base / f"{config.APP_NAME}-{os.getuid()}")
+    with pytest.raises(PermissionError):
+        config.runtime_dir()
+
+
+def test_name_index_is_only_kept_in_a_session_runtime_dir(runtime_base, monkeypatch):
+    connections = [{'name': 'web'}, {'name': 'db'}]
+    name_index.write_name_index(connections)
+    assert name_index.read_name_index() == ['db', 'web']
+
+    monkeypatch.delenv('XDG_RUNTIME_DIR')
+    assert name_index.name_index_path() is None
+    name_index.write_name_index(connections)
+    assert name_index.read_name_index() is None
+
+
+def test_multiplexing_is_off_when_the_socket_directory_is_unsafe(runtime_base):
+    from multiplex import MultiplexManager, control_dir
+    manager = MultiplexManager({'ssh_multiplexing': True}, ssh='ssh')
+    connection = {'protocol': 'SSH', 'username': 'me', 'domain': 'example.com'}
+    assert f"ControlPath={os.path.join(control_dir(), '%C')}" in manager.control_options(connection)
+
+    os.chmod(control_dir(), 0o755)
+    assert manager.control_options(connection) == []
+
+
+def test_reading_the_name_index_from_an_unsafe_directory_gives_none(runtime_base):
+    name_index.write_name_index([{'name': 'web'}])
+    (runtime_base / f"{config.APP_NAME}-{os.getuid()}").chmod(0o755)
+    assert name_index.read_name_index() is None
+
+
+def test_names_command_does_not_load_qt(runtime_base):
+    name_index.write_name_index([{'name': 'web'}, {'name': 'db'}])
+    script = ("import sys, cli; code = cli.main(['names', 'w']); "
+              "print(sorted(name for name in sys.modules if name.startswith('PyQt5'))); sys.exit(code)")
+    result = subprocess.run([sys.executable, '-c', script], cwd=os.path.dirname(config.__file__), env=dict(os.environ),
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines() == ['web', '[]']
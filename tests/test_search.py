@@ -0,0 +1,52 @@
+from search import SearchIndex
+
+
+def make_connection(connection_id, name, domain='example.com', username='me', description=''):
+    return {'id': connection_id, 'name': name, 'domain': domain, 'username': username, 'description': description}
+
+
+def test_every_term_must_match_and_names_rank_first():
+    index = SearchIndex([
+        make_connection('a', 'db-primary', 'db1.prod.example.com'),
+        make_connection('b', 'web', 'web.prod.example.com', description='talks to db'),
+        make_connection('c', 'db-replica', 'db2.staging.example.com'),
+    ])
+    assert index.ranked('db prod') == ['a', 'b']
+    assert index.ranked('db')[:2] == ['a', 'c']
+    assert index.ranked('nothing like it') == []
+
+
+def test_typos_still_match():
+    index = SearchIndex([make_connection('a', 'production-gateway'), make_connection('b', 'staging')])
+    assert index.ranked('prodution') == ['a']
+
+
+def test_incremental_changes():
+    index = SearchIndex([make_connection('a', 'alpha'), make_connection('b', 'beta')])
+    index.update(make_connection('a', 'gamma'))
+    index.remove('b')
+    index.add(make_connection('c', 'alphabet'))
+    assert index.ranked('alpha') == ['c']
+    assert index.ranked('gamma') == ['a']
+    assert len(index) == 2
+
+
+def test_changes_made_while_building_are_kept():
+    index = SearchIndex.build_in_background([make_connection(str(n), f'host{n}') for n in range(2000)])
+    index.add(make_connection('new', 'freshly-added'))
+    index.remove('0')
+    assert index.ranked('freshly') == ['new']
+    assert '0' not in index.search('host0')
+
+
+def test_short_numbered_terms_need_every_trigram():
+    index = SearchIndex([make_connection('1', 'host1'), make_connection('2', 'host2'), make_connection('10', 'host10')])
+    assert sorted(index.ranked('host1')) == ['1', '10']
+
+
+def test_rebuild_replaces_a_build_in_progress():
+    index = SearchIndex.build_in_background([make_connection(str(n), f'old{n}') for n in range(5000)])
+    index.rebuild_in_background([make_connection(str(n), f'new{n}') for n in range(100)])
+    assert index.wait_until_ready(5)
+    assert len(index) == 100
+    assert index.ranked('old1') == []
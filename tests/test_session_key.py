@@ -0,0 +1,86 @@
+import sys
+import textwrap
+
+import pytest
+
+import cli
+from config import APP_NAME, KEY_ID
+from session_key import SessionKeyCache, session_key_cache, unlock_key
+
+
+class FakeKeyring:
+    """A keyring backend holding passwords in a dict, counting lookups."""
+
+    def __init__(self):
+        self.passwords = {}
+        self.lookups = 0
+
+    def get_password(self, service, username):
+        self.lookups += 1
+        return self.passwords.get((service, username))
+
+    def set_password(self, service, username, password):
+        self.passwords[(service, username)] = password
+
+
+@pytest.fixture
+def keyctl(tmp_path):
+    """A stand-in for keyctl(1) that keeps the user keyring in a JSON file."""
+    keys = tmp_path / 'keys.json'
+    script = tmp_path / 'keyctl'
+    script.write_text(f"#!{sys.executable}\n" + textwrap.dedent(f"""\
+        import sys, json
+        path = {str(keys)!r}
+        try:
+            keys = json.load(open(path))
+        except FileNotFoundError:
+            keys = {{}}
+        command, args = sys.argv[1], sys.argv[2:]
+        if command == 'request':
+            if args[1] not in keys:
+                sys.exit(1)
+            print(args[1])
+        elif command == 'pipe':
+            sys.stdout.write(keys[args[0]])
+        elif command == 'padd':
+            keys[args[1]] = sys.stdin.read()
+            print(args[1])
+        elif command == 'unlink':
+            keys.pop(args[0], None)
+        json.dump(keys, open(path, 'w'))
+        """))
+    script.chmod(0o700)
+    return str(script)
+
+
+def test_the_cache_is_off_unless_turned_on():
+    assert session_key_cache({}) is None
+    assert session_key_cache({'session_key_cache': True}) is not None
+
+
+def test_a_key_is_generated_once_and_kept_in_the_keyring():
+    backend = FakeKeyring()
+    key = unlock_key({}, backend)
+    assert backend.passwords[(APP_NAME, KEY_ID)] == key.decode()
+    assert unlock_key({}, backend) == key
+    assert backend.lookups == 2
+
+
+def test_the_session_cache_spares_the_keyring(keyctl, monkeypatch):
+    monkeypatch.setattr('shutil.which', lambda name: keyctl if name == 'keyctl' else None)
+    backend = FakeKeyring()
+    config = {'session_key_cache': True}
+    key = unlock_key(config, backend)
+    assert unlock_key(config, backend) == key
+    assert backend.lookups == 1
+
+    # nutty lock drops the cached key, so the next unlock goes back to the keyring
+    assert cli.main(['lock']) == 0
+    assert unlock_key(config, backend) == key
+    assert backend.lookups == 2
+
+
+def test_without_keyctl_every_lookup_misses():
+    cache = SessionKeyCache(keyctl=None)
+    cache.put(b'key')
+    assert not cache.available() and cache.get() is None
@@ -0,0 +1,78 @@
+import os
+import sys
+import threading
+
+import pytest
+
+from sessions import SessionSupervisor, LaunchStats
+
+
+@pytest.fixture
+def supervisor(tmp_path):
+    exited = []
+    all_done = threading.Event()
+    supervisor = SessionSupervisor(str(tmp_path / 'stats.json'), on_exit=lambda session: (exited.append(session), all_done.set()))
+    supervisor.exited = exited
+    supervisor.all_done = all_done
+    yield supervisor
+    supervisor.stop()
+
+
+def child(code, seconds=0.0):
+    return [sys.executable, '-c', f"import time, sys; time.sleep({seconds}); sys.exit({code})"]
+
+
+def wait_for_exits(supervisor, count):
+    for _ in range(100):
+        if len(supervisor.exited) >= count:
+            return
+        supervisor.all_done.wait(0.1)
+        supervisor.all_done.clear()
+    raise AssertionError(f"only {len(supervisor.exited)} of {count} sessions were reaped")
+
+
+def test_exited_terminals_are_reaped(supervisor):
+    processes = [supervisor.spawn(child(0), {'id': f'c{n}', 'name': f'h{n}'}, 'XTerm') for n in range(3)]
+    wait_for_exits(supervisor, 3)
+    for process in processes:
+        # Already waited for, so there is no zombie left to collect
+        with pytest.raises(ChildProcessError):
+            os.waitpid(process.pid, os.WNOHANG)
+    assert supervisor.active_sessions() == []
+
+
+def test_exit_codes_and_lifetimes_are_recorded(supervisor):
+    supervisor.spawn(child(0, 0.3), {'id': 'ok', 'name': 'ok'}, 'XTerm')
+    supervisor.spawn(child(3), {'id': 'bad', 'name': 'bad'}, 'XTerm')
+    wait_for_exits(supervisor, 2)
+
+    by_name = {session.name: session for session in supervisor.exited}
+    assert by_name['bad'].returncode == 3 and by_name['ok'].returncode == 0
+    assert by_name['ok'].duration() >= 0.3
+
+    connections, terminals = supervisor.stats_snapshot()
+    assert (connections['bad'].exits, connections['bad'].error_exits) == (1, 1)
+    assert (connections['ok'].exits, connections['ok'].error_exits) == (1, 0)
+    assert connections['ok'].lifetime_max >= 0.3
+    assert (terminals['XTerm'].launches, terminals['XTerm'].exits, terminals['XTerm'].error_exits) == (2, 2, 1)
+    assert terminals['XTerm'].average_spawn() > 0
+
+
+def test_statistics_survive_a_restart(tmp_path):
+    path = str(tmp_path / 'stats.json')
+    supervisor = SessionSupervisor(path)
+    stats = supervisor.stats_for(supervisor.connection_stats, 'c1')
+    stats.record_spawn(0.02)
+    stats.record_exit(12.5, 1)
+    supervisor.stats_for(supervisor.terminal_stats, 'Konsole').record_spawn(0.04)
+    supervisor.save_stats()
+
+    connections, terminals = SessionSupervisor(path).load_stats()
+    assert connections['c1'].to_dict() == stats.to_dict()
+    assert terminals['Konsole'].to_dict() == LaunchStats(1, 0.04, 0.04).to_dict()
+
+
+def test_unreadable_statistics_are_ignored(tmp_path):
+    path = tmp_path / 'stats.json'
+    path.write_text('{"connections": {"c1": {"launches": "many", "bogus": 1}}}')
+    assert SessionSupervisor(str(path)).load_stats() == ({}, {})
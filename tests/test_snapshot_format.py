@@ -0,0 +1,34 @@
+import pytest
+
+from connection import Connection
+from snapshot_format import encode_connections, decode_connections, VERSION
+
+
+def test_values_keep_their_types():
+    records = [
+        {'id': 'a', 'x11': True, 'port': 1, 'secret': None, 'weight': 1.0},
+        {'id': 'b', 'x11': False, 'port': 0, 'name': '1'},
+        {'id': 'c', 'tags': ['x'], 'options': {'y': [1, None]}, 'name': '\ud800 lone surrogate'},
+        {},
+    ]
+    decoded = decode_connections(encode_connections(records))
+    assert [connection.to_dict() for connection in decoded] == records
+    for record, connection in zip(records, decoded):
+        for key, value in record.items():
+            assert type(connection[key]) is type(value)
+
+
+def test_lists_are_never_shared_between_connections():
+    decoded = decode_connections(encode_connections([{'id': 'a', 'tags': ['x']}, {'id': 'b', 'tags': ['x']}]))
+    decoded[0]['tags'].append('y')
+    assert decoded[1]['tags'] == ['x']
+
+
+def test_repeated_strings_are_stored_once():
+    connections = [Connection.from_dict({'id': str(n), 'username': 'administrator', 'protocol': 'SSH'}) for n in range(100)]
+    assert encode_connections(connections).count(b'administrator') == 1
+
+
+def test_unknown_versions_are_refused():
+    with pytest.raises(ValueError):
+        decode_connections(encode_connections([]), VERSION + 1)
@@ -0,0 +1,76 @@
+import os
+
+from ssh_import import SshConfigImporter, IMPORT_SOURCE, forget_hosts
+
+
+def write(path, text):
+    path.write_text(text)
+    # Some filesystems keep whole-second mtimes; make sure a rewrite looks changed
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def importer_for(tmp_path, text):
+    config = tmp_path / 'config'
+    write(config, text)
+    return config, SshConfigImporter(str(config), str(tmp_path / 'state.json'))
+
+
+def test_first_value_wins_and_wildcards_apply(tmp_path):
+    _, importer = importer_for(tmp_path, """\
+Host web db
+    HostName %h.example.com
+    User deploy
+Host db
+    Port 2222
+    User ignored
+Host *.internal bastion-?
+    User nobody
+Host *
+    ForwardX11 yes
+    IdentityFile ~/.ssh/id_ed25519
+""")
+    records = importer.records()
+    assert set(records) == {'web', 'db'}
+    db = records['db']
+    assert (db['domain'], db['username'], db['port'], db['x11']) == ('db.example.com', 'deploy', 2222, True)
+    assert db['identity_file'] == os.path.expanduser('~/.ssh/id_ed25519') and db['use_identity_file']
+    assert db['source'] == IMPORT_SOURCE and db['ssh_alias'] == 'db'
+    assert 'port' not in records['web']
+
+
+def test_includes_are_followed(tmp_path):
+    (tmp_path / 'conf.d').mkdir()
+    write(tmp_path / 'conf.d' / 'work', "Host work\n    HostName work.example.com\n")
+    _, importer = importer_for(tmp_path, f"Include {tmp_path}/conf.d/*\nHost home\n    HostName home.example.com\n")
+    assert set(importer.records()) == {'work', 'home'}
+
+
+def test_only_changed_hosts_get_a_new_hash(tmp_path):
+    config, importer = importer_for(tmp_path, "Host a\n    HostName a.example.com\nHost b\n    HostName b.example.com\n")
+    before = importer.records()
+    assert not importer.changed()
+
+    write(config, "Host a\n    HostName a.example.com\nHost b\n    HostName b2.example.com\n")
+    assert importer.changed()
+    after = importer.records()
+    assert after['a']['import_hash'] == before['a']['import_hash']
+    assert after['b']['import_hash'] != before['b']['import_hash']
+
+
+def test_deleted_hosts_stay_deleted_until_their_entry_changes(tmp_path):
+    config, importer = importer_for(tmp_path, "Host web\n    HostName web.example.com\nHost db\n    HostName db.example.com\n")
+    forget_hosts([importer.records()['web']], importer.state_file)
+    assert set(importer.records()) == {'db'}
+    # A fresh importer, as at the next startup, reads the deletion from the state file
+    assert set(SshConfigImporter(str(config), importer.state_file).records()) == {'db'}
+
+    write(config, "Host web\n    HostName new.example.com\nHost db\n    HostName db.example.com\n")
+    assert set(importer.records()) == {'web', 'db'}
+
+
+def test_manual_import_restores_deleted_hosts(tmp_path):
+    _, importer = importer_for(tmp_path, "Host web\n    HostName web.example.com\n")
+    forget_hosts([importer.records()['web']], importer.state_file)
+    assert set(importer.records(restore_deleted=True)) == {'web'}
+    assert set(importer.records()) == {'web'}
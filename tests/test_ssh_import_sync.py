@@ -0,0 +1,37 @@
+from ssh_import import IMPORT_SOURCE, read_state
+
+
+def make_record(alias, domain, **options):
+    record = {
+        'name': alias, 'username': 'me', 'domain': domain, 'protocol': 'SSH', 'x11': False,
+        'description': "Imported from ~/.ssh/config", 'use_identity_file': False, 'identity_file': None,
+        'ssh_alias': alias, 'source': IMPORT_SOURCE, **options,
+    }
+    record['import_hash'] = repr(sorted(record.items()))
+    return record
+
+
+def test_sync_keeps_fields_the_user_set(controller):
+    controller.apply_ssh_import({'web': make_record('web', 'old.example.com', port=2222)})
+    model = controller.connection_list_model
+    connection = dict(model.get_connection(0), password='hunter2', multiplex=True, prewarm=True, group='prod')
+    controller.update_connection(0, connection)
+    secret = model.get_connection(0)['secret']
+
+    assert controller.apply_ssh_import({'web': make_record('web', 'new.example.com')}) == (0, 1, 0)
+    synced = model.get_connection(0)
+    assert synced['domain'] == 'new.example.com'
+    # Dropped from the Host entry, so dropped from the connection
+    assert 'port' not in synced
+    assert (synced['secret'], synced['multiplex'], synced['prewarm'], synced['group']) == (secret, True, True, 'prod')
+    assert controller.get_password(synced) == 'hunter2'
+
+
+def test_deleting_an_imported_host_records_a_tombstone(controller):
+    records = {'web': make_record('web', 'web.example.com'), 'db': make_record('db', 'db.example.com')}
+    controller.apply_ssh_import(records)
+    model = controller.connection_list_model
+    web = next(connection for connection in model.connections if connection['ssh_alias'] == 'web')
+    controller.remove_connections([model.row_for_id(web['id'])])
+    deleted = read_state().get('deleted', {})
+    assert deleted.get('web') == records['web']['import_hash'] and 'db' not in deleted
@@ -0,0 +1,159 @@
+import json
+import os
+
+import pytest
+from cryptography.fernet import Fernet
+
+from connection import Connection
+from store import ConnectionStore
+
+
+@pytest.fixture
+def cipher():
+    return Fernet(Fernet.generate_key())
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'connections.dat')
+
+
+def make_connection(number, **fields):
+    return {'id': f'c{number}', 'name': f'host{number}', 'username': 'me', 'domain': f'h{number}.example.com',
+            'protocol': 'SSH', 'x11': False, **fields}
+
+
+def saved(store, *connections):
+    for connection in connections:
+        store.put(connection)
+    store.flush_pending()
+
+
+def by_id(connections):
+    return {connection['id']: connection.to_dict() for connection in connections}
+
+
+def test_journal_replays_puts_updates_and_deletes(path, cipher):
+    store = ConnectionStore(path, cipher)
+    assert store.load() == []
+    saved(store, make_connection(1), make_connection(2), make_connection(3))
+    saved(store, make_connection(2, name='renamed'))
+    store.delete('c3')
+    store.flush_pending()
+
+    loaded = by_id(ConnectionStore(path, cipher).load())
+    assert loaded == {'c1': make_connection(1), 'c2': make_connection(2, name='renamed')}
+
+
+def test_compaction_round_trips_every_field(path, cipher):
+    store = ConnectionStore(path, cipher)
+    store.load()
+    connections = [
+        Connection.from_dict(make_connection(1, port=2222, group='prod/eu', multiplex=True)),
+        Connection.from_dict(make_connection(2, description='ünïcödé \U0001f600', identity_file=None)),
+        # Keys from a newer version survive, whatever their type
+        Connection.from_dict(make_connection(3, tags=['a', 'b'], options={'x': 1}, weight=1.5)),
+    ]
+    saved(store, *connections)
+    assert store.compact(connections)
+    assert not os.path.exists(store.journal_path)
+
+    reopened = ConnectionStore(path, cipher)
+    assert by_id(reopened.load()) == by_id(connections)
+    assert not reopened.needs_compaction()
+
+
+def test_records_after_a_compaction_are_replayed_on_top(path, cipher):
+    store = ConnectionStore(path, cipher, compact_threshold=3)
+    store.load()
+    connections = [Connection.from_dict(make_connection(number)) for number in range(3)]
+    saved(store, *connections)
+    assert store.needs_compaction()
+    store.compact(connections)
+    saved(store, make_connection(1, name='after'))
+
+    loaded = by_id(ConnectionStore(path, cipher).load())
+    assert loaded['c1']['name'] == 'after'
+    assert len(loaded) == 3
+
+
+def test_a_torn_record_is_dropped_and_cut_off(path, cipher):
+    store = ConnectionStore(path, cipher)
+    store.load()
+    saved(store, make_connection(1))
+    with open(store.journal_path, 'ab') as f:
+        f.write(b'gAAAAAtorn')
+
+    assert by_id(ConnectionStore(path, cipher).load()) == {'c1': make_connection(1)}
+    with open(store.journal_path, 'rb') as f:
+        assert f.read().endswith(b'\n')
+
+
+def test_passwords_are_sealed_and_revealed_on_demand(path, cipher):
+    store = ConnectionStore(path, cipher)
+    store.load()
+    connection = store.seal_secret(make_connection(1, password='hunter2'))
+    assert 'password' not in connection and connection['secret'] != 'hunter2'
+    saved(store, connection)
+
+    with open(store.journal_path, 'rb') as f:
+        assert b'hunter2' not in cipher.decrypt(f.readline().strip())
+    loaded = ConnectionStore(path, cipher).load()[0]
+    assert store.reveal_secret(loaded) == 'hunter2'
+    assert store.reveal_secret(store.seal_secret(make_connection(2, password=''))) is None
+
+
+def test_a_json_snapshot_is_read_and_marked_for_rewriting(path, cipher):
+    legacy = [{'name': 'old', 'username': 'me', 'domain': 'old.example.com', 'protocol': 'SSH', 'password': 'hunter2'}]
+    with open(path, 'wb') as f:
+        f.write(cipher.encrypt(json.dumps(legacy).encode()))
+
+    store = ConnectionStore(path, cipher)
+    connections = store.load()
+    assert store.needs_compaction()
+    connection = connections[0]
+    assert connection['id'] and 'password' not in connection
+    assert store.reveal_secret(connection) == 'hunter2'
+
+    store.compact(connections)
+    with open(path, 'rb') as f:
+        assert f.read().startswith(b'NUTTY')
+    assert by_id(ConnectionStore(path, cipher).load()) == by_id(connections)
+
+
+def test_read_changes_picks_up_another_writer(path, cipher):
+    ours = ConnectionStore(path, cipher)
+    connections = ours.load()
+    saved(ours, make_connection(1), make_connection(2))
+    connections = ours.load()
+
+    theirs = ConnectionStore(path, cipher)
+    theirs.load()
+    saved(theirs, make_connection(2, name='theirs'), make_connection(3))
+    theirs.delete('c1')
+    theirs.flush_pending()
+
+    assert ours.changed_on_disk()
+    # Changes we haven't read would be lost, so compaction waits for them
+    assert not ours.compact(connections)
+    changes, state = ours.read_changes(connections)
+    assert {connection_id: connection and connection['name'] for connection_id, connection in changes.items()} == \
+        {'c1': None, 'c2': 'theirs', 'c3': 'host3'}
+    ours.mark_synced(state)
+    assert not ours.changed_on_disk()
+
+
+def test_read_changes_reloads_after_another_compaction(path, cipher):
+    ours = ConnectionStore(path, cipher)
+    ours.load()
+    saved(ours, make_connection(1), make_connection(2))
+    connections = ours.load()
+
+    theirs = ConnectionStore(path, cipher)
+    current = [Connection.from_dict(make_connection(1, name='compacted'))]
+    theirs.load()
+    assert theirs.compact(current)
+
+    changes, state = ours.read_changes(connections)
+    assert changes['c2'] is None
+    assert changes['c1']['name'] == 'compacted'
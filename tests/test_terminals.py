@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+from terminals import TerminalRegistry, BUILTIN_TERMINALS
+
+
+def install(bin_dir, *commands):
+    for command in commands:
+        path = bin_dir / command
+        path.write_text("#!/bin/sh\n")
+        path.chmod(0o755)
+    # Some filesystems keep whole-second mtimes; make sure the directory looks changed
+    stat = bin_dir.stat()
+    os.utime(bin_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def bin_dir(tmp_path, monkeypatch):
+    path = tmp_path / 'bin'
+    path.mkdir()
+    install(path, 'xterm')
+    monkeypatch.setenv('PATH', str(path))
+    return path
+
+
+def make_registry(tmp_path, user_text=None):
+    user_file = tmp_path / 'terminals.json'
+    if user_text is not None:
+        user_file.write_text(user_text)
+    return TerminalRegistry(str(user_file), str(tmp_path / 'cache' / 'terminals.json'))
+
+
+def refreshed(registry):
+    results = []
+    found = registry.discover(results.append)
+    if registry.refresh_thread is not None:
+        registry.refresh_thread.join(5)
+    return found, results
+
+
+def test_a_fresh_cache_is_used_without_scanning(tmp_path, bin_dir, monkeypatch):
+    assert list(make_registry(tmp_path).discover()) == ['XTerm']
+    registry = make_registry(tmp_path)
+    monkeypatch.setattr(registry, 'scan', lambda: pytest.fail("scanned despite a fresh cache"))
+    assert refreshed(registry) == ({'XTerm': BUILTIN_TERMINALS['XTerm']}, [])
+
+
+@pytest.mark.parametrize('change', ['path', 'mtime'])
+def test_a_stale_cache_is_returned_and_rescanned(tmp_path, bin_dir, monkeypatch, change):
+    make_registry(tmp_path).discover()
+    if change == 'path':
+        other = tmp_path / 'other'
+        other.mkdir()
+        install(other, 'kitty')
+        monkeypatch.setenv('PATH', os.pathsep.join((str(bin_dir), str(other))))
+    else:
+        install(bin_dir, 'kitty')
+
+    found, results = refreshed(make_registry(tmp_path))
+    assert list(found) == ['XTerm']
+    assert [sorted(result) for result in results] == [['Kitty', 'XTerm']]
+    # The rescan rewrote the cache, so the next start uses it as is
+    assert refreshed(make_registry(tmp_path)) == (results[0], [])
+
+
+def test_a_corrupt_cache_means_a_full_scan(tmp_path, bin_dir):
+    cache_file = tmp_path / 'cache' / 'terminals.json'
+    cache_file.parent.mkdir()
+    cache_file.write_text('{"version": 1, "found": {"XTerm": ["xterm"]')
+    assert refreshed(make_registry(tmp_path)) == ({'XTerm': BUILTIN_TERMINALS['XTerm']}, [])
+
+
+@pytest.mark.parametrize('user_text', ['{"Foot": {"command": "foot"', '["Foot"]', ''])
+def test_a_malformed_terminals_file_leaves_the_builtins(tmp_path, bin_dir, user_text):
+    registry = make_registry(tmp_path, user_text)
+    assert registry.terminals == BUILTIN_TERMINALS
+    assert list(registry.discover()) == ['XTerm']
+
+
+def test_malformed_entries_are_skipped_and_the_rest_kept(tmp_path, bin_dir):
+    install(bin_dir, 'foot')
+    registry = make_registry(tmp_path, """{
+        "Foot": {"command": "foot", "args": ["-e"], "single_arg": false, "tab_args": ["--tab"]},
+        "Broken": {"args": ["-e"]},
+        "Numbers": {"command": 7},
+        "Bad Tabs": {"command": "foot", "tab_args": [1]}
+    }""")
+    assert set(registry.terminals) - set(BUILTIN_TERMINALS) == {'Foot'}
+    assert registry.terminals['Foot'] == ('foot', ['-e'], False)
+    assert registry.tab_args['Foot'] == ['--tab']
+    assert sorted(registry.discover()) == ['Foot', 'XTerm']
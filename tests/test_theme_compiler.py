@@ -0,0 +1,85 @@
+import os
+import json
+
+import pytest
+
+import config
+import theme_compiler
+from theme_compiler import compile_theme, compiled_stylesheet, CONNECTION_LIST, MAIN_BUTTONS, DELEGATE_ONLY_SUFFIXES
+
+BUNDLED_THEMES = sorted(theme for theme in os.listdir(config.DEV_THEMES_DIR)
+                        if os.path.isfile(os.path.join(config.DEV_THEMES_DIR, theme, 'styles.json')))
+
+
+def legacy_rules(theme_data):
+    """The rules MainWindow.apply_theme used to build inline, under the selectors they now compile to."""
+    def declarations(prefix, skip=()):
+        return [f"{key[len(prefix):]}: {value}" for key, value in theme_data.items()
+                if key.startswith(prefix) and not any(part in key for part in skip)
+                and not key.endswith(DELEGATE_ONLY_SUFFIXES)]
+
+    window = []
+    for declaration in declarations("window_"):
+        if declaration.startswith("background-image: "):
+            window += [declaration, "background-position: center", "background-repeat: no-repeat",
+                       "background-attachment: fixed"]
+        else:
+            window.append(declaration)
+    background = theme_data.get('global_background-color', '#000000')
+    color = theme_data.get('global_color', '#00ff00')
+    border = theme_data.get('menu_border', '1px solid #00ff00')
+    selected = theme_data.get('list_view_item_selected_background-color', 'rgba(0, 80, 0, 200)')
+    return {
+        "QMainWindow": window,
+        CONNECTION_LIST: declarations("list_view_", ("list_view_item_",)),
+        f"{CONNECTION_LIST}::item": declarations("list_view_item_", ("list_view_item_selected_",)),
+        f"{CONNECTION_LIST}::item:selected": declarations("list_view_item_selected_"),
+        MAIN_BUTTONS: declarations("button_", ("hover", "pressed", "disabled")),
+        f"{MAIN_BUTTONS}:hover": declarations("button_hover_"),
+        f"{MAIN_BUTTONS}:pressed": declarations("button_pressed_"),
+        f"{MAIN_BUTTONS}:disabled": declarations("button_disabled_"),
+        "QMenuBar": [f"background-color: {background}", f"color: {color}", f"border-bottom: {border}"],
+        "QMenuBar::item": ["background-color: transparent"],
+        "QMenuBar::item:selected": [f"background-color: {selected}"],
+        "QMenuBar QMenu": [f"background-color: {background}", f"color: {color}", f"border: {border}"],
+        "QMenuBar QMenu::item": ["background-color: transparent"],
+        "QMenuBar QMenu::item:selected": [f"background-color: {selected}"],
+    }
+
+
+def parse(stylesheet):
+    rules = {}
+    for line in stylesheet.splitlines():
+        selector, _, body = line.partition(" { ")
+        rules[selector] = [declaration.strip() for declaration in body.rstrip("; }").split("; ")]
+    return rules
+
+
+@pytest.mark.parametrize('theme', BUNDLED_THEMES)
+def test_compiled_stylesheet_matches_the_old_inline_styles(theme):
+    with open(os.path.join(config.DEV_THEMES_DIR, theme, 'styles.json')) as f:
+        theme_data = json.load(f)
+    compiled = parse(compile_theme(theme_data))
+    # The search box is new; everything else must carry over unchanged
+    compiled.pop(theme_compiler.CONNECTION_SEARCH)
+    assert compiled == {selector: [declaration.strip() for declaration in rules]
+                        for selector, rules in legacy_rules(theme_data).items() if rules}
+
+
+def test_cache_key_follows_the_theme_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'THEMES_DIR', str(tmp_path / 'themes'))
+    monkeypatch.setattr(theme_compiler, 'QSS_CACHE_DIR', str(tmp_path / 'qss'))
+    theme_dir = tmp_path / 'themes' / 'custom'
+    theme_dir.mkdir(parents=True)
+    (theme_dir / 'styles.json').write_text('{"button_color": "#111111"}')
+
+    first = compiled_stylesheet(config.load_theme('custom'))
+    assert "color: #111111" in first
+    # A second load of the same file is served from the cache
+    monkeypatch.setattr(theme_compiler, 'compile_theme', lambda theme_data: pytest.fail("recompiled a cached theme"))
+    assert compiled_stylesheet(config.load_theme('custom')) == first
+    monkeypatch.setattr(theme_compiler, 'compile_theme', compile_theme)
+
+    (theme_dir / 'styles.json').write_text('{"button_color": "#222222"}')
+    assert "color: #222222" in compiled_stylesheet(config.load_theme('custom'))
+    assert len(os.listdir(tmp_path / 'qss')) == 2
@@ -0,0 +1,62 @@
+import os
+import shutil
+
+import pytest
+
+import config
+
+
+def write(path, text):
+    path.write_text(text)
+    # Some filesystems keep whole-second mtimes; make sure a rewrite looks changed
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def themes(tmp_path, monkeypatch):
+    packaged = tmp_path / 'packaged'
+    for theme in ('light', 'dark'):
+        (packaged / theme).mkdir(parents=True)
+        write(packaged / theme / 'styles.json', f'{{"name": "{theme}"}}')
+    installed = tmp_path / 'installed'
+    monkeypatch.setattr(config, 'DEV_THEMES_DIR', str(packaged))
+    monkeypatch.setattr(config, 'THEMES_DIR', str(installed))
+    monkeypatch.setattr(config, 'THEMES_MANIFEST', str(installed / '.manifest.json'))
+    return packaged, installed
+
+
+def test_a_matching_manifest_skips_every_theme(themes, monkeypatch):
+    packaged, installed = themes
+    assert config.ensure_themes_dir()['copied'] == ['dark', 'light']
+    assert (installed / 'dark' / 'styles.json').read_text() == '{"name": "dark"}'
+
+    monkeypatch.setattr(shutil, 'copytree', lambda *args, **kwargs: pytest.fail("copied an unchanged theme"))
+    monkeypatch.setattr(config, '_theme_hash', lambda *args: pytest.fail("hashed a theme with unchanged stats"))
+    assert config.ensure_themes_dir()['unchanged'] == ['dark', 'light']
+
+
+def test_only_changed_themes_are_copied(themes):
+    packaged, installed = themes
+    config.ensure_themes_dir()
+    write(packaged / 'dark' / 'styles.json', '{"name": "darker"}')
+    # Touched but identical: the hash check keeps it from being copied
+    write(packaged / 'light' / 'styles.json', '{"name": "light"}')
+
+    report = config.ensure_themes_dir()
+    assert (report['copied'], report['unchanged']) == (['dark'], ['light'])
+    assert (installed / 'dark' / 'styles.json').read_text() == '{"name": "darker"}'
+
+
+@pytest.mark.parametrize('dev', [False, True])
+def test_user_edited_themes_are_left_alone_outside_dev_mode(themes, monkeypatch, dev):
+    packaged, installed = themes
+    monkeypatch.setattr(config, 'DEV', dev)
+    config.ensure_themes_dir()
+    write(installed / 'dark' / 'styles.json', '{"name": "mine"}')
+    write(packaged / 'dark' / 'styles.json', '{"name": "darker"}')
+
+    report = config.ensure_themes_dir()
+    assert ('dark' in report['copied']) == dev
+    expected = '{"name": "darker"}' if dev else '{"name": "mine"}'
+    assert (installed / 'dark' / 'styles.json').read_text() == expected
@@ -0,0 +1,27 @@
+from PyQt5.QtWidgets import QWidget
+
+from connection import Connection
+from model import ConnectionListModel, FETCH_BATCH_SIZE
+from tray import TrayManager
+
+
+def make_connection(number, name):
+    return Connection.from_dict({'id': f'c{number}', 'name': name, 'domain': 'example.com', 'protocol': 'ssh'})
+
+
+def test_tray_follows_connections_no_view_has_fetched(qapp):
+    model = ConnectionListModel([make_connection(number, f'A{number}') for number in range(2 * FETCH_BATCH_SIZE)])
+    window = QWidget()
+    tray = TrayManager(window, model)
+    assert model.loaded_count < len(model.connections)
+
+    row = len(model.connections) - 100
+    renamed = model.get_connection(row).copy()
+    renamed['name'] = 'Zed'
+    model.update_connection(row, renamed)
+    assert tray.group_ids['Z'] == {renamed['id']}
+
+    model.remove_connections([len(model.connections) - 50])
+    assert len(tray.group_ids['A']) == len(model.connections) - 1
+
+    tray.hide_tray_icon()
@@ -0,0 +1,87 @@
+import random
+
+import pytest
+from PyQt5.QtCore import QModelIndex, qInstallMessageHandler
+from PyQt5.QtTest import QAbstractItemModelTester
+
+from connection import Connection
+from model import ConnectionListModel
+from tree_model import ConnectionTreeModel, GroupNode
+
+GROUPS = ['', 'prod', 'prod/eu', 'prod/us', 'staging', 'staging/eu', 'dev/a/b']
+
+
+@pytest.fixture
+def model_warnings(qapp):
+    """Collect the Qt warnings QAbstractItemModelTester reports instead of aborting on them."""
+    warnings = []
+    previous = qInstallMessageHandler(lambda mode, context, message: warnings.append(message))
+    yield warnings
+    qInstallMessageHandler(previous)
+
+
+def make_connection(number, group):
+    return Connection.from_dict({'id': f'c{number}', 'name': f'host{number}', 'protocol': 'ssh', 'group': group})
+
+
+def expand_all(tree):
+    """Fetch every group's rows, as expanding the whole tree in a view would."""
+    parents = [QModelIndex()]
+    while parents:
+        parent = parents.pop()
+        while tree.canFetchMore(parent):
+            tree.fetchMore(parent)
+        for row in range(tree.rowCount(parent)):
+            index = tree.index(row, 0, parent)
+            if isinstance(tree.item(index), GroupNode):
+                parents.append(index)
+
+
+def shown_connections(tree):
+    ids = []
+    parents = [QModelIndex()]
+    while parents:
+        parent = parents.pop()
+        for row in range(tree.rowCount(parent)):
+            index = tree.index(row, 0, parent)
+            if isinstance(tree.item(index), GroupNode):
+                parents.append(index)
+            else:
+                ids.append(tree.data(index)['id'])
+    return ids
+
+
+def test_add_remove_and_regroup_keep_the_tree_consistent(model_warnings):
+    rng = random.Random(25)
+    source = ConnectionListModel([make_connection(number, rng.choice(GROUPS)) for number in range(12)])
+    tree = ConnectionTreeModel(source)
+    tester = QAbstractItemModelTester(tree, QAbstractItemModelTester.FailureReportingMode.Warning)
+    next_number = 12
+    for _ in range(300):
+        expand_all(tree)
+        action = rng.random()
+        if action < 0.3:
+            source.add_connections([make_connection(next_number + i, rng.choice(GROUPS)) for i in range(rng.randint(1, 3))])
+            next_number += 3
+        elif action < 0.6 and source.connections:
+            source.remove_connections(rng.sample(range(len(source.connections)), min(len(source.connections), rng.randint(1, 4))))
+        elif source.connections:
+            row = rng.randrange(len(source.connections))
+            connection = source.connections[row].copy()
+            connection['group'] = rng.choice(GROUPS)
+            source.update_connection(row, connection)
+        assert not model_warnings, model_warnings[0]
+
+    expand_all(tree)
+    assert sorted(shown_connections(tree)) == sorted(connection['id'] for connection in source.connections)
+    assert tree.root.count == len(source.connections)
+    del tester
+
+
+def test_groups_exist_only_while_they_hold_connections(qapp):
+    source = ConnectionListModel([make_connection(1, 'prod/eu'), make_connection(2, 'prod')])
+    tree = ConnectionTreeModel(source)
+    assert tree.group_paths() == ['prod', 'prod/eu']
+    source.remove_connections([0])
+    assert tree.group_paths() == ['prod']
+    assert tree.root.groups['prod'].count == 1
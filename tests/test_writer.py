@@ -0,0 +1,60 @@
+import os
+import threading
+
+import pytest
+
+from writer import BackgroundWriter, atomic_write
+
+
+@pytest.fixture
+def writer():
+    writer = BackgroundWriter(debounce=0.05, max_delay=0.2)
+    yield writer
+    writer.stop()
+
+
+def test_atomic_write_replaces_the_file(tmp_path):
+    path = str(tmp_path / 'file')
+    atomic_write(path, b'one')
+    atomic_write(path, b'two')
+    with open(path, 'rb') as f:
+        assert f.read() == b'two'
+    assert os.listdir(tmp_path) == ['file']
+
+
+def test_a_burst_on_one_key_runs_only_the_last_job(writer):
+    calls = []
+    for number in range(10):
+        writer.schedule('config', lambda number=number: calls.append(number))
+    writer.schedule('connections', lambda: calls.append('connections'))
+    assert writer.flush(timeout=5)
+    assert sorted(calls, key=str) == [9, 'connections']
+    assert not writer.has_pending()
+
+
+def test_flush_waits_for_a_job_already_running(writer):
+    started = threading.Event()
+    release = threading.Event()
+    done = []
+
+    def slow_job():
+        started.set()
+        release.wait(5)
+        done.append(True)
+
+    writer.schedule('slow', slow_job)
+    writer.flush(timeout=0)
+    assert started.wait(5)
+    threading.Timer(0.1, release.set).start()
+    assert writer.flush(timeout=5)
+    assert done == [True]
+
+
+def test_a_failing_job_does_not_stop_the_writer(writer):
+    calls = []
+    writer.schedule('broken', lambda: 1 / 0)
+    writer.schedule('fine', lambda: calls.append('fine'))
+    assert writer.flush(timeout=5)
+    writer.schedule('later', lambda: calls.append('later'))
+    assert writer.flush(timeout=5)
+    assert calls == ['fine', 'later']